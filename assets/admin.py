@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import MediaFile, MediaJob
+
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "refcount", "width", "height", "duration", "updated_at")
+    search_fields = ("name", "checksum")
+    readonly_fields = (
+        "name", "checksum", "size", "refcount", "width", "height", "duration", "derivatives", "metadata",
+        "updated_at",
+    )
+
+
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ("task", "name", "status", "attempts", "created_at", "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("name",)
+    readonly_fields = (
+        "task", "name", "status", "attempts", "result", "error",
+        "run_after", "created_at", "started_at", "finished_at",
+    )
+    actions = ["retry_jobs"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected jobs")
+    def retry_jobs(self, request, queryset):
+        count = queryset.exclude(status=MediaJob.RUNNING).update(
+            status=MediaJob.PENDING, attempts=0, run_after=timezone.now(),
+        )
+        self.message_user(request, f"{count} job(s) queued again.")
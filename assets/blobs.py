@@ -0,0 +1,128 @@
+"""
+Reference counting and garbage collection of content-hashed uploads
+(assets.storage.ContentHashStorage) and of the audio sprites built from them.
+
+MediaFile.refcount is kept up to date as records gain and lose uploads
+(assets.signals). Writes that bypass signals (queryset update(), raw SQL,
+fixtures) can make it drift, so collect_garbage() recounts the references
+from the file fields themselves before deleting anything.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from .hls import package_prefix
+from .images import derivative_prefix
+from quizzes.models import Quiz
+from .media_fields import MEDIA_FIELDS
+from .models import MediaFile
+from .storage import BLOB_PREFIX, blob_checksum, is_blob
+from .tasks import normalized_audio_name
+
+
+SPRITE_PREFIX = "sprites"
+
+
+def add_reference(name):
+    if not is_blob(name):
+        return
+    if not MediaFile.objects.filter(name=name).update(refcount=F("refcount") + 1):
+        media_file, created = MediaFile.objects.get_or_create(name=name, defaults={
+            "checksum": blob_checksum(name),
+            "size": default_storage.size(name),
+            "refcount": 1,
+        })
+        if not created:
+            MediaFile.objects.filter(pk=media_file.pk).update(refcount=F("refcount") + 1)
+
+
+def remove_reference(name):
+    if is_blob(name):
+        MediaFile.objects.filter(name=name, refcount__gt=0).update(refcount=F("refcount") - 1)
+
+
+def count_references():
+    """
+    How many records use each blob, counted from the file fields.
+    """
+    counts = Counter()
+    for model, fields in MEDIA_FIELDS.items():
+        for field in fields:
+            names = model.objects.filter(**{f"{field}__startswith": BLOB_PREFIX}).values_list(field, flat=True)
+            counts.update(names)
+    return counts
+
+
+def recount():
+    """
+    Resets every blob's refcount to its actual number of references.
+    """
+    counts = count_references()
+    for media_file in MediaFile.objects.filter(name__startswith=BLOB_PREFIX):
+        if media_file.refcount != counts[media_file.name]:
+            MediaFile.objects.filter(pk=media_file.pk).update(refcount=counts[media_file.name])
+    return counts
+
+
+def walk(path):
+    """
+    Every file name in storage under `path`.
+    """
+    try:
+        directories, files = default_storage.listdir(path)
+    except FileNotFoundError:
+        return
+    for file in files:
+        yield f"{path}/{file}"
+    for directory in directories:
+        yield from walk(f"{path}/{directory}")
+
+
+def derived_names(checksum):
+    """
+    Files generated from a blob: image derivatives, normalized audio, HLS package.
+    """
+    names = [*walk(derivative_prefix(checksum)), *walk(package_prefix(checksum))]
+    if default_storage.exists(normalized_audio_name(checksum)):
+        names.append(normalized_audio_name(checksum))
+    return names
+
+
+def collect_garbage(grace=timedelta(hours=24), dry_run=False):
+    """
+    Deletes blobs no record uses, with their derived files and MediaFile,
+    and audio sprites no quiz uses. Files younger than `grace` are kept,
+    their record may not be saved yet (storage touches a blob when a new
+    upload reuses it). Returns the names of the deleted blobs and sprites and
+    how many bytes they freed.
+    """
+    counts = recount()
+    cutoff = timezone.now() - grace
+    deleted, freed = [], 0
+    for name in walk(BLOB_PREFIX.rstrip("/")):
+        if counts[name] or default_storage.get_modified_time(name) > cutoff:
+            continue
+        checksum = blob_checksum(name)
+        # a legacy upload with the same content still needs the derived files
+        shared = MediaFile.objects.filter(checksum=checksum).exclude(name=name).exists()
+        files = [name, *([] if shared else derived_names(checksum))]
+        freed += sum(default_storage.size(file) for file in files)
+        deleted.append(name)
+        if not dry_run:
+            for file in files:
+                default_storage.delete(file)
+            MediaFile.objects.filter(name=name).delete()
+
+    # sprites are named after all of a quiz's clips, not after one blob
+    used = set(Quiz.objects.exclude(audio_sprite="").values_list("audio_sprite", flat=True))
+    for name in walk(SPRITE_PREFIX):
+        if name in used or default_storage.get_modified_time(name) > cutoff:
+            continue
+        freed += default_storage.size(name)
+        deleted.append(name)
+        if not dry_run:
+            default_storage.delete(name)
+    return deleted, freed
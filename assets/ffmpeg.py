@@ -0,0 +1,94 @@
+"""
+Thin wrappers around the local ffmpeg/ffprobe binaries (FFMPEG_BINARY,
+FFPROBE_BINARY). Media tasks that need them are skipped when they are not
+installed.
+"""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+class FFmpegError(Exception):
+    pass
+
+
+def ffmpeg_available():
+    return bool(shutil.which(settings.FFMPEG_BINARY) and shutil.which(settings.FFPROBE_BINARY))
+
+
+def run(args, timeout=None):
+    try:
+        result = subprocess.run(args, capture_output=True, timeout=timeout, check=False)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        raise FFmpegError(f"{args[0]} failed: {exc}") from exc
+    if result.returncode != 0:
+        raise FFmpegError(result.stderr.decode(errors="replace")[-2000:])
+    return result
+
+
+def ffmpeg(*args, timeout=None):
+    return run([settings.FFMPEG_BINARY, "-hide_banner", "-nostdin", "-y", *args], timeout=timeout)
+
+
+def probe(path):
+    """
+    ffprobe's format and stream information for a local file.
+    """
+    result = run([
+        settings.FFPROBE_BINARY, "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", path,
+    ])
+    return json.loads(result.stdout)
+
+
+def media_metadata(path):
+    """
+    Dimensions, duration and codecs of a local media file.
+    """
+    info = probe(path)
+    streams = {}
+    for stream in info.get("streams", []):
+        streams.setdefault(stream.get("codec_type"), stream)
+    video = streams.get("video", {})
+    audio = streams.get("audio", {})
+    format = info.get("format", {})
+    duration = format.get("duration")
+    return {
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "duration": float(duration) if duration else None,
+        "metadata": {
+            "format": format.get("format_name"),
+            "bit_rate": int(format["bit_rate"]) if format.get("bit_rate") else None,
+            "video_codec": video.get("codec_name"),
+            "audio_codec": audio.get("codec_name"),
+        },
+    }
+
+
+@contextmanager
+def local_path(name):
+    """
+    Local filesystem path of a stored file, copied to a temporary file when
+    the storage is not on local disk.
+    """
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+    suffix = os.path.splitext(name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with default_storage.open(name) as file:
+            for chunk in file.chunks():
+                tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
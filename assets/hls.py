@@ -0,0 +1,110 @@
+"""
+HLS packaging of lesson videos.
+
+A packaged video is a set of HLS renditions (HLS_RENDITIONS, capped at the
+source height) cut into HLS_SEGMENT_SECONDS segments, a master playlist and a
+poster frame, all stored under hls/<hash[:2]>/<hash>/ of the source file, so
+players can start after the first few seconds of the lowest bitrate and
+switch up as bandwidth allows. Templates and serializers fall back to the
+original MP4 while a video is not packaged (or ffmpeg is not installed).
+"""
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .ffmpeg import ffmpeg, media_metadata
+
+
+MASTER_PLAYLIST = "master.m3u8"
+POSTER = "poster.jpg"
+
+
+def package_prefix(checksum):
+    return f"hls/{checksum[:2]}/{checksum}"
+
+
+def even(value):
+    return int(value) // 2 * 2
+
+
+def rendition_ladder(height):
+    """
+    (height, video bitrate, audio bitrate) renditions worth encoding for a
+    source of the given height; never upscales past the smallest one.
+    """
+    ladder = sorted(settings.HLS_RENDITIONS)
+    return [rendition for rendition in ladder if rendition[0] <= height] or ladder[:1]
+
+
+def encode(source, output_dir):
+    """
+    Encodes `source` into renditions, master playlist and poster inside the
+    local `output_dir`. Returns the renditions written.
+    """
+    found = media_metadata(source)
+    source_width = found["width"] or 16
+    source_height = found["height"] or 9
+    duration = found["duration"] or 0
+
+    renditions = []
+    for height, video_bitrate, audio_bitrate in rendition_ladder(source_height):
+        height = even(min(height, source_height))
+        width = even(source_width * height / source_height)
+        folder = f"{height}p"
+        os.makedirs(os.path.join(output_dir, folder))
+        ffmpeg(
+            "-i", source, "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", f"scale={width}:{height}",
+            "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+            "-b:v", str(video_bitrate), "-maxrate", str(int(video_bitrate * 1.07)),
+            "-bufsize", str(int(video_bitrate * 1.5)),
+            # fixed GOP so every rendition can switch at segment boundaries
+            "-g", "48", "-keyint_min", "48", "-sc_threshold", "0",
+            "-c:a", "aac", "-b:a", str(audio_bitrate), "-ac", "2",
+            "-hls_time", str(settings.HLS_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(output_dir, folder, "%03d.ts"),
+            os.path.join(output_dir, folder, "index.m3u8"),
+        )
+        renditions.append({
+            "width": width,
+            "height": height,
+            "bandwidth": video_bitrate + audio_bitrate,
+            "playlist": f"{folder}/index.m3u8",
+        })
+
+    ffmpeg(
+        "-ss", str(min(1.0, duration / 2)), "-i", source, "-frames:v", "1",
+        "-vf", f"scale=-2:{even(min(720, source_height))}", "-q:v", "3",
+        os.path.join(output_dir, POSTER),
+    )
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition in renditions:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={rendition['bandwidth']},"
+            f"RESOLUTION={rendition['width']}x{rendition['height']}"
+        )
+        lines.append(rendition["playlist"])
+    with open(os.path.join(output_dir, MASTER_PLAYLIST), "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return renditions
+
+
+def store_package(output_dir, prefix):
+    """
+    Copies a packaged video into storage, master playlist last so its
+    presence means the package is complete.
+    """
+    files = []
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, "/")
+            if relative != MASTER_PLAYLIST:
+                files.append(relative)
+    for relative in [*sorted(files), MASTER_PLAYLIST]:
+        target = f"{prefix}/{relative}"
+        if not default_storage.exists(target):
+            with open(os.path.join(output_dir, relative), "rb") as file:
+                default_storage.save(target, File(file))
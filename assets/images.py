@@ -0,0 +1,216 @@
+"""
+Responsive image derivatives.
+
+Every uploaded image gets width-limited copies in its own format (JPEG, or
+PNG when it has transparency) plus the modern formats in
+IMAGE_DERIVATIVE_FORMATS (WebP, and AVIF where Pillow supports it).
+Derivatives are stored under the source's content hash,
+derivatives/<hash[:2]>/<hash>/<width>.<ext>, so identical uploads share them
+and a derivative URL always points at the same bytes.
+
+They are generated by a media job queued on upload (assets.jobs) when
+IMAGE_DERIVATIVES_ON_UPLOAD is set, and otherwise the first time a template
+or serializer asks for the srcset. Requests never generate them: until the
+job has run, pages and payloads only get the original image URL.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from practice_english.content_version import fingerprint, get_cache
+from .models import MediaFile
+
+
+# extension -> (Pillow format, mime type)
+FORMATS = {
+    "jpg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+}
+IMAGE_INFO_KEY = "image-info:{}"
+MISSING_TIMEOUT = 300  # retry files that are missing or not images after 5 minutes
+CHUNK_SIZE = 64 * 1024
+
+
+def file_checksum(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def derivative_prefix(checksum):
+    return f"derivatives/{checksum[:2]}/{checksum}"
+
+
+def derivative_name(checksum, width, ext):
+    return f"{derivative_prefix(checksum)}/{width}.{ext}"
+
+
+def derivative_widths(width):
+    return sorted({min(size, width) for size in settings.IMAGE_DERIVATIVE_WIDTHS})
+
+
+def modern_formats():
+    return [ext for ext in settings.IMAGE_DERIVATIVE_FORMATS if features.check(FORMATS[ext][0].lower())]
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def render(image, width, ext):
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, FORMATS[ext][0], quality=settings.IMAGE_DERIVATIVE_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name):
+    """
+    Hashes the image stored under `name`, writes its missing derivatives and
+    records them on its MediaFile.
+
+    Returns the MediaFile, or None when the file is missing or not an image.
+    """
+    try:
+        with default_storage.open(name) as file:
+            checksum = file_checksum(file)
+            size = file.size
+            file.seek(0)
+            image = Image.open(file)
+            image.load()
+    except (OSError, UnidentifiedImageError):
+        return None
+
+    image = ImageOps.exif_transpose(image)
+    fallback = "png" if has_alpha(image) else "jpg"
+    image = image.convert("RGBA" if fallback == "png" else "RGB")
+
+    derivatives = {}
+    for ext in (fallback, *modern_formats()):
+        for width in derivative_widths(image.width):
+            target = derivative_name(checksum, width, ext)
+            if not default_storage.exists(target):
+                default_storage.save(target, ContentFile(render(image, width, ext)))
+            derivatives.setdefault(ext, []).append(width)
+
+    media_file, _ = MediaFile.objects.update_or_create(name=name, defaults={
+        "checksum": checksum,
+        "size": size,
+        "width": image.width,
+        "height": image.height,
+        "derivatives": derivatives,
+    })
+    get_cache().set(IMAGE_INFO_KEY.format(fingerprint(name)), image_info_for(media_file), timeout=None)
+    return media_file
+
+
+def image_info_for(media_file):
+    derivatives = media_file.derivatives
+    return {
+        "checksum": media_file.checksum,
+        "width": media_file.width,
+        "height": media_file.height,
+        "fallback": "png" if "png" in derivatives else "jpg",
+        "derivatives": derivatives,
+    }
+
+
+def image_info(name):
+    """
+    Cached checksum, dimensions and derivatives of an image. Returns None for
+    missing or broken files and for images whose derivatives are not ready.
+    """
+    return prefetch_image_info([name]).get(name) if name else None
+
+
+def prefetch_image_info(names):
+    """
+    {name: image_info(name)} for many images, with one cache round-trip and
+    one MediaFile query for the uncached ones, so payloads serialize in a
+    fixed number of queries. Images without derivatives get a derivatives job
+    queued (not run, even with MEDIA_JOBS_EAGER) and are retried after
+    MISSING_TIMEOUT; the job caches their info once done.
+    """
+    from .jobs import enqueue
+
+    cache = get_cache()
+    keys = {name: IMAGE_INFO_KEY.format(fingerprint(name)) for name in names if name}
+    found = cache.get_many(keys.values())
+    infos = {name: found[key] for name, key in keys.items() if key in found}
+
+    missing = [name for name in keys if name not in infos]
+    if missing:
+        known = MediaFile.objects.filter(name__in=missing).in_bulk(field_name="name")
+        ready, pending = {}, {}
+        for name in missing:
+            media_file = known.get(name)
+            if media_file is not None and media_file.derivatives:
+                ready[keys[name]] = infos[name] = image_info_for(media_file)
+                continue
+            # rows are recorded on upload, so only unknown names cost a storage check
+            if media_file is not None or default_storage.exists(name):
+                enqueue("derivatives", name, eager=False)
+            pending[keys[name]] = infos[name] = {}
+        cache.set_many(ready, timeout=None)
+        cache.set_many(pending, timeout=MISSING_TIMEOUT)
+    return {name: info or None for name, info in infos.items()}
+
+
+def prefetch_images(objects, field="image"):
+    """
+    prefetch_image_info() of the `field` images of `objects`, e.g. a page of lessons.
+    """
+    return prefetch_image_info(getattr(obj, field).name for obj in objects if getattr(obj, field))
+
+
+def build_srcset(info, ext, request=None):
+    urls = []
+    for width in info["derivatives"].get(ext, ()):
+        url = default_storage.url(derivative_name(info["checksum"], width, ext))
+        urls.append(f"{request.build_absolute_uri(url) if request else url} {width}w")
+    return ", ".join(urls)
+
+
+def image_sources(info, request=None):
+    """
+    <source> type/srcset pairs for the modern formats of an image, best first.
+    """
+    return [
+        {"type": FORMATS[ext][1], "srcset": build_srcset(info, ext, request)}
+        for ext in reversed(FORMATS)
+        if ext != info["fallback"] and ext in info["derivatives"]
+    ]
+
+
+def srcset(name, ext=None, request=None):
+    """
+    `srcset` attribute value for an image in one format (its own by default).
+    """
+    info = image_info(name)
+    if not info:
+        return ""
+    return build_srcset(info, ext or info["fallback"], request)
+
+
+def image_variants(name, request=None):
+    """
+    Dimensions and srcsets of an image for API payloads: `srcset` is in the
+    image's own format, `sources` lists the modern formats, best first.
+    """
+    info = image_info(name)
+    if not info:
+        return None
+    return {
+        "width": info["width"],
+        "height": info["height"],
+        "srcset": build_srcset(info, info["fallback"], request),
+        "sources": image_sources(info, request),
+    }
@@ -0,0 +1,127 @@
+"""
+Database-backed queue for media processing.
+
+Saving a model with new uploads only inserts MediaJob rows (assets.signals);
+the file work itself (image derivatives, checksums, video probing and HLS
+packaging, audio loudness normalization and quiz audio sprites, see
+assets/tasks.py) runs in
+`manage.py media_worker` processes, so admin saves no longer wait for it.
+
+Workers claim a job with a conditional UPDATE, so several of them can run side
+by side on the same database without a broker. A failing job is retried with
+exponential backoff until it has been tried MEDIA_JOB_MAX_ATTEMPTS times, then
+marked failed with its traceback (visible in the admin). Jobs left running by
+a worker that died are requeued after MEDIA_JOB_TIMEOUT seconds.
+
+With MEDIA_JOBS_EAGER set, jobs run right away in the saving process instead.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MediaJob
+from .tasks import TASKS
+
+
+# Tasks each kind of uploaded file goes through
+PIPELINES = {
+    "image": ("derivatives",),
+    "video": ("probe_video", "package_video"),
+    "audio": ("normalize_audio",),
+    "file": ("checksum",),
+}
+CLAIM_BATCH = 10
+RETRY_DELAY = 30  # seconds before the first retry, doubled for each further one
+
+
+def enqueue(task, name, eager=None):
+    """
+    Queues `task` for the stored file `name`, reusing an identical pending job.
+    The job runs right away when `eager` (default: MEDIA_JOBS_EAGER) is set.
+    """
+    job, _ = MediaJob.objects.get_or_create(task=task, name=name, status=MediaJob.PENDING)
+    if settings.MEDIA_JOBS_EAGER if eager is None else eager:
+        job = claim(job)
+        if job is not None:
+            run_job(job)
+    return job
+
+
+def enqueue_file(kind, name):
+    return [enqueue(task, name) for task in PIPELINES[kind]]
+
+
+def claim(job=None):
+    """
+    Marks the given pending job, or the next due one, as running for this
+    worker. Returns it, or None when there is nothing to claim.
+    """
+    now = timezone.now()
+    if job is not None:
+        candidates = [job]
+    else:
+        candidates = MediaJob.objects.filter(
+            status=MediaJob.PENDING, run_after__lte=now,
+        ).order_by("run_after", "pk")[:CLAIM_BATCH]
+
+    for candidate in candidates:
+        claimed = MediaJob.objects.filter(pk=candidate.pk, status=MediaJob.PENDING).update(
+            status=MediaJob.RUNNING, started_at=now, attempts=F("attempts") + 1,
+        )
+        if claimed:
+            candidate.refresh_from_db()
+            return candidate
+    return None
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records its outcome. Tasks open their own short
+    transactions around the rows they write: with the SQLite IMMEDIATE
+    profile a transaction holds the write lock from its start, so one around
+    a long encode would block every other write meanwhile.
+    """
+    try:
+        result = TASKS[job.task](job.name)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < settings.MEDIA_JOB_MAX_ATTEMPTS:
+            job.status = MediaJob.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = MediaJob.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = MediaJob.DONE
+        job.result = result or {}
+        job.error = ""
+        job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "error", "run_after", "finished_at"])
+    return job
+
+
+def requeue_stale():
+    """
+    Puts jobs back in the queue whose worker stopped reporting back.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.MEDIA_JOB_TIMEOUT)
+    return MediaJob.objects.filter(status=MediaJob.RUNNING, started_at__lt=cutoff).update(
+        status=MediaJob.PENDING, run_after=timezone.now(),
+    )
+
+
+def run_pending(limit=None):
+    """
+    Runs due jobs until there are none left (or `limit` ran), returns how many ran.
+    """
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
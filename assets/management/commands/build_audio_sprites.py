@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from assets.jobs import claim, enqueue, run_job
+from assets.models import MediaJob
+from assets.tasks import sprite_job_name
+from quizzes.models import AudioQuizOption
+
+
+class Command(BaseCommand):
+    help = "Queues an audio sprite build for every quiz with audio options."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--now", action="store_true", help="Build in this process instead of the media worker.")
+
+    def handle(self, *args, **options):
+        quiz_ids = set(
+            AudioQuizOption.objects.exclude(audio_file="").values_list("question__quiz_id", flat=True)
+        )
+
+        failed = 0
+        for quiz_id in sorted(quiz_ids):
+            job = enqueue("audio_sprite", sprite_job_name(quiz_id))
+            if options["now"]:
+                job = claim(job)
+                if job is not None and run_job(job).status != MediaJob.DONE:
+                    failed += 1
+                    self.stderr.write(f"Could not build the sprite of quiz {quiz_id}, see the media job for details.")
+        action = "Built" if options["now"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(quiz_ids) - failed} audio sprite(s)."))
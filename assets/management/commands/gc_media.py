@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from assets.blobs import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Recounts blob references and deletes the uploaded blobs no record uses anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be deleted.")
+        parser.add_argument(
+            "--grace-hours", type=float, default=settings.MEDIA_GC_GRACE_HOURS,
+            help="Keep unused blobs younger than this (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        deleted, freed = collect_garbage(timedelta(hours=options["grace_hours"]), dry_run=options["dry_run"])
+        for name in deleted:
+            self.stdout.write(name)
+        action = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(deleted)} blob(s), {filesizeformat(freed)}."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from assets.images import generate_derivatives
+from assets.models import MediaFile
+from assets.media_fields import IMAGE_FIELDS
+from assets.tasks import media_users_changed
+
+
+class Command(BaseCommand):
+    help = "Generates responsive derivatives for every uploaded image that lacks them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate images that already have derivatives.")
+
+    def handle(self, *args, **options):
+        done = set() if options["force"] else set(
+            MediaFile.objects.exclude(derivatives={}).values_list("name", flat=True)
+        )
+        generated = failed = 0
+        for model, fields in IMAGE_FIELDS.items():
+            for field in fields:
+                names = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                for name in names.order_by().values_list(field, flat=True).distinct().iterator():
+                    if name in done:
+                        continue
+                    done.add(name)
+                    if generate_derivatives(name):
+                        media_users_changed(name, IMAGE_FIELDS)
+                        generated += 1
+                    else:
+                        failed += 1
+                        self.stderr.write(f"Skipped {name}: missing or not an image.")
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {generated} images ({failed} skipped)."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assets.jobs import requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes queued media jobs (derivatives, checksums, probing, audio normalization). "
+        "Run several of these for parallel workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                requeue_stale()
+                ran = run_pending()
+                if ran:
+                    self.stdout.write(f"Ran {ran} media job(s).")
+                if options["once"]:
+                    break
+                if not ran:
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from assets.jobs import claim, enqueue, run_job
+from assets.media_fields import fields_of_kind
+from assets.models import MediaJob
+
+
+class Command(BaseCommand):
+    help = "Queues HLS packaging for every lesson and block video that is not packaged yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--now", action="store_true", help="Package in this process instead of the media worker.")
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in fields_of_kind("video"):
+            videos = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            names.update(videos.filter(video_manifest="").values_list(field, flat=True))
+
+        failed = 0
+        for name in sorted(names):
+            job = enqueue("package_video", name)
+            if options["now"]:
+                job = claim(job)
+                if job is not None and run_job(job).status != MediaJob.DONE:
+                    failed += 1
+                    self.stderr.write(f"Could not package {name}, see the media job for details.")
+        action = "Packaged" if options["now"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(names) - failed} video(s)."))
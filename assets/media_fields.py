@@ -0,0 +1,40 @@
+from lessons.models import Lesson, LessonBlock
+from quizzes.models import (
+    Quiz,
+    SortingPair,
+    MatchingGame,
+    VisualQuizQuestion,
+    VisualQuizOption,
+    AudioQuizQuestion,
+    AudioQuizOption,
+)
+from resources.models import Worksheet
+
+
+# Uploaded file fields and the kind of processing they get (see assets.jobs.PIPELINES)
+MEDIA_FIELDS = {
+    Lesson: {"image": "image", "video_file": "video"},
+    LessonBlock: {"video": "video"},
+    Quiz: {"cover_image": "image"},
+    SortingPair: {"image": "image"},
+    MatchingGame: {"image": "image"},
+    VisualQuizQuestion: {"question_image": "image"},
+    VisualQuizOption: {"image": "image"},
+    AudioQuizQuestion: {"image": "image"},
+    AudioQuizOption: {"audio_file": "audio"},
+    Worksheet: {"image": "image", "file": "file"},
+}
+
+# Image fields that get responsive derivatives
+IMAGE_FIELDS = {
+    model: tuple(field for field, kind in fields.items() if kind == "image")
+    for model, fields in MEDIA_FIELDS.items()
+    if "image" in fields.values()
+}
+
+
+def fields_of_kind(kind):
+    """
+    (model, field name) pairs of every file field of the given kind.
+    """
+    return [(model, field) for model, fields in MEDIA_FIELDS.items() for field, k in fields.items() if k == kind]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_mediajob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='refcount',
+            field=models.PositiveIntegerField(default=0, help_text='Records using this file, for content-hashed blobs'),
+        ),
+    ]
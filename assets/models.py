@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MediaFile(models.Model):
+    """
+    What we know about one uploaded media file (by storage name): its content
+    hash, size and, for images, dimensions and the derivatives generated for it.
+
+    `derivatives` maps a file extension to the widths available under
+    assets.images.derivative_name(), e.g. {"jpg": [320, 640], "webp": [320, 640]}.
+    `metadata` holds what media jobs found out about audio and video files
+    (codecs, bitrate, the loudness-normalized copy, ...). `refcount` is only
+    kept for content-hashed blobs, see assets/blobs.py.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    checksum = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Seconds, for audio and video")
+    derivatives = models.JSONField(default=dict, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    refcount = models.PositiveIntegerField(default=0, help_text="Records using this file, for content-hashed blobs")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class MediaJob(models.Model):
+    """
+    One unit of background media work (see assets/jobs.py), picked up by
+    `manage.py media_worker`.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    task = models.CharField(max_length=50)
+    name = models.CharField(max_length=255, help_text="Storage name of the file to process")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="media_job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task}: {self.name}"
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .images import image_variants
+
+
+class ResponsiveImageField(serializers.Field):
+    """
+    Read-only dimensions and srcsets of an image field, see assets.images.image_variants().
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return image_variants(value.name, request=self.context.get("request"))
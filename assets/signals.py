@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from quizzes.cache import bump_quiz_version
+from quizzes.models import AudioQuizQuestion, AudioQuizOption, Quiz
+from .blobs import add_reference, remove_reference
+from .jobs import enqueue, enqueue_file
+from .media_fields import MEDIA_FIELDS
+from .tasks import sprite_job_name
+
+
+def media_saving(sender, instance, **kwargs):
+    # new uploads are only written to storage by the fields' pre_save, after this signal
+    instance._new_media = [
+        field for field in MEDIA_FIELDS[sender]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+    # an HLS package belongs to the video it was made from: a new or removed
+    # video falls back to the original file until its own package is ready
+    videos = [field for field, kind in MEDIA_FIELDS[sender].items() if kind == "video"]
+    if any(field in instance._new_media or not getattr(instance, field) for field in videos):
+        instance.clear_video_package()
+    # files the new uploads replace lose a reference
+    instance._replaced_media = []
+    if instance._new_media and instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values(*instance._new_media).first() or {}
+        instance._replaced_media = [name for name in previous.values() if name]
+
+
+def media_saved(sender, instance, **kwargs):
+    for field in getattr(instance, "_new_media", ()):
+        name = getattr(instance, field).name
+        add_reference(name)
+        kind = MEDIA_FIELDS[sender][field]
+        if kind == "image" and not settings.IMAGE_DERIVATIVES_ON_UPLOAD:
+            continue  # queued on first use instead
+        enqueue_file(kind, name)
+    for name in getattr(instance, "_replaced_media", ()):
+        remove_reference(name)
+    instance._new_media = instance._replaced_media = []
+
+
+def media_deleted(sender, instance, **kwargs):
+    for field in MEDIA_FIELDS[sender]:
+        remove_reference(getattr(instance, field).name)
+
+
+def audio_clip_saving(sender, instance, **kwargs):
+    # a new recording no longer matches the option's clip in the quiz sprite
+    instance._clip_changed = instance.pk is not None and not sender.objects.filter(
+        pk=instance.pk, audio_file=instance.audio_file.name or "",
+    ).exists()
+
+
+def drop_sprite_clip(quiz_id, option_id):
+    """
+    Removes an option from its quiz's sprite map, so players use the option's
+    own audio_file until the sprite is rebuilt (never, without ffmpeg).
+    """
+    clips = Quiz.objects.filter(pk=quiz_id).values_list("audio_sprite_map", flat=True).first()
+    if clips and str(option_id) in clips:
+        del clips[str(option_id)]
+        Quiz.objects.filter(pk=quiz_id).update(audio_sprite_map=clips)
+        bump_quiz_version(quiz_id)
+
+
+def audio_clips_changed(sender, instance, signal, **kwargs):
+    if sender is AudioQuizQuestion:
+        quiz_id = instance.quiz_id
+    else:
+        # the question may already be gone in a cascade, its own signal covers that
+        quiz_id = AudioQuizQuestion.objects.filter(pk=instance.question_id).values_list("quiz_id", flat=True).first()
+    if quiz_id is None:
+        return
+    if sender is AudioQuizOption and (signal is post_delete or getattr(instance, "_clip_changed", False)):
+        drop_sprite_clip(quiz_id, instance.pk)
+    enqueue("audio_sprite", sprite_job_name(quiz_id))
+
+
+for model in MEDIA_FIELDS:
+    pre_save.connect(media_saving, sender=model, dispatch_uid=f"media_saving_{model.__name__}")
+    post_save.connect(media_saved, sender=model, dispatch_uid=f"media_saved_{model.__name__}")
+    post_delete.connect(media_deleted, sender=model, dispatch_uid=f"media_deleted_{model.__name__}")
+
+pre_save.connect(audio_clip_saving, sender=AudioQuizOption, dispatch_uid="audio_clip_saving")
+post_save.connect(audio_clips_changed, sender=AudioQuizOption, dispatch_uid="audio_clips_saved")
+for model in (AudioQuizQuestion, AudioQuizOption):
+    post_delete.connect(audio_clips_changed, sender=model, dispatch_uid=f"audio_clips_deleted_{model.__name__}")
@@ -0,0 +1,87 @@
+"""
+Audio sprites for audio quizzes.
+
+Every option clip of a quiz is trimmed of leading/trailing silence,
+loudness-normalized and resampled to mono PCM, the clips are joined with a
+short gap of silence and the result is encoded once into a single compact
+MP3 stored as sprites/<hash[:2]>/<hash>.mp3. The quiz keeps the storage name
+and an {option id: [start, end]} map in seconds, so the player preloads one
+file per quiz and seeks to each option instead of fetching every clip.
+"""
+import hashlib
+import os
+import wave
+
+from django.conf import settings
+
+from .ffmpeg import ffmpeg
+
+
+SAMPLE_RATE = 44100
+GAP_SECONDS = 0.3  # keeps seeks that land slightly early out of the previous clip
+SILENCE = "silenceremove=start_periods=1:start_threshold=-50dB:start_silence=0.05"
+
+
+def sprite_name(checksums):
+    """
+    Content-addressed storage name of the sprite of the given clips (in order).
+    """
+    key = ",".join([*checksums, str(settings.AUDIO_LOUDNESS_TARGET), settings.AUDIO_SPRITE_BITRATE])
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"sprites/{digest[:2]}/{digest}.mp3"
+
+
+def prepare_clip(source, output):
+    """
+    Writes `source` as trimmed, normalized mono PCM WAV to `output`.
+    """
+    ffmpeg(
+        "-i", source, "-vn",
+        # trim the start, then the end by trimming the start of the reversed clip
+        "-af", f"{SILENCE},areverse,{SILENCE},areverse,"
+               f"loudnorm=I={settings.AUDIO_LOUDNESS_TARGET}:TP=-1.5:LRA=11",
+        "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le", output,
+    )
+
+
+def concatenate(clips, output, gap=GAP_SECONDS):
+    """
+    Joins mono 16-bit WAV files of the same rate into `output`, with `gap`
+    seconds of silence before each clip. Returns each clip's (start, end)
+    in seconds.
+    """
+    offsets = []
+    with wave.open(output, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        position = 0
+        silence = b"\0\0" * int(gap * SAMPLE_RATE)
+        for clip in clips:
+            with wave.open(clip, "rb") as source:
+                frames = source.readframes(source.getnframes())
+            out.writeframes(silence)
+            position += len(silence) // 2
+            out.writeframes(frames)
+            start = position / SAMPLE_RATE
+            position += len(frames) // 2
+            offsets.append((round(start, 3), round(position / SAMPLE_RATE, 3)))
+    return offsets
+
+
+def build_sprite(sources, output_dir):
+    """
+    Builds the sprite of local audio files `sources` inside `output_dir`.
+    Returns the path of the encoded sprite and each source's (start, end).
+    """
+    clips = []
+    for index, source in enumerate(sources):
+        clip = os.path.join(output_dir, f"{index}.wav")
+        prepare_clip(source, clip)
+        clips.append(clip)
+
+    joined = os.path.join(output_dir, "sprite.wav")
+    offsets = concatenate(clips, joined)
+    sprite = os.path.join(output_dir, "sprite.mp3")
+    ffmpeg("-i", joined, "-c:a", "libmp3lame", "-b:a", settings.AUDIO_SPRITE_BITRATE, sprite)
+    return sprite, offsets
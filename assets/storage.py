@@ -0,0 +1,64 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+from .images import file_checksum
+
+
+BLOB_PREFIX = "blobs/"
+
+
+def blob_name(checksum, ext):
+    return f"{BLOB_PREFIX}{checksum[:2]}/{checksum}{ext}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def blob_checksum(name):
+    """
+    The content hash a blob is stored under.
+    """
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Stores uploads by content hash, as blobs/<hash[:2]>/<hash><ext>.
+
+    Identical uploads share one file whatever their name or upload_to, and
+    a blob's URL never changes meaning, so it is cached forever (see
+    MEDIA_IMMUTABLE_PREFIXES). How many records use each blob is tracked on
+    MediaFile.refcount, and gc_media deletes blobs nothing uses anymore
+    (see assets/blobs.py).
+
+    Names under MEDIA_IMMUTABLE_PREFIXES (image derivatives, HLS packages,
+    ...) are content-addressed already and stored as given.
+    """
+
+    def content_addressed(self, name):
+        return name.startswith(tuple(settings.MEDIA_IMMUTABLE_PREFIXES))
+
+    def get_available_name(self, name, max_length=None):
+        if self.content_addressed(name):
+            return super().get_available_name(name, max_length)
+        # the stored name only depends on the content, see _save()
+        return name
+
+    def touch(self, name):
+        """
+        Restarts the grace period gc_media gives an unused file, for a new
+        record that is about to use it.
+        """
+        os.utime(self.path(name))
+
+    def _save(self, name, content):
+        if self.content_addressed(name):
+            return super()._save(name, content)
+        name = blob_name(file_checksum(content), os.path.splitext(name)[1].lower())
+        if self.exists(name):
+            self.touch(name)
+            return name
+        return super()._save(name, content)
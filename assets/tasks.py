@@ -0,0 +1,232 @@
+"""
+Media processing tasks run by the job queue (assets/jobs.py).
+
+Each task takes the storage name of an uploaded file (audio_sprite takes a
+"quiz:<id>" name, see sprite_job_name) and returns a JSON-serializable result, stored on the MediaJob. Tasks that need
+ffmpeg/ffprobe are skipped, not failed, where those are not installed.
+"""
+import os
+import tempfile
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+
+from .ffmpeg import ffmpeg, ffmpeg_available, local_path, media_metadata
+from .hls import MASTER_PLAYLIST, POSTER, encode, package_prefix, store_package
+from .images import file_checksum, generate_derivatives
+from .media_fields import IMAGE_FIELDS, MEDIA_FIELDS, fields_of_kind
+from .models import MediaFile
+from .sprites import build_sprite, sprite_name
+
+
+NOT_INSTALLED = {"skipped": "ffmpeg/ffprobe not installed"}
+
+
+def get_media_file(name):
+    """
+    The MediaFile of a stored file, hashing the file the first time.
+    """
+    media_file = MediaFile.objects.filter(name=name).first()
+    if media_file is None:
+        media_file = compute_checksum(name)
+    return media_file
+
+
+def compute_checksum(name):
+    with default_storage.open(name) as file:
+        checksum = file_checksum(file)
+        size = file.size
+    media_file, _ = MediaFile.objects.update_or_create(name=name, defaults={"checksum": checksum, "size": size})
+    return media_file
+
+
+def checksum_task(name):
+    media_file = compute_checksum(name)
+    media_users_changed(name)
+    return {"checksum": media_file.checksum, "size": media_file.size}
+
+
+def media_users_changed(name, media_fields=MEDIA_FIELDS):
+    """
+    Moves the content versions of every record using the file `name` in one
+    of `media_fields`, so the pages, fragments and payloads cached while its
+    processing was pending (srcsets, manifest hashes) are rebuilt.
+    """
+    from lessons.models import Lesson, LessonBlock
+    from lessons.signals import lesson_block_changed, lesson_changed
+    from quizzes.signals import QUIZ_CONTENT_MODELS, quiz_content_changed
+    from resources.models import Worksheet
+    from resources.signals import worksheet_changed
+
+    # the version bumps of each model's post_save receiver, without its other side effects
+    changed = {Lesson: lesson_changed, LessonBlock: lesson_block_changed, Worksheet: worksheet_changed}
+    changed.update((model, quiz_content_changed) for model in QUIZ_CONTENT_MODELS)
+    for model, fields in media_fields.items():
+        lookup = Q()
+        for field in fields:
+            lookup |= Q(**{field: name})
+        for obj in model.objects.filter(lookup):
+            changed[model](sender=model, instance=obj)
+
+
+def derivatives_task(name):
+    media_file = generate_derivatives(name)
+    if media_file is None:
+        raise ValueError(f"{name} is missing or not an image")
+    media_users_changed(name, IMAGE_FIELDS)
+    return {"width": media_file.width, "height": media_file.height, "derivatives": media_file.derivatives}
+
+
+def probe_video_task(name):
+    media_file = get_media_file(name)
+    if not ffmpeg_available():
+        return NOT_INSTALLED
+    with local_path(name) as path:
+        found = media_metadata(path)
+    media_file.width = found["width"]
+    media_file.height = found["height"]
+    media_file.duration = found["duration"]
+    media_file.metadata = {**media_file.metadata, **found["metadata"]}
+    media_file.save()
+    return found
+
+
+def normalized_audio_name(checksum):
+    return f"normalized/{checksum[:2]}/{checksum}.mp3"
+
+
+def normalize_audio_task(name):
+    """
+    Writes a loudness-normalized (EBU R128, AUDIO_LOUDNESS_TARGET LUFS) MP3
+    copy of an audio clip next to the original and records it on the MediaFile.
+    """
+    media_file = get_media_file(name)
+    if not ffmpeg_available():
+        return NOT_INSTALLED
+
+    target = normalized_audio_name(media_file.checksum)
+    with local_path(name) as path:
+        found = media_metadata(path)
+        if not default_storage.exists(target):
+            with tempfile.TemporaryDirectory() as tmp:
+                output = os.path.join(tmp, "normalized.mp3")
+                ffmpeg(
+                    "-i", path, "-vn",
+                    "-af", f"loudnorm=I={settings.AUDIO_LOUDNESS_TARGET}:TP=-1.5:LRA=11",
+                    "-ar", "44100", "-b:a", "96k", output,
+                )
+                with open(output, "rb") as file:
+                    default_storage.save(target, File(file))
+
+    media_file.duration = found["duration"]
+    media_file.metadata = {**media_file.metadata, **found["metadata"], "normalized": target}
+    media_file.save()
+    return {"duration": found["duration"], "normalized": target}
+
+
+def package_video_task(name):
+    """
+    Packages a video for HLS (see assets/hls.py) and records the package on
+    every lesson and block that uses the video.
+    """
+    media_file = get_media_file(name)
+    if not ffmpeg_available():
+        return NOT_INSTALLED
+
+    prefix = package_prefix(media_file.checksum)
+    package = media_file.metadata.get("hls")
+    if not package or not default_storage.exists(package["manifest"]):
+        with local_path(name) as path, tempfile.TemporaryDirectory() as tmp:
+            renditions = encode(path, tmp)
+            store_package(tmp, prefix)
+        package = {
+            "manifest": f"{prefix}/{MASTER_PLAYLIST}",
+            "poster": f"{prefix}/{POSTER}",
+            "renditions": [
+                {**rendition, "playlist": f"{prefix}/{rendition['playlist']}"} for rendition in renditions
+            ],
+        }
+        media_file.metadata = {**media_file.metadata, "hls": package}
+
+    # the encode ran outside any transaction, only the writes share one
+    with transaction.atomic():
+        media_file.save()
+        for model, field in fields_of_kind("video"):
+            for obj in model.objects.filter(**{field: name}):
+                obj.video_manifest = package["manifest"]
+                obj.video_poster = package["poster"]
+                obj.video_renditions = package["renditions"]
+                obj.save(update_fields=["video_manifest", "video_poster", "video_renditions"])
+    return package
+
+
+def sprite_job_name(quiz_id):
+    return f"quiz:{quiz_id}"
+
+
+def audio_sprite_task(name):
+    """
+    (Re)builds the audio sprite of a quiz's option clips (see assets/sprites.py)
+    and records it on the quiz. Unchanged clips reuse the stored sprite.
+    """
+    from quizzes.cache import bump_quiz_version
+    from quizzes.models import AudioQuizOption, Quiz
+
+    quiz_id = int(name.split(":", 1)[1])
+    quiz = Quiz.objects.filter(pk=quiz_id).only("audio_sprite", "audio_sprite_map").first()
+    if quiz is None:
+        return {"skipped": "quiz deleted"}
+    options = list(
+        AudioQuizOption.objects.filter(question__quiz_id=quiz_id).exclude(audio_file="")
+        .order_by("question_id", "pk").values_list("pk", "audio_file")
+    )
+    if options and not ffmpeg_available():
+        return NOT_INSTALLED
+
+    # one clip per distinct file, options sharing a recording share its offsets
+    checksums = {}
+    for _, audio in options:
+        if audio not in checksums and default_storage.exists(audio):
+            checksums[audio] = get_media_file(audio).checksum
+    names = list(checksums)
+
+    sprite, clips = "", {}
+    if names:
+        sprite = sprite_name([checksums[audio] for audio in names])
+        by_name = {}
+        if sprite == quiz.audio_sprite and default_storage.exists(sprite):
+            for pk, audio in options:
+                if str(pk) in quiz.audio_sprite_map:
+                    by_name.setdefault(audio, quiz.audio_sprite_map[str(pk)])
+        if set(by_name) != set(names):
+            with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+                sources = [stack.enter_context(local_path(audio)) for audio in names]
+                built, offsets = build_sprite(sources, tmp)
+                if default_storage.exists(sprite):
+                    default_storage.touch(sprite)  # may be an unused one gc_media is about to delete
+                else:
+                    with open(built, "rb") as file:
+                        default_storage.save(sprite, File(file))
+            by_name = dict(zip(names, offsets))
+        clips = {str(pk): list(by_name[audio]) for pk, audio in options if audio in by_name}
+
+    if sprite == quiz.audio_sprite and clips == quiz.audio_sprite_map:
+        return {"sprite": sprite, "clips": clips, "unchanged": True}
+    # update() so the quiz catalog is not invalidated, only this quiz's payloads
+    Quiz.objects.filter(pk=quiz_id).update(audio_sprite=sprite, audio_sprite_map=clips)
+    bump_quiz_version(quiz_id)
+    return {"sprite": sprite, "clips": clips}
+
+
+TASKS = {
+    "checksum": checksum_task,
+    "derivatives": derivatives_task,
+    "probe_video": probe_video_task,
+    "normalize_audio": normalize_audio_task,
+    "package_video": package_video_task,
+    "audio_sprite": audio_sprite_task,
+}
@@ -0,0 +1,44 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from assets.images import image_info, image_sources, build_srcset, srcset
+
+register = template.Library()
+
+
+@register.filter
+def media_url(name):
+    """
+    URL of a stored file name, "" for none: {{ block.video_manifest|media_url }}
+    """
+    return default_storage.url(name) if name else ""
+
+
+@register.simple_tag
+def image_srcset(image, ext=None):
+    """
+    {% image_srcset lesson.image "webp" %} -> "/media/derivatives/.../320.webp 320w, ..."
+    """
+    return srcset(image.name, ext) if image else ""
+
+
+@register.inclusion_tag("assets/picture.html")
+def responsive_image(image, alt="", sizes="100vw", **attrs):
+    """
+    <picture> with modern-format sources and a srcset fallback <img>, e.g.
+    {% responsive_image lesson.image alt=title sizes="33vw" class="card-img-top" %}
+    """
+    info = image_info(image.name) if image else None
+    sources = []
+    fallback_srcset = ""
+    if info:
+        fallback_srcset = build_srcset(info, info["fallback"])
+        sources = image_sources(info)
+    return {
+        "src": image.url if image else "",
+        "srcset": fallback_srcset,
+        "sources": sources,
+        "sizes": sizes,
+        "alt": alt,
+        "attrs": sorted(attrs.items()),
+    }
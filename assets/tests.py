@@ -0,0 +1,622 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+from unittest import mock
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.core.cache import caches
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from lessons.models import LessonBlock
+from lessons.tests import make_lesson
+from quizzes.cache import bump_quiz_version
+from quizzes.models import AudioQuizOption, AudioQuizQuestion, Quiz, SortingPair, VisualQuizOption, VisualQuizQuestion
+from resources.models import Worksheet
+from .ffmpeg import ffmpeg, ffmpeg_available
+from .hls import rendition_ladder
+from .images import derivative_name, derivative_prefix, image_variants, srcset
+from .jobs import enqueue, requeue_stale, run_pending
+from .models import MediaFile, MediaJob
+from .sprites import SAMPLE_RATE, concatenate, sprite_name
+
+
+def make_image(name="picture.jpg", size=(800, 400), mode="RGB", color=(200, 40, 40)):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, "PNG" if name.endswith(".png") else "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class MediaRootMixin:
+    eager = True
+
+    def setUp(self):
+        caches["default"].clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.settings_override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1280), IMAGE_DERIVATIVE_FORMATS=["webp"],
+            MEDIA_JOBS_EAGER=self.eager,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+
+class ImageDerivativeTests(MediaRootMixin, TestCase):
+    def test_derivatives_are_generated_on_upload(self):
+        lesson = make_lesson(image=make_image())
+        media_file = MediaFile.objects.get(name=lesson.image.name)
+        self.assertEqual((media_file.width, media_file.height), (800, 400))
+        self.assertEqual(media_file.derivatives, {"jpg": [320, 640, 800], "webp": [320, 640, 800]})
+
+        name = derivative_name(media_file.checksum, 320, "webp")
+        with default_storage.open(name) as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+        self.assertIn(f"/media/{name} 320w", srcset(lesson.image.name, "webp"))
+
+    def test_identical_uploads_share_derivatives(self):
+        first = make_lesson(image=make_image("a.jpg"))
+        second = Quiz.objects.create(title="Colours quiz", quiz_type="visual", cover_image=make_image("b.jpg"))
+        checksums = set(MediaFile.objects.values_list("checksum", flat=True))
+        self.assertEqual(len(checksums), 1)
+        self.assertEqual(len(default_storage.listdir(f"derivatives/{checksums.pop()[:2]}")[0]), 1)
+        self.assertEqual(image_variants(first.image.name), image_variants(second.cover_image.name))
+
+    def test_transparent_images_keep_a_png_fallback(self):
+        lesson = make_lesson(image=make_image("logo.png", size=(200, 200), mode="RGBA", color=(0, 0, 0, 0)))
+        variants = image_variants(lesson.image.name)
+        self.assertEqual(variants["srcset"].count("w,"), 0)
+        self.assertTrue(variants["srcset"].endswith(".png 200w"))
+        self.assertEqual([source["type"] for source in variants["sources"]], ["image/webp"])
+
+    @override_settings(IMAGE_DERIVATIVES_ON_UPLOAD=False)
+    def test_first_use_queues_the_derivatives(self):
+        lesson = make_lesson(image=make_image())
+        self.assertFalse(MediaFile.objects.exclude(derivatives={}).exists())
+        # the request only queues the job and gets the original image meanwhile
+        self.assertEqual(srcset(lesson.image.name), "")
+        self.assertEqual(list(MediaJob.objects.values_list("task", "status")), [("derivatives", "pending")])
+        self.assertFalse(MediaFile.objects.exclude(derivatives={}).exists())
+
+        self.assertEqual(run_pending(), 1)
+        self.assertTrue(srcset(lesson.image.name))
+
+    @override_settings(IMAGE_DERIVATIVES_ON_UPLOAD=False)
+    def test_finished_derivatives_refresh_cached_pages_and_payloads(self):
+        lesson = make_lesson(image=make_image())
+        quiz = Quiz.objects.create(title="Animals", quiz_type="visual", cover_image=make_image())
+        question = VisualQuizQuestion.objects.create(quiz=quiz, question_text="Choose the cat")
+        VisualQuizOption.objects.create(question=question, image=make_image(color=(0, 200, 0)))
+        quiz_url = reverse("visual-quiz-detail", args=[quiz.pk])
+        lesson_url = reverse("api_lesson_detail", args=[lesson.pk])
+        self.assertIsNone(self.client.get(quiz_url).json()["questions"][0]["options"][0]["image_variants"])
+        self.assertIsNone(self.client.get(lesson_url).json()["image_variants"])
+        self.assertNotContains(self.client.get(reverse("lesson_list")), "srcset=")
+        etag = self.client.get(reverse("quiz-list"))["ETag"]
+
+        run_pending()
+        self.assertTrue(self.client.get(quiz_url).json()["questions"][0]["options"][0]["image_variants"])
+        self.assertTrue(self.client.get(lesson_url).json()["image_variants"])
+        self.assertContains(self.client.get(reverse("lesson_list")), f'<img src="{lesson.image.url}" srcset=')
+        self.assertNotEqual(self.client.get(reverse("quiz-list"))["ETag"], etag)
+
+    def test_payloads_load_image_info_in_one_query(self):
+        quiz = Quiz.objects.create(title="Animals", quiz_type="visual")
+        question = VisualQuizQuestion.objects.create(quiz=quiz, question_text="Choose the cat")
+        for color in [(200, 0, 0), (0, 200, 0), (0, 0, 200)]:
+            VisualQuizOption.objects.create(question=question, image=make_image(color=color))
+        caches["default"].clear()
+        # quiz, questions, options, and one MediaFile query for every image
+        with self.assertNumQueries(4):
+            data = self.client.get(reverse("visual-quiz-detail", args=[quiz.pk])).json()
+        options = data["questions"][0]["options"]
+        self.assertEqual([option["image_variants"]["width"] for option in options], [800, 800, 800])
+
+    def test_missing_or_broken_files(self):
+        self.assertIsNone(image_variants("lesson_images/missing.jpg"))
+        lesson = make_lesson(image=SimpleUploadedFile("broken.jpg", b"not an image"))
+        self.assertEqual(srcset(lesson.image.name), "")
+
+    def test_api_and_templates_expose_srcsets(self):
+        lesson = make_lesson(image=make_image())
+        data = self.client.get(reverse("api_lesson_detail", args=[lesson.pk])).json()
+        self.assertEqual(data["image_variants"]["width"], 800)
+        self.assertTrue(data["image_variants"]["sources"][0]["srcset"].startswith("http://testserver/media/derivatives/"))
+
+        response = self.client.get(reverse("lesson_list"))
+        self.assertContains(response, '<source type="image/webp" srcset="/media/derivatives/')
+        self.assertContains(response, f'<img src="{lesson.image.url}" srcset=')
+
+    @override_settings(IMAGE_DERIVATIVES_ON_UPLOAD=False)
+    def test_backfill_command(self):
+        make_lesson(image=make_image())
+        make_lesson(title="Broken", image=SimpleUploadedFile("broken.jpg", b"not an image"))
+        out, err = StringIO(), StringIO()
+        call_command("generate_image_derivatives", stdout=out, stderr=err)
+        self.assertIn("Generated derivatives for 1 images (1 skipped)", out.getvalue())
+        self.assertEqual(MediaFile.objects.exclude(derivatives={}).count(), 1)
+
+
+class MediaJobTests(MediaRootMixin, TestCase):
+    eager = False
+
+    def jobs(self):
+        return sorted(MediaJob.objects.values_list("task", "status"))
+
+    def test_uploads_are_queued_not_processed(self):
+        lesson = make_lesson(image=make_image(), video_file=SimpleUploadedFile("intro.mp4", b"not really a video"))
+        Worksheet.objects.create(title="Colours", file=SimpleUploadedFile("colours.pdf", b"%PDF-1.4"))
+        self.assertEqual(self.jobs(), [
+            ("checksum", "pending"), ("derivatives", "pending"), ("package_video", "pending"), ("probe_video", "pending"),
+        ])
+        # only the references are recorded on upload
+        self.assertEqual(list(MediaFile.objects.values_list("refcount", flat=True)), [1, 1, 1])
+        self.assertFalse(MediaFile.objects.exclude(derivatives={}).exists())
+
+        # saving without a new upload queues nothing, re-queuing reuses the pending job
+        lesson.title = "Colours and shapes"
+        lesson.save()
+        enqueue("derivatives", lesson.image.name)
+        self.assertEqual(MediaJob.objects.count(), 4)
+
+        self.assertEqual(run_pending(), 4)
+        self.assertEqual(self.jobs(), [
+            ("checksum", "done"), ("derivatives", "done"), ("package_video", "done"), ("probe_video", "done"),
+        ])
+        self.assertEqual(MediaFile.objects.count(), 3)
+        pdf = MediaJob.objects.get(task="checksum")
+        self.assertEqual(pdf.result["size"], 8)
+        self.assertEqual(MediaJob.objects.get(task="derivatives").result["width"], 800)
+
+    def test_failed_jobs_are_retried_then_marked_failed(self):
+        job = enqueue("checksum", "resources/missing.pdf")
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+        self.assertIn("FileNotFoundError", job.error)
+        self.assertEqual(run_pending(), 0)  # backing off
+
+        for _ in range(2):
+            MediaJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+
+    def test_tasks_run_outside_a_transaction(self):
+        from django.db import connection
+        from . import jobs
+
+        depth = []
+        with mock.patch.dict(jobs.TASKS, {"checksum": lambda name: depth.append(len(connection.atomic_blocks))}):
+            enqueue("checksum", "resources/c.pdf")
+            outside = len(connection.atomic_blocks)
+            self.assertEqual(run_pending(), 1)
+        # with IMMEDIATE transactions the write lock would be held for the whole task
+        self.assertEqual(depth, [outside])
+
+    def test_abandoned_jobs_are_requeued(self):
+        job = enqueue("checksum", "resources/c.pdf")
+        MediaJob.objects.filter(pk=job.pk).update(status="running", started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(MediaJob.objects.get(pk=job.pk).status, "pending")
+
+    def test_worker_command(self):
+        LessonBlock.objects.create(lesson=make_lesson(), title="Intro", video=SimpleUploadedFile("intro.mp4", b"x"))
+        out = StringIO()
+        call_command("media_worker", "--once", stdout=out)
+        self.assertIn("Ran 2 media job(s).", out.getvalue())
+        self.assertEqual(self.jobs(), [("package_video", "done"), ("probe_video", "done")])
+
+    def test_admin_shows_and_retries_jobs(self):
+        job = enqueue("checksum", "resources/missing.pdf")
+        MediaJob.objects.filter(pk=job.pk).update(status="failed", attempts=3)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+
+        response = self.client.get(reverse("admin:assets_mediajob_changelist"), {"status": "failed"})
+        self.assertContains(response, "resources/missing.pdf")
+
+        self.client.post(reverse("admin:assets_mediajob_changelist"), {
+            "action": "retry_jobs", "_selected_action": [job.pk],
+        })
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("pending", 0))
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_video_probing_and_audio_normalization(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video, audio = f"{tmp}/clip.mp4", f"{tmp}/clip.mp3"
+            ffmpeg("-f", "lavfi", "-i", "testsrc=size=320x240:rate=10", "-t", "1", "-pix_fmt", "yuv420p", video)
+            ffmpeg("-f", "lavfi", "-i", "sine=frequency=440", "-t", "1", audio)
+            with open(video, "rb") as v, open(audio, "rb") as a:
+                make_lesson(video_file=SimpleUploadedFile("clip.mp4", v.read()))
+                enqueue("normalize_audio", default_storage.save("audio_quiz_options/clip.mp3", a))
+
+        run_pending()
+        self.assertEqual(self.jobs(), [("normalize_audio", "done"), ("package_video", "done"), ("probe_video", "done")])
+        video = MediaFile.objects.get(name__endswith=".mp4")
+        self.assertEqual((video.width, video.height), (320, 240))
+        audio = MediaFile.objects.get(name__endswith=".mp3")
+        self.assertTrue(default_storage.exists(audio.metadata["normalized"]))
+
+
+class ServeMediaTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 40
+        self.name = default_storage.save("lesson_videos/intro.mp4", SimpleUploadedFile("intro.mp4", self.content))
+        self.url = f"/media/{self.name}"
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        # uploads are content-hashed blobs
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(self.body(response), self.content)
+
+    def test_byte_ranges(self):
+        for header, start, end in [("bytes=100-199", 100, 199), ("bytes=10000-", 10000, 10239),
+                                   ("bytes=-40", 10200, 10239), ("bytes=10200-99999", 10200, 10239)]:
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/10240")
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+                self.assertEqual(self.body(response), self.content[start:end + 1])
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10240")
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=0-1,5-6").status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="items=0-1").status_code, 200)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+        ranged = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=response["ETag"])
+        self.assertEqual(ranged.status_code, 206)
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_head_and_missing_files(self):
+        response = self.client.head(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "10240")
+        self.assertEqual(self.client.get("/media/lesson_videos/missing.mp4").status_code, 404)
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/lesson_videos/").status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_content_addressed_files_are_cached_forever(self):
+        lesson = make_lesson(image=make_image())
+        name = derivative_name(MediaFile.objects.get(name=lesson.image.name).checksum, 320, "webp")
+        response = self.client.get(f"/media/{name}")
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+        # files stored under their own name before content hashing
+        FileSystemStorage().save("lesson_videos/old.mp4", SimpleUploadedFile("old.mp4", b"video"))
+        response = self.client.get("/media/lesson_videos/old.mp4")
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+
+class VideoPackagingTests(MediaRootMixin, TestCase):
+    eager = False
+
+    def make_block(self):
+        return LessonBlock.objects.create(
+            lesson=make_lesson(), title="Intro", video=SimpleUploadedFile("intro.mp4", b"not really a video"),
+        )
+
+    def test_original_video_until_packaged(self):
+        block = self.make_block()
+        url = reverse("api_lesson_detail", args=[block.lesson_id])
+        data = self.client.get(url).json()["blocks"][0]
+        self.assertEqual((data["video_hls"], data["video_poster"]), (None, None))
+        self.assertTrue(data["video"].endswith(".mp4"))
+
+        LessonBlock.objects.filter(pk=block.pk).update(video_manifest="hls/ab/abc/master.m3u8", video_poster="hls/ab/abc/poster.jpg")
+        block.lesson.save()  # moves the lesson's content version like the worker's save() does
+        data = self.client.get(url).json()["blocks"][0]
+        self.assertEqual(data["video_hls"], "http://testserver/media/hls/ab/abc/master.m3u8")
+        self.assertEqual(data["video_poster"], "http://testserver/media/hls/ab/abc/poster.jpg")
+
+        response = self.client.get(reverse("lesson_detail", args=[block.lesson_id]))
+        self.assertIn('hls: "/media/hls/ab/abc/master.m3u8"', response.content.decode())
+
+    @override_settings(FFMPEG_BINARY="/nonexistent/ffmpeg")
+    def test_replaced_video_drops_the_old_package(self):
+        block = self.make_block()
+        LessonBlock.objects.filter(pk=block.pk).update(video_manifest="hls/ab/abc/master.m3u8", video_poster="hls/ab/abc/poster.jpg")
+        block.refresh_from_db()
+        block.video = SimpleUploadedFile("other.mp4", b"another video")
+        block.save()
+        run_pending()  # no ffmpeg here, the new video stays unpackaged
+
+        data = self.client.get(reverse("api_lesson_detail", args=[block.lesson_id])).json()["blocks"][0]
+        self.assertEqual((data["video_hls"], data["video_poster"]), (None, None))
+        self.assertTrue(data["video"].endswith(block.video.name))
+        block.refresh_from_db()
+        self.assertEqual(block.video_renditions, [])
+
+        # saving without a new upload keeps the package
+        LessonBlock.objects.filter(pk=block.pk).update(video_manifest="hls/cd/cde/master.m3u8")
+        block.refresh_from_db()
+        block.title = "Intro video"
+        block.save()
+        block.refresh_from_db()
+        self.assertEqual(block.video_manifest, "hls/cd/cde/master.m3u8")
+
+    @override_settings(FFMPEG_BINARY="/nonexistent/ffmpeg")
+    def test_packaging_is_skipped_without_ffmpeg(self):
+        block = self.make_block()
+        run_pending()
+        job = MediaJob.objects.get(task="package_video")
+        self.assertEqual((job.status, job.result), ("done", {"skipped": "ffmpeg/ffprobe not installed"}))
+        block.refresh_from_db()
+        self.assertEqual(block.video_manifest, "")
+
+    def test_package_videos_command(self):
+        self.make_block()
+        MediaJob.objects.all().delete()
+        out = StringIO()
+        call_command("package_videos", stdout=out)
+        self.assertIn("Queued 1 video(s).", out.getvalue())
+        self.assertEqual(MediaJob.objects.get().task, "package_video")
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_packaging(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ffmpeg("-f", "lavfi", "-i", "testsrc=size=640x360:rate=24", "-f", "lavfi", "-i", "sine",
+                   "-t", "6", "-pix_fmt", "yuv420p", "-shortest", f"{tmp}/clip.mp4")
+            with open(f"{tmp}/clip.mp4", "rb") as file:
+                block = LessonBlock.objects.create(
+                    lesson=make_lesson(), title="Intro", video=SimpleUploadedFile("clip.mp4", file.read()),
+                )
+        run_pending()
+        block.refresh_from_db()
+        self.assertEqual([r["height"] for r in block.video_renditions], [360])
+        self.assertTrue(default_storage.exists(block.video_poster))
+        with default_storage.open(block.video_manifest) as file:
+            self.assertIn(b"RESOLUTION=640x360", file.read())
+        self.assertTrue(default_storage.exists(block.video_renditions[0]["playlist"]))
+
+
+class BlobStorageTests(MediaRootMixin, TestCase):
+    def upload_twice(self):
+        quiz = Quiz.objects.create(title="Animals", quiz_type="visual", difficulty="easy")
+        question = VisualQuizQuestion.objects.create(quiz=quiz, question_text="Choose the cat")
+        option = VisualQuizOption.objects.create(question=question, image=make_image("cat.jpg"))
+        pair = SortingPair.objects.create(quiz=quiz, label="Pet", item="Cat", image=make_image("cat (1).jpg"))
+        return option, pair
+
+    def refcount(self, name):
+        return MediaFile.objects.get(name=name).refcount
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command("gc_media", "--grace-hours=0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_identical_uploads_share_one_blob(self):
+        option, pair = self.upload_twice()
+        self.assertEqual(option.image.name, pair.image.name)
+        self.assertRegex(option.image.name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(len(default_storage.listdir(option.image.name.rsplit("/", 1)[0])[1]), 1)
+        self.assertEqual(self.refcount(option.image.name), 2)
+
+        response = self.client.get(option.image.url)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+    def test_references_follow_replacements_and_deletes(self):
+        option, pair = self.upload_twice()
+        shared = option.image.name
+        option.image = make_image("dog.jpg", color=(20, 20, 200))
+        option.save()
+        self.assertEqual(self.refcount(shared), 1)
+        self.assertEqual(self.refcount(option.image.name), 1)
+
+        pair.delete()
+        self.assertEqual(self.refcount(shared), 0)
+
+    def test_garbage_collection(self):
+        option, pair = self.upload_twice()
+        unused = option.image.name
+        checksum = MediaFile.objects.get(name=unused).checksum
+        # bypasses the signals, the collector recounts
+        VisualQuizOption.objects.filter(pk=option.pk).update(image="")
+        self.assertIn("Would delete 0 blob(s)", self.gc("--dry-run"))
+        self.assertEqual(self.refcount(unused), 1)
+
+        pair.delete()
+        self.assertIn(f"{unused}\nWould delete 1 blob(s)", self.gc("--dry-run"))
+        self.assertTrue(default_storage.exists(unused))
+        self.assertIn("Deleted 1 blob(s)", self.gc())
+        self.assertFalse(default_storage.exists(unused))
+        self.assertFalse(default_storage.exists(derivative_name(checksum, 320, "webp")))
+        self.assertEqual(default_storage.listdir(derivative_prefix(checksum)), ([], []))
+        self.assertFalse(MediaFile.objects.filter(name=unused).exists())
+
+    def test_reused_blobs_get_a_new_grace_period(self):
+        option, pair = self.upload_twice()
+        name = option.image.name
+        option.delete()
+        pair.delete()
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(default_storage.path(name), (old, old))
+
+        # a new upload of the same content, its record not saved yet
+        self.assertEqual(default_storage.save("quiz_covers/cat.jpg", make_image("cat.jpg")), name)
+        self.assertIn("Deleted 0 blob(s)", self.gc("--grace-hours=1"))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_unused_sprites_are_collected(self):
+        quiz = Quiz.objects.create(title="Greetings", quiz_type="audio", audio_sprite="sprites/aa/used.mp3")
+        for name in ("sprites/aa/used.mp3", "sprites/bb/unused.mp3"):
+            default_storage.save(name, SimpleUploadedFile("sprite.mp3", b"sprite"))
+        self.assertIn("sprites/bb/unused.mp3\nDeleted 1 blob(s)", self.gc())
+        self.assertTrue(default_storage.exists(quiz.audio_sprite))
+        self.assertFalse(default_storage.exists("sprites/bb/unused.mp3"))
+
+    def test_recent_blobs_are_kept(self):
+        option, _ = self.upload_twice()
+        option.question.quiz.delete()
+        self.assertEqual(MediaFile.objects.get().refcount, 0)
+        out = StringIO()
+        call_command("gc_media", stdout=out)
+        self.assertIn("Deleted 0 blob(s)", out.getvalue())
+
+
+class RenditionLadderTests(SimpleTestCase):
+    def test_never_upscales(self):
+        self.assertEqual([r[0] for r in rendition_ladder(1080)], [360, 540, 720])
+        self.assertEqual([r[0] for r in rendition_ladder(576)], [360, 540])
+        self.assertEqual([r[0] for r in rendition_ladder(240)], [360])
+
+
+class AudioSpriteTests(MediaRootMixin, TestCase):
+    eager = False
+
+    def make_quiz(self, clips=("morning", "night")):
+        quiz = Quiz.objects.create(title="Greetings", quiz_type="audio", difficulty="easy")
+        question = AudioQuizQuestion.objects.create(quiz=quiz, image=make_image(), correct_answer="Good morning")
+        options = [
+            AudioQuizOption.objects.create(
+                question=question, text=clip, audio_file=SimpleUploadedFile(f"{clip}.mp3", clip.encode()),
+            )
+            for clip in clips
+        ]
+        return quiz, options
+
+    def test_option_changes_queue_one_sprite_build(self):
+        quiz, options = self.make_quiz()
+        sprites = MediaJob.objects.filter(task="audio_sprite")
+        self.assertEqual(list(sprites.values_list("name", flat=True)), [f"quiz:{quiz.pk}"])
+
+        sprites.update(status=MediaJob.DONE)
+        options[0].delete()
+        self.assertEqual(sprites.filter(status=MediaJob.PENDING).count(), 1)
+
+    @override_settings(FFMPEG_BINARY="/nonexistent/ffmpeg")
+    def test_sprite_is_skipped_without_ffmpeg(self):
+        quiz, _ = self.make_quiz()
+        run_pending()
+        job = MediaJob.objects.get(task="audio_sprite")
+        self.assertEqual((job.status, job.result), ("done", {"skipped": "ffmpeg/ffprobe not installed"}))
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.audio_sprite, "")
+
+    def test_sprite_in_quiz_api(self):
+        quiz, options = self.make_quiz()
+        url = reverse("audio-quiz-detail", args=[quiz.pk])
+        self.assertIsNone(self.client.get(url).json()["audio_sprite"])
+
+        clips = {str(options[0].pk): [0.3, 1.1], str(options[1].pk): [1.4, 2.0]}
+        Quiz.objects.filter(pk=quiz.pk).update(audio_sprite="sprites/ab/abc.mp3", audio_sprite_map=clips)
+        bump_quiz_version(quiz.pk)  # as the sprite task does
+        for name in ("audio-quiz-detail", "quiz-detail"):
+            sprite = self.client.get(reverse(name, args=[quiz.pk])).json()["audio_sprite"]
+            self.assertEqual(sprite, {"url": "http://testserver/media/sprites/ab/abc.mp3", "clips": clips})
+
+    @override_settings(FFMPEG_BINARY="/nonexistent/ffmpeg")
+    def test_changed_clips_leave_the_sprite(self):
+        quiz, (morning, night) = self.make_quiz()
+        clips = {str(morning.pk): [0.3, 1.1], str(night.pk): [1.4, 2.0]}
+        Quiz.objects.filter(pk=quiz.pk).update(audio_sprite="sprites/ab/abc.mp3", audio_sprite_map=clips)
+        bump_quiz_version(quiz.pk)
+        url = reverse("audio-quiz-detail", args=[quiz.pk])
+        self.assertEqual(self.client.get(url).json()["audio_sprite"]["clips"], clips)
+
+        # new text, same recording: the clip stays
+        morning.text = "Good morning"
+        morning.save()
+        self.assertEqual(self.client.get(url).json()["audio_sprite"]["clips"], clips)
+
+        # a new recording plays from its own file, even when the sprite can't be rebuilt
+        morning.audio_file = SimpleUploadedFile("morning2.mp3", b"another morning")
+        morning.save()
+        run_pending()
+        data = self.client.get(url).json()
+        self.assertEqual(data["audio_sprite"]["clips"], {str(night.pk): [1.4, 2.0]})
+        option = data["audio_questions"][0]["options"][0]
+        self.assertTrue(option["audio_file"].endswith(morning.audio_file.name))
+
+        night.delete()
+        self.assertEqual(self.client.get(url).json()["audio_sprite"]["clips"], {})
+
+    def test_build_audio_sprites_command(self):
+        quiz, _ = self.make_quiz()
+        MediaJob.objects.all().delete()
+        out = StringIO()
+        call_command("build_audio_sprites", stdout=out)
+        self.assertIn("Queued 1 audio sprite(s).", out.getvalue())
+        self.assertEqual(MediaJob.objects.get().name, f"quiz:{quiz.pk}")
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_sprite_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            recordings = []
+            for frequency in (440, 880):
+                ffmpeg("-f", "lavfi", "-i", f"sine=frequency={frequency}:duration=1", f"{tmp}/{frequency}.mp3")
+                with open(f"{tmp}/{frequency}.mp3", "rb") as file:
+                    recordings.append(file.read())
+        quiz = Quiz.objects.create(title="Tones", quiz_type="audio", difficulty="easy")
+        question = AudioQuizQuestion.objects.create(quiz=quiz, image=make_image(), correct_answer="High")
+        low, high = [
+            AudioQuizOption.objects.create(question=question, text=text, audio_file=SimpleUploadedFile(f"{text}.mp3", data))
+            for text, data in zip(("Low", "High"), recordings)
+        ]
+        run_pending()
+        quiz.refresh_from_db()
+        self.assertTrue(quiz.audio_sprite.startswith("sprites/"))
+        self.assertTrue(default_storage.exists(quiz.audio_sprite))
+        (low_start, low_end), (high_start, high_end) = quiz.audio_sprite_map[str(low.pk)], quiz.audio_sprite_map[str(high.pk)]
+        self.assertLess(low_start, low_end)
+        self.assertLess(low_end, high_start)
+        self.assertLess(high_start, high_end)
+
+        # rebuilding unchanged clips keeps the sprite and the quiz's version
+        enqueue("audio_sprite", f"quiz:{quiz.pk}")
+        run_pending()
+        self.assertTrue(MediaJob.objects.filter(task="audio_sprite", result__unchanged=True).exists())
+
+
+class SpriteTests(SimpleTestCase):
+    def write_clip(self, path, seconds):
+        with wave.open(path, "wb") as clip:
+            clip.setnchannels(1)
+            clip.setsampwidth(2)
+            clip.setframerate(SAMPLE_RATE)
+            clip.writeframes(b"\1\0" * int(seconds * SAMPLE_RATE))
+
+    def test_concatenate_offsets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.write_clip(f"{tmp}/a.wav", 1)
+            self.write_clip(f"{tmp}/b.wav", 0.5)
+            offsets = concatenate([f"{tmp}/a.wav", f"{tmp}/b.wav"], f"{tmp}/sprite.wav", gap=0.25)
+            self.assertEqual(offsets, [(0.25, 1.25), (1.5, 2.0)])
+            with wave.open(f"{tmp}/sprite.wav", "rb") as sprite:
+                self.assertEqual(sprite.getnframes(), 2 * SAMPLE_RATE)
+
+    def test_sprite_names_follow_the_clips(self):
+        self.assertEqual(sprite_name(["a", "b"]), sprite_name(["a", "b"]))
+        self.assertNotEqual(sprite_name(["a", "b"]), sprite_name(["b", "a"]))
+        self.assertTrue(sprite_name(["a"]).startswith("sprites/"))
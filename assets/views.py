@@ -0,0 +1,145 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+# not in every platform's mime.types (.ts is even TypeScript/Qt on some)
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of an open file starting at `start`.
+
+    Keeps fileno(), so WSGI servers with a sendfile()-based file_wrapper
+    (gunicorn) still send the range zero-copy, limited by Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single "bytes=" range, None to send the whole file
+    (no, malformed or multi-part range), or False when it is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # suffix range, the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def cache_control(path):
+    if path.startswith(tuple(settings.MEDIA_IMMUTABLE_PREFIXES)):
+        return "public, max-age=31536000, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serves MEDIA_ROOT files with byte-range (206) and conditional GET support,
+    streaming them instead of reading whole videos into memory.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Not found")
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404("Not found")
+    if not os.path.isfile(fullpath):
+        raise Http404("Not found")
+
+    size = stat.st_size
+    last_modified = http_date(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control(path),
+        "Last-Modified": last_modified,
+        "ETag": etag,
+    }
+
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if (if_none_match and etag in if_none_match) or (
+        not if_none_match and if_modified_since and int(stat.st_mtime) <= if_modified_since
+    ):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    if "Range" in request.headers:
+        # If-Range: only honour the range if the client still has this version
+        if_range = request.headers.get("If-Range")
+        if not if_range or if_range in (etag, last_modified):
+            byte_range = parse_range(request.headers["Range"], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(fullpath, "rb")
+        filelike = RangeFile(file, start, length) if byte_range else file
+        response = FileResponse(filelike, content_type=content_type)
+        response.block_size = BLOCK_SIZE
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(length)
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,19 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from practice_english.content_version import bump_version
+from .models import BlogPost
+
+
+def blog_post_saving(sender, instance, **kwargs):
+    # the page under the old slug changes too when a post is renamed
+    instance._old_slug = BlogPost.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+def blog_post_changed(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, "_old_slug", None)} - {None}
+    bump_version("blog", *(f"blog:{slug}" for slug in slugs))
+
+
+pre_save.connect(blog_post_saving, sender=BlogPost, dispatch_uid="blog_post_saving")
+post_save.connect(blog_post_changed, sender=BlogPost, dispatch_uid="blog_post_saved")
+post_delete.connect(blog_post_changed, sender=BlogPost, dispatch_uid="blog_post_deleted")
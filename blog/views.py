@@ -1,20 +1,22 @@
 from django.shortcuts import render
 from django.shortcuts import render, get_object_or_404
+from practice_english.page_cache import cached_page
+from practice_english.replicas import replica_reads
 from .models import BlogPost
 
+@cached_page("blog")
+@replica_reads
 def blog_list(request):
-    lang = request.GET.get("lang", "en")
-
     posts = BlogPost.objects.filter(
         is_published=True
     ).order_by("-published_at")
 
     return render(request, "blog/blog_list.html", {
         "posts": posts,
-        "lang": lang,
     })
 
+@cached_page(lambda request, slug: f"blog:{slug}")
+@replica_reads
 def blog_detail(request, slug):
-    lang = request.GET.get("lang", "en")
     post = get_object_or_404(BlogPost, slug=slug, is_published=True)
-    return render(request, "blog/blog_detail.html", {"post": post, "lang": lang})
+    return render(request, "blog/blog_detail.html", {"post": post})
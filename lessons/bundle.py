@@ -0,0 +1,246 @@
+"""
+Offline bundles of a lesson for classrooms with poor connectivity.
+
+A bundle is a zip or tar archive holding the lesson's API payloads
+(lesson.json with its blocks, quizzes/<id>.json for every linked quiz,
+resources.json for its worksheets) and every media file they reference,
+stored under media/<storage name>: the uploads, the image derivatives of
+the srcsets and the HLS packages with their posters. Payload URLs are left
+relative to MEDIA_URL, so an offline player maps "/media/x" to "media/x" in
+the archive.
+
+manifest.json lists every file of the complete bundle with its sha256 hash
+and size. Each export is recorded as a LessonBundle, so a classroom that
+synced version A can ask for a delta since A: only the files whose hash
+changed are sent, and the manifest lists the ones to delete.
+
+Archives are generated on the fly while the response (or the command's
+output file) is written, without temporary files.
+"""
+import hashlib
+import json
+import posixpath
+import tarfile
+import time
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework.renderers import JSONRenderer
+
+from assets.blobs import walk
+from assets.images import derivative_name, file_checksum, prefetch_image_info
+from assets.media_fields import MEDIA_FIELDS
+from assets.tasks import get_media_file
+from practice_english.content_version import fingerprint, get_cache
+from quizzes.manifest import quiz_media
+from quizzes.serializers import QuizSerializer
+from resources.serializers import WorksheetSerializer
+from .models import Lesson, LessonBundle
+from .serializers import LessonSerializer
+
+
+ARCHIVES = {
+    "zip": "application/zip",
+    "tar": "application/x-tar",
+}
+MANIFEST = "manifest.json"
+DERIVED_HASH_KEY = "bundle-hash:{}"
+
+
+class BundleEntry:
+    """
+    One file of a bundle: an in-memory payload (`data`) or a stored file (`name`).
+    """
+    __slots__ = ("path", "hash", "size", "data", "name")
+
+    def __init__(self, path, hash, size, data=None, name=None):
+        self.path = path
+        self.hash = hash
+        self.size = size
+        self.data = data
+        self.name = name
+
+    @classmethod
+    def payload(cls, path, data):
+        content = JSONRenderer().render(data)
+        return cls(path, hashlib.sha256(content).hexdigest(), len(content), data=content)
+
+    @classmethod
+    def media(cls, name, derived=False):
+        checksum = derived_checksum(name) if derived else get_media_file(name).checksum
+        return cls(f"media/{name}", checksum, default_storage.size(name), name=name)
+
+    def chunks(self):
+        if self.data is not None:
+            yield self.data
+            return
+        with default_storage.open(self.name) as file:
+            yield from file.chunks()
+
+
+def derived_checksum(name):
+    """
+    sha256 of a file generated from an upload (image derivative, HLS package
+    file). They never change under their name, so the hash is cached for
+    good rather than recorded on a MediaFile.
+    """
+    cache = get_cache()
+    key = DERIVED_HASH_KEY.format(fingerprint(name))
+    checksum = cache.get(key)
+    if checksum is None:
+        with default_storage.open(name) as file:
+            checksum = file_checksum(file)
+        cache.set(key, checksum, timeout=None)
+    return checksum
+
+
+def linked_media(objects, quizzes):
+    """
+    Storage names of the uploads and of the generated files the payloads of
+    `objects` (lesson, blocks, worksheets) and `quizzes` link to, loading the
+    image info they show.
+    """
+    media, images, derived = [], [], []
+    for obj in objects:
+        for field, kind in MEDIA_FIELDS[type(obj)].items():
+            media.append(getattr(obj, field).name)
+            if kind == "image":
+                images.append(media[-1])
+        if getattr(obj, "video_manifest", ""):
+            # playlists, segments and poster of the package
+            derived.extend(walk(posixpath.dirname(obj.video_manifest)))
+    for quiz in quizzes:
+        # quiz_media() prefetches what the serializer walks
+        for kind, name in quiz_media(quiz):
+            media.append(name)
+            if kind == "image":
+                images.append(name)
+
+    for info in prefetch_image_info(images).values():
+        if info:
+            derived.extend(
+                derivative_name(info["checksum"], width, ext)
+                for ext, widths in info["derivatives"].items() for width in widths
+            )
+    return media, derived
+
+
+def lesson_entries(lesson):
+    """
+    Every payload and media file of a complete bundle of `lesson`.
+    """
+    lesson = (
+        Lesson.objects.with_block_counts().select_related("category").prefetch_related("blocks").get(pk=lesson.pk)
+    )
+    quizzes = list(lesson.quizzes.order_by("pk"))
+    worksheets = list(lesson.resources.order_by("pk"))
+    media, derived = linked_media([lesson, *lesson.blocks.all(), *worksheets], quizzes)
+
+    entries = [
+        BundleEntry.payload("lesson.json", LessonSerializer(lesson).data),
+        BundleEntry.payload("resources.json", WorksheetSerializer(worksheets, many=True).data),
+        *(BundleEntry.payload(f"quizzes/{quiz.pk}.json", QuizSerializer(quiz).data) for quiz in quizzes),
+    ]
+    for name in dict.fromkeys(media):
+        if name and default_storage.exists(name):
+            entries.append(BundleEntry.media(name))
+    for name in dict.fromkeys(derived):
+        if default_storage.exists(name):
+            entries.append(BundleEntry.media(name, derived=True))
+    return entries
+
+
+def plan_bundle(lesson, since=None):
+    """
+    The entries of a bundle of `lesson`, manifest first, only those changed
+    since the bundle version `since` when it is known. Records the complete
+    bundle's version; returns (version, base version or None, entries).
+    """
+    complete = lesson_entries(lesson)
+    files = {entry.path: entry.hash for entry in complete}
+    version = fingerprint(*sorted(f"{path}:{hash}" for path, hash in files.items()))
+    LessonBundle.objects.get_or_create(lesson=lesson, version=version, defaults={"files": files})
+
+    base = LessonBundle.objects.filter(lesson=lesson, version=since).first() if since else None
+    entries, deleted = complete, []
+    if base is not None:
+        entries = [entry for entry in complete if base.files.get(entry.path) != entry.hash]
+        deleted = sorted(set(base.files) - set(files))
+
+    manifest = json.dumps({
+        "lesson": lesson.pk,
+        "version": version,
+        "base": base.version if base else None,
+        "media_url": settings.MEDIA_URL,
+        "files": {entry.path: {"hash": entry.hash, "size": entry.size} for entry in complete},
+        "deleted": deleted,
+    }, indent=2).encode()
+    manifest = BundleEntry(MANIFEST, hashlib.sha256(manifest).hexdigest(), len(manifest), data=manifest)
+    return version, base.version if base else None, [manifest, *entries]
+
+
+class StreamSink:
+    """
+    Write-only file object collecting what an archive writer produces, so
+    it can be handed out chunk by chunk. Has no tell(), which makes zipfile
+    write a streamable archive.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(entries):
+    sink = StreamSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w") as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.path, date_time)
+            info.file_size = entry.size  # lets zipfile pick zip64 for large videos up front
+            # media is compressed already
+            info.compress_type = zipfile.ZIP_STORED if entry.name else zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as file:
+                for chunk in entry.chunks():
+                    file.write(chunk)
+                    yield sink.pop()
+    yield sink.pop()
+
+
+def stream_tar(entries):
+    written = 0
+    mtime = int(time.time())
+    for entry in entries:
+        info = tarfile.TarInfo(entry.path)
+        info.size = entry.size
+        info.mtime = mtime
+        info.mode = 0o644
+        header = info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8")
+        yield header
+        for chunk in entry.chunks():
+            yield chunk
+        padding = -entry.size % tarfile.BLOCKSIZE
+        yield tarfile.NUL * padding
+        written += len(header) + entry.size + padding
+    # two empty blocks end the archive, padded to a full record
+    end = 2 * tarfile.BLOCKSIZE
+    yield tarfile.NUL * (end + -(written + end) % tarfile.RECORDSIZE)
+
+
+def stream_bundle(entries, archive="zip"):
+    """
+    Yields the bytes of the archive of `entries`.
+    """
+    return stream_zip(entries) if archive == "zip" else stream_tar(entries)
@@ -0,0 +1,11 @@
+from practice_english.content_version import get_versions, fingerprint, request_origin
+
+
+def lesson_list_etag(request, *args, **kwargs):
+    return fingerprint(*get_versions("lessons"), request_origin(request), request.GET.urlencode())
+
+
+def lesson_detail_etag(request, pk, *args, **kwargs):
+    return fingerprint(
+        *get_versions(f"lesson:{pk}", "lesson-categories"), request_origin(request), request.GET.get("lang", ""),
+    )
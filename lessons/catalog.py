@@ -0,0 +1,180 @@
+"""
+In-memory snapshot of the lesson catalog for list pages and the lesson list API.
+
+The snapshot holds one slotted row per lesson (with its category and blocks)
+in catalog order, plus precomputed row tuples per age group and category, so
+listing, filtering, counting and paginating never touch the database. It is
+rebuilt with three queries whenever the "lessons" content version moves, which
+lesson, block and category signals do on every save/delete.
+"""
+from django.core.files.storage import default_storage
+
+from practice_english.content_version import get_version
+from practice_english.replicas import primary_reads
+from .models import Lesson, LessonBlock, LessonCategory
+
+
+class MediaRef:
+    """
+    Stand-in for a FieldFile: truthy when a file is set, with a precomputed url.
+    """
+    __slots__ = ("name", "url")
+
+    def __init__(self, name):
+        self.name = name or ""
+        self.url = default_storage.url(self.name) if self.name else None
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name
+
+
+class CatalogCategory:
+    __slots__ = ("id", "pk", "name", "order")
+
+    def __init__(self, id, name, order):
+        self.id = self.pk = id
+        self.name = name
+        self.order = order
+
+    def __str__(self):
+        return self.name
+
+
+class CatalogBlock:
+    __slots__ = (
+        "id", "pk", "lesson_id", "title", "title_sr", "title_de", "block_type", "order", "video",
+        "video_manifest", "video_poster",
+    )
+
+    def __init__(self, id, lesson_id, title, title_sr, title_de, block_type, order, video, video_manifest, video_poster):
+        self.id = self.pk = id
+        self.lesson_id = lesson_id
+        self.title = title
+        self.title_sr = title_sr
+        self.title_de = title_de
+        self.block_type = block_type
+        self.order = order
+        self.video = MediaRef(video)
+        self.video_manifest = video_manifest
+        self.video_poster = video_poster
+
+
+class CatalogLesson:
+    """
+    Read-only lesson row, attribute compatible with Lesson for templates and serializers.
+    """
+    __slots__ = (
+        "id", "pk", "category_id", "category", "title", "title_sr", "title_de",
+        "description", "description_sr", "description_de", "age_group", "order",
+        "created_at", "video_url", "video_file", "image", "video_manifest", "video_poster",
+        "blocks", "block_count",
+    )
+
+    def __init__(self, row, category, blocks):
+        self.id = self.pk = row["id"]
+        self.category_id = row["category_id"]
+        self.category = category
+        for field in ("title", "title_sr", "title_de", "description", "description_sr",
+                      "description_de", "age_group", "order", "created_at", "video_url",
+                      "video_manifest", "video_poster"):
+            setattr(self, field, row[field])
+        self.video_file = MediaRef(row["video_file"])
+        self.image = MediaRef(row["image"])
+        self.blocks = blocks
+        self.block_count = len(blocks)
+
+    @property
+    def has_blocks(self):
+        return self.block_count > 0
+
+    def serializable_value(self, field_name):
+        # used by DRF's primary key fields
+        if field_name == "category":
+            return self.category_id
+        return getattr(self, field_name)
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f"<CatalogLesson: {self.title}>"
+
+
+LESSON_FIELDS = (
+    "id", "category_id", "title", "title_sr", "title_de", "description", "description_sr",
+    "description_de", "age_group", "order", "created_at", "video_url", "video_file", "image",
+    "video_manifest", "video_poster",
+)
+BLOCK_FIELDS = (
+    "id", "lesson_id", "title", "title_sr", "title_de", "block_type", "order", "video",
+    "video_manifest", "video_poster",
+)
+
+
+class LessonCatalog:
+    __slots__ = ("lessons", "by_id", "categories", "_groups")
+
+    def __init__(self, lessons, categories):
+        self.lessons = tuple(lessons)
+        self.by_id = {lesson.id: lesson for lesson in self.lessons}
+        self.categories = tuple(categories)
+        self._groups = {}
+        for lesson in self.lessons:
+            for key in ((lesson.age_group, None), (None, lesson.category_id), (lesson.age_group, lesson.category_id)):
+                self._groups.setdefault(key, []).append(lesson)
+        self._groups = {key: tuple(rows) for key, rows in self._groups.items()}
+
+    def filter(self, age_group=None, category_id=None, ids=None):
+        """
+        Lessons in catalog order, optionally limited to an age group, a category
+        and/or a set of ids. `ids` given as a list keeps its (ranked) order instead.
+        """
+        if age_group or category_id:
+            rows = self._groups.get((age_group or None, int(category_id) if category_id else None), ())
+        else:
+            rows = self.lessons
+
+        if ids is None:
+            return rows
+        if isinstance(ids, (list, tuple)):
+            allowed = set(rows) if rows is not self.lessons else None
+            ranked = (self.by_id.get(pk) for pk in ids)
+            return tuple(row for row in ranked if row is not None and (allowed is None or row in allowed))
+        return tuple(row for row in rows if row.id in ids)
+
+
+def build_catalog():
+    categories = {
+        category.id: CatalogCategory(category.id, category.name, category.order)
+        for category in LessonCategory.objects.order_by("order", "name")
+    }
+
+    blocks = {}
+    for row in LessonBlock.objects.order_by("order", "id").values(*BLOCK_FIELDS):
+        blocks.setdefault(row["lesson_id"], []).append(CatalogBlock(**row))
+
+    lessons = (
+        CatalogLesson(row, categories[row["category_id"]], tuple(blocks.get(row["id"], ())))
+        for row in Lesson.objects.order_by("category__order", "order", "created_at").values(*LESSON_FIELDS)
+    )
+    return LessonCatalog(lessons, categories.values())
+
+
+_catalog = None
+_version = None
+
+
+def get_catalog():
+    """
+    Returns the current catalog snapshot, rebuilding it if lessons changed.
+    """
+    global _catalog, _version
+    version = get_version("lessons")
+    if _catalog is None or version != _version:
+        with primary_reads():
+            _catalog = build_catalog()
+        _version = version
+    return _catalog
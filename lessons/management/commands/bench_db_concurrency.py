@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from lessons.models import ContactMessage, Lesson, LessonCategory
+from practice_english.db import sqlite_database
+
+ALIAS = "bench"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures read and write throughput with concurrent reader and writer threads "
+        "(lesson list queries vs contact form inserts) under each database profile: "
+        "plain SQLite, SQLite with the WAL profile and, with --postgres, the configured PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument(
+            "--postgres", action="store_true",
+            help="also run against DATABASES['default'] when it is PostgreSQL (rows are removed afterwards)",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        try:
+            profiles = [
+                ("sqlite, rollback journal", sqlite_database(os.path.join(directory, "plain.sqlite3"), tuned=False)),
+                ("sqlite, WAL profile", sqlite_database(os.path.join(directory, "wal.sqlite3"))),
+            ]
+            if options["postgres"] and "postgresql" in settings.DATABASES[DEFAULT_DB_ALIAS]["ENGINE"]:
+                profiles.append(("postgresql", dict(settings.DATABASES[DEFAULT_DB_ALIAS])))
+            for label, database in profiles:
+                self.report(label, database, options)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def report(self, label, database, options):
+        connections.settings[ALIAS] = connections.configure_settings({DEFAULT_DB_ALIAS: database})[DEFAULT_DB_ALIAS]
+        try:
+            call_command("migrate", database=ALIAS, verbosity=0)
+            category = LessonCategory.objects.using(ALIAS).create(name="Benchmark")
+            Lesson.objects.using(ALIAS).bulk_create(
+                Lesson(category=category, title=f"Lesson {i}", description="Benchmark lesson " * 20, order=i)
+                for i in range(200)
+            )
+            first_message = ContactMessage.objects.using(ALIAS).order_by("-pk").values_list("pk", flat=True).first() or 0
+
+            results = {"reads": 0, "writes": 0, "errors": 0, "read_latency": []}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + options["seconds"]
+            threads = [threading.Thread(target=self.read, args=(deadline, results, lock)) for _ in range(options["readers"])]
+            threads += [threading.Thread(target=self.write, args=(deadline, results, lock)) for _ in range(options["writers"])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            if database["NAME"] == settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"]:
+                # the SQLite profiles use throwaway files, the PostgreSQL run the real database
+                ContactMessage.objects.using(ALIAS).filter(pk__gt=first_message).delete()
+                Lesson.objects.using(ALIAS).filter(category=category).delete()
+                category.delete()
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            del connections[ALIAS]
+
+        seconds = options["seconds"]
+        latencies = sorted(results["read_latency"]) or [0]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{label:<26} {results['reads'] / seconds:8.0f} reads/s {results['writes'] / seconds:7.0f} writes/s "
+            f"p99 read {p99 * 1000:6.1f} ms {results['errors']:4d} lock errors"
+        )
+
+    def read(self, deadline, results, lock):
+        reads, errors, latency = 0, 0, []
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    list(Lesson.objects.using(ALIAS).select_related("category").order_by("order")[:20])
+                    ContactMessage.objects.using(ALIAS).filter(is_read=False).count()
+                except OperationalError:
+                    errors += 1
+                    continue
+                latency.append(time.perf_counter() - started)
+                reads += 1
+        finally:
+            connections[ALIAS].close()
+        with lock:
+            results["reads"] += reads
+            results["errors"] += errors
+            results["read_latency"].extend(latency)
+
+    def write(self, deadline, results, lock):
+        writes, errors = 0, 0
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    with transaction.atomic(using=ALIAS):
+                        ContactMessage.objects.using(ALIAS).create(name="Bench", email="bench@example.com", message="Hello")
+                except OperationalError:
+                    errors += 1
+                    continue
+                writes += 1
+        finally:
+            connections[ALIAS].close()
+        with lock:
+            results["writes"] += writes
+            results["errors"] += errors
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+def legacy_active_language(request):
+    # the session-based context processor LanguageMiddleware replaced, for comparison
+    supported = {code for code, _ in settings.LANGUAGES}
+    lang = request.GET.get("lang") or request.session.get("lang") or "en"
+    if lang not in supported:
+        lang = "en"
+    request.session["lang"] = lang
+    return {"lang": lang}
+
+
+class SessionWriteCounter:
+    def __init__(self):
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if "django_session" in sql and sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Counts session table writes per 1,000 anonymous page views, with the language "
+        "kept in the session (the old context processor) and with LanguageMiddleware."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--views", type=int, default=1000)
+        parser.add_argument("--visitors", type=int, default=50)
+
+    def handle(self, *args, **options):
+        urls = [reverse("lesson_list"), reverse("resources-home"), reverse("blog_list"), reverse("lesson_list") + "?page=2"]
+
+        middleware = [name for name in settings.MIDDLEWARE if name != "practice_english.middleware.LanguageMiddleware"]
+        templates = [{**engine, "OPTIONS": {**engine["OPTIONS"], "context_processors": [
+            "lessons.management.commands.bench_language_sessions.legacy_active_language"
+            if name == "practice_english.context_processors.active_language" else name
+            for name in engine["OPTIONS"].get("context_processors", [])
+        ]}} for engine in settings.TEMPLATES]
+        with override_settings(MIDDLEWARE=middleware, TEMPLATES=templates):
+            self.report("language in the session", urls, options)
+        self.report("LanguageMiddleware (cookie)", urls, options)
+
+    def report(self, label, urls, options):
+        total, visitors = options["views"], options["visitors"]
+        languages = [code for code, _ in settings.LANGUAGES]
+        counter = SessionWriteCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for visitor in range(visitors):
+                client = Client()
+                views = total // visitors + (visitor < total % visitors)
+                for view in range(views):
+                    url = urls[view % len(urls)]
+                    # every visitor picks a language on their first page view
+                    params = {"lang": languages[visitor % len(languages)]} if view == 0 else {}
+                    client.get(url, params)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<30} {counter.writes * 1000 / total:8.1f} session writes / 1,000 views "
+            f"({total / elapsed:.0f} views/s)"
+        )
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from lessons.models import Lesson, LessonBlock, LessonCategory
+from quizzes.models import Quiz
+from resources.models import Worksheet
+
+
+class Command(BaseCommand):
+    help = (
+        "Times lesson detail page renders without the template fragment cache, "
+        "with a cold cache and with a warm one, on a temporary lesson."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=200)
+        parser.add_argument("--blocks", type=int, default=20)
+
+    def handle(self, *args, **options):
+        category, _ = LessonCategory.objects.get_or_create(name="Benchmark")
+        lesson = Lesson.objects.create(category=category, title="Benchmark", description="Benchmark lesson")
+        try:
+            for i in range(options["blocks"]):
+                LessonBlock.objects.create(lesson=lesson, title=f"Part {i}", order=i, video=f"lessons/blocks/bench-{i}.mp4")
+            for i in range(5):
+                Quiz.objects.create(title=f"Quiz {i}", quiz_type="drag_drop", difficulty="easy", lesson=lesson)
+                Worksheet.objects.create(title=f"Worksheet {i}", lesson=lesson, file=f"resources/bench-{i}.pdf")
+
+            url = reverse("lesson_detail", args=[lesson.pk])
+            # {% cache %} uses the "template_fragments" cache when there is one
+            uncached = {**settings.CACHES, "template_fragments": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+            with override_settings(CACHES=uncached):
+                self.report("no fragment cache", url, options, clear=True)
+            self.report("cold fragment cache", url, options, clear=True)
+            self.report("warm fragment cache", url, options, clear=False)
+        finally:
+            lesson.delete()
+
+    def report(self, label, url, options, clear):
+        client = Client()
+        languages = [code for code, _ in settings.LANGUAGES]
+        client.get(url)  # warms the URL resolver and the template loader
+        total, queries, elapsed = options["renders"], 0, 0.0
+        for render in range(total):
+            if clear:
+                caches["default"].clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(url, {"lang": languages[render % len(languages)]})
+                elapsed += time.perf_counter() - started
+            queries += len(captured)
+        self.stdout.write(f"{label:<22} {elapsed * 1000 / total:7.2f} ms/render {queries / total:5.1f} queries/render")
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lessons.bundle import ARCHIVES, plan_bundle, stream_bundle
+from lessons.models import Lesson
+
+
+class Command(BaseCommand):
+    help = "Exports an offline bundle of a lesson with its blocks, quizzes, resources and media."
+
+    def add_arguments(self, parser):
+        parser.add_argument("lesson", type=int, help="Lesson id.")
+        parser.add_argument("--archive", choices=sorted(ARCHIVES), default="zip")
+        parser.add_argument("--since", help="Only include what changed since this bundle version.")
+        parser.add_argument("--output", help='Archive path, "-" for stdout (default: lesson-<id>-<version>.<archive>).')
+
+    def handle(self, *args, **options):
+        lesson = Lesson.objects.filter(pk=options["lesson"]).first()
+        if lesson is None:
+            raise CommandError(f"Lesson {options['lesson']} does not exist.")
+        version, base, entries = plan_bundle(lesson, since=options["since"])
+        if options["since"] and base is None:
+            self.stderr.write(f"Unknown bundle version {options['since']}, exporting the complete bundle.")
+
+        output = options["output"] or f"lesson-{lesson.pk}-{version[:12]}{'-delta' if base else ''}.{options['archive']}"
+        if output == "-":
+            for chunk in stream_bundle(entries, options["archive"]):
+                sys.stdout.buffer.write(chunk)
+            return
+        with open(output, "wb") as file:
+            for chunk in stream_bundle(entries, options["archive"]):
+                file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output} ({len(entries)} files, version {version})."))
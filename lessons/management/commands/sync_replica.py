@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from practice_english.replicas import sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the primary SQLite database over the local read replica "
+        "(DJANGO_SQLITE_REPLICA_PATH), once or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="keep syncing every N seconds")
+
+    def handle(self, *args, **options):
+        replica = settings.DATABASE_REPLICA
+        if not replica:
+            raise CommandError("No read replica is configured, set DJANGO_SQLITE_REPLICA_PATH.")
+        primary, replica = settings.DATABASES["default"], settings.DATABASES[replica]
+        if "sqlite3" not in primary["ENGINE"] or "sqlite3" not in replica["ENGINE"]:
+            raise CommandError("Only SQLite replicas are synced by copying, PostgreSQL replicas use streaming replication.")
+
+        while True:
+            started = time.perf_counter()
+            sync_sqlite_replica(str(primary["NAME"]), str(replica["NAME"]))
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0009_lessonblock_title_de_lessonblock_title_sr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='video_manifest',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='video_poster',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='video_renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lessonblock',
+            name='video_manifest',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lessonblock',
+            name='video_poster',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lessonblock',
+            name='video_renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
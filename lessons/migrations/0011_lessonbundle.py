@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0010_packaged_video'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32)),
+                ('files', models.JSONField(default=dict, help_text='Content hash of every file in the bundle, by path')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bundles', to='lessons.lesson')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('lesson', 'version'), name='lesson_bundle_version_uniq')],
+            },
+        ),
+    ]
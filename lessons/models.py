@@ -10,7 +10,36 @@ class LessonCategory(models.Model):
     def __str__(self):
         return self.name
 
-class Lesson(models.Model):
+class LessonQuerySet(models.QuerySet):
+    def with_block_counts(self):
+        """
+        Annotates block_count and has_blocks, so serializers need no per-row queries.
+        """
+        return self.annotate(block_count=models.Count("blocks")).annotate(
+            has_blocks=models.ExpressionWrapper(
+                models.Q(block_count__gt=0), output_field=models.BooleanField()
+            )
+        )
+
+
+class PackagedVideo(models.Model):
+    """
+    HLS package of the model's video, filled in by the media worker
+    (assets/hls.py); empty until the video has been packaged.
+    """
+    video_manifest = models.CharField(max_length=255, blank=True, editable=False)
+    video_poster = models.CharField(max_length=255, blank=True, editable=False)
+    video_renditions = models.JSONField(default=list, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def clear_video_package(self):
+        self.video_manifest = self.video_poster = ""
+        self.video_renditions = []
+
+
+class Lesson(PackagedVideo):
     AGE_GROUP_CHOICES = [
         ('4-5', '4–5 years'),
         ('6-7', '6–7 years'),
@@ -46,6 +75,8 @@ class Lesson(models.Model):
         default='4-5'
     )
 
+    objects = LessonQuerySet.as_manager()
+
     class Meta:
         ordering = ["category__order", "order", "created_at"]
 
@@ -64,7 +95,7 @@ class Lesson(models.Model):
 
 
 
-class LessonBlock(models.Model):
+class LessonBlock(PackagedVideo):
     lesson = models.ForeignKey(
         Lesson,
         related_name="blocks",
@@ -102,6 +133,25 @@ class LessonBlock(models.Model):
     def __str__(self):
         return f"{self.lesson.title} – {self.title}"
 
+
+class LessonBundle(models.Model):
+    """
+    Contents of an exported offline bundle (see lessons/bundle.py), kept so a
+    later export can send only what changed since this version.
+    """
+    lesson = models.ForeignKey(Lesson, related_name="bundles", on_delete=models.CASCADE)
+    version = models.CharField(max_length=32)
+    files = models.JSONField(default=dict, help_text="Content hash of every file in the bundle, by path")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["lesson", "version"], name="lesson_bundle_version_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.lesson.title} @ {self.version}"
+
     
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
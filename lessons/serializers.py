@@ -1,7 +1,10 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from assets.serializers import ResponsiveImageField
 from .models import Lesson, LessonBlock
 from quizzes.serializers import QuizSerializer
 from resources.serializers import WorksheetSerializer
+from translations.serializers import TranslatedFieldsMixin
 
 class LessonDetailSerializer(serializers.ModelSerializer):
     quizzes = QuizSerializer(many=True, read_only=True)
@@ -11,12 +14,21 @@ class LessonDetailSerializer(serializers.ModelSerializer):
         model = Lesson
         fields = ['title', 'category', 'description', 'video_url', 'video_file', 'image', 'created_at', 'quizzes', 'worksheets']
 
-class LessonBlockSerializer(serializers.ModelSerializer):
+def media_url(name, request=None):
+    if not name:
+        return None
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+class LessonBlockSerializer(TranslatedFieldsMixin, serializers.ModelSerializer):
     video = serializers.SerializerMethodField()
+    video_hls = serializers.SerializerMethodField()
+    video_poster = serializers.SerializerMethodField()
 
     class Meta:
         model = LessonBlock
-        fields = ["id", "title", "block_type", "order", "video"]
+        fields = ["id", "title", "block_type", "order", "video", "video_hls", "video_poster"]
 
     def get_video(self, obj):
         request = self.context.get("request")
@@ -25,12 +37,23 @@ class LessonBlockSerializer(serializers.ModelSerializer):
         url = obj.video.url
         return request.build_absolute_uri(url) if request else url
 
+    def get_video_hls(self, obj):
+        # HLS master playlist once packaged, players fall back to `video` otherwise
+        return media_url(obj.video_manifest, self.context.get("request"))
+
+    def get_video_poster(self, obj):
+        return media_url(obj.video_poster, self.context.get("request"))
+
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(TranslatedFieldsMixin, serializers.ModelSerializer):
     video_file = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_variants = ResponsiveImageField(source="image")
     video_url = serializers.SerializerMethodField()
+    video_hls = serializers.SerializerMethodField()
+    video_poster = serializers.SerializerMethodField()
 
+    block_count = serializers.SerializerMethodField()
     has_blocks = serializers.SerializerMethodField()
     blocks = LessonBlockSerializer(many=True, read_only=True)
 
@@ -48,19 +71,37 @@ class LessonSerializer(serializers.ModelSerializer):
             "created_at",
             "video_url",
             "video_file",
+            "video_hls",
+            "video_poster",
             "image",
+            "image_variants",
+            "block_count",
             "has_blocks",
             "blocks",
         ]
 
+    def get_block_count(self, obj):
+        # annotated querysets (Lesson.objects.with_block_counts()) and catalog rows
+        # carry the count already, otherwise count the prefetched blocks
+        block_count = getattr(obj, "block_count", None)
+        if block_count is None:
+            block_count = len(obj.blocks.all())
+        return block_count
+
     def get_has_blocks(self, obj):
-        return obj.blocks.exists()
+        return self.get_block_count(obj) > 0
 
     def get_video_url(self, obj):
         # Use embed if you want:
         # return obj.embed_video_url() if obj.video_url else None
         return obj.video_url if obj.video_url else None
 
+    def get_video_hls(self, obj):
+        return media_url(obj.video_manifest, self.context.get("request"))
+
+    def get_video_poster(self, obj):
+        return media_url(obj.video_poster, self.context.get("request"))
+
     def get_video_file(self, obj):
         request = self.context.get("request")
         if not obj.video_file:
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+
+from practice_english.content_version import bump_version
+from .models import Lesson, LessonBlock, LessonCategory
+
+
+def lesson_changed(sender, instance, **kwargs):
+    bump_version("lessons", f"lesson:{instance.pk}")
+
+
+def lesson_block_changed(sender, instance, **kwargs):
+    bump_version("lessons", f"lesson:{instance.lesson_id}")
+
+
+def lesson_category_changed(sender, instance, **kwargs):
+    # category names are embedded in every serialized lesson
+    bump_version("lessons", "lesson-categories")
+
+
+post_save.connect(lesson_changed, sender=Lesson, dispatch_uid="lesson_saved")
+post_delete.connect(lesson_changed, sender=Lesson, dispatch_uid="lesson_deleted")
+post_save.connect(lesson_block_changed, sender=LessonBlock, dispatch_uid="lesson_block_saved")
+post_delete.connect(lesson_block_changed, sender=LessonBlock, dispatch_uid="lesson_block_deleted")
+post_save.connect(lesson_category_changed, sender=LessonCategory, dispatch_uid="lesson_category_saved")
+post_delete.connect(lesson_category_changed, sender=LessonCategory, dispatch_uid="lesson_category_deleted")
@@ -0,0 +1,36 @@
+from django import template
+
+from practice_english.content_version import get_version
+from quizzes.models import Quiz
+from resources.models import Worksheet
+from ..catalog import CatalogLesson
+from ..models import Lesson, LessonBlock
+
+register = template.Library()
+
+
+def version_name(obj):
+    """
+    Content version name (practice_english.content_version) of what `obj` renders.
+    """
+    if isinstance(obj, str):
+        return obj
+    if isinstance(obj, (Lesson, CatalogLesson)):
+        return f"lesson:{obj.pk}"
+    if isinstance(obj, LessonBlock):
+        return f"lesson:{obj.lesson_id}"
+    if isinstance(obj, Quiz):
+        return f"quiz:{obj.pk}"
+    if isinstance(obj, Worksheet):
+        return f"worksheet:{obj.pk}"
+    raise TypeError(f"No content version for {type(obj).__name__}")
+
+
+@register.filter
+def content_version(obj):
+    """
+    Current version token of `obj`, or of a version name such as "quizzes",
+    to key {% cache %} fragments that go stale with the content:
+    {% cache 86400 "lesson-card" lesson|content_version lang %}
+    """
+    return get_version(version_name(obj))
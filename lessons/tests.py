@@ -1,3 +1,637 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import Lesson, LessonBlock, LessonCategory
+from practice_english.content_version import bump_version
+from .serializers import LessonSerializer
+
+
+def make_lesson(category=None, blocks=0, **kwargs):
+    """
+    Creates a lesson (and its category if none is given) with `blocks` lesson blocks.
+    """
+    if category is None:
+        category, _ = LessonCategory.objects.get_or_create(name="Colours")
+    kwargs.setdefault("title", "Colours")
+    kwargs.setdefault("description", "Learn the colours")
+    lesson = Lesson.objects.create(category=category, **kwargs)
+    for i in range(blocks):
+        LessonBlock.objects.create(lesson=lesson, title=f"Block {i}", order=i)
+    return lesson
+
+
+class LessonConditionalGetTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.lesson = make_lesson(blocks=2)
+
+    def test_lesson_detail_returns_304_without_queries(self):
+        url = reverse("api_lesson_detail", args=[self.lesson.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_lesson_detail_etag_changes_with_blocks_and_category(self):
+        url = reverse("api_lesson_detail", args=[self.lesson.pk])
+        etag = self.client.get(url)["ETag"]
+
+        LessonBlock.objects.create(lesson=self.lesson, title="New block")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        category = self.lesson.category
+        category.name = "Colors"
+        category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["category_name"], "Colors")
+
+    def test_lesson_list_etag_depends_on_filters(self):
+        url = reverse("api_lesson_list")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {"age_group": "6-7"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.lesson.title = "Colors"
+        self.lesson.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LessonCatalogTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.colours = make_lesson(blocks=2, image="lesson_images/colours.jpg")
+        self.numbers = make_lesson(title="Numbers", age_group="6-7", order=1)
+
+    def test_list_api_is_served_from_the_snapshot(self):
+        url = reverse("api_lesson_list")
+        self.client.get(url)  # builds the snapshot
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"age_group": "6-7"})
+        self.assertEqual([lesson["id"] for lesson in response.data], [self.numbers.pk])
+
+    def test_snapshot_payload_matches_the_model_serializer(self):
+        response = self.client.get(reverse("api_lesson_list"))
+        lesson = Lesson.objects.with_block_counts().select_related("category").prefetch_related("blocks").get(pk=self.colours.pk)
+        request = response.wsgi_request
+        expected = LessonSerializer(lesson, context={"request": request}).data
+        self.assertEqual(response.data[0], expected)
+        self.assertTrue(response.data[0]["has_blocks"])
+        self.assertEqual(len(response.data[0]["blocks"]), 2)
+
+    def test_snapshot_is_rebuilt_on_changes(self):
+        url = reverse("api_lesson_list")
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+        LessonBlock.objects.create(lesson=self.numbers, title="Count to ten")
+        self.assertTrue(self.client.get(url).data[1]["has_blocks"])
+
+        self.numbers.delete()
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+        LessonCategory.objects.filter(pk=self.colours.category_id).update(order=5)
+        other = LessonCategory.objects.create(name="Animals", order=1)
+        animals = make_lesson(category=other, title="Animals")
+        self.assertEqual([lesson["id"] for lesson in self.client.get(url).data], [animals.pk, self.colours.pk])
+        self.assertEqual(len(self.client.get(url, {"category": other.pk}).data), 1)
+        self.assertEqual(len(self.client.get(url, {"category": "x"}).data), 0)
+
+    def test_list_pages(self):
+        response = self.client.get(reverse("lesson_list"))
+        self.assertEqual(response.context["lessons_count"], 2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("lesson_list_by_age", args=["6-7"]))
+        self.assertFalse([q for q in queries if "lessons_" in q["sql"]])
+        self.assertEqual([lesson.id for lesson in response.context["page_obj"]], [self.numbers.pk])
+        self.assertContains(response, "Numbers")
+
+        response = self.client.get(reverse("lessons_show_all"), {"age_group": "4-5"})
+        self.assertEqual([lesson.id for lesson in response.context["lessons"]], [self.colours.pk])
+        self.assertContains(response, "/media/lesson_images/colours.jpg")
+
+
+class LessonBlockCountTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.category = LessonCategory.objects.create(name="Numbers")
+
+    def add_lessons(self, count):
+        # bulk_create skips the signals, so bump the lessons version by hand
+        Lesson.objects.bulk_create(
+            Lesson(category=self.category, title=f"Lesson {i}", description="") for i in range(count)
+        )
+        bump_version("lessons")
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("api_lesson_list"))
+        self.assertEqual(response.status_code, 200)
+        return len(response.data), len(queries)
+
+    def test_list_query_count_does_not_grow_with_lessons(self):
+        self.add_lessons(10)
+        rows, small = self.count_list_queries()
+        self.assertEqual(rows, 10)
+
+        self.add_lessons(9990)
+        rows, large = self.count_list_queries()
+        self.assertEqual(rows, 10000)
+        self.assertEqual(small, large)
+
+    def test_annotated_queryset_serializes_without_per_row_queries(self):
+        lessons = [make_lesson(category=self.category, blocks=i % 2) for i in range(5)]
+        queryset = Lesson.objects.with_block_counts().select_related("category").prefetch_related("blocks")
+        with self.assertNumQueries(2):
+            data = LessonSerializer(queryset, many=True).data
+        self.assertEqual([row["has_blocks"] for row in data], [False, True, False, True, False])
+        self.assertEqual(data[1]["block_count"], 1)
+
+        response = self.client.get(reverse("api_lesson_detail", args=[lessons[1].pk]))
+        self.assertEqual(response.data["block_count"], 1)
+
+
+class LessonBundleTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        from quizzes.models import Quiz, SortingPair
+        from resources.models import Worksheet
+
+        self.lesson = make_lesson(image=SimpleUploadedFile("colours.jpg", b"colours"))
+        self.block = LessonBlock.objects.create(
+            lesson=self.lesson, title="Intro", video=SimpleUploadedFile("intro.mp4", b"intro video"),
+        )
+        self.quiz = Quiz.objects.create(title="Colours", quiz_type="drag_drop", difficulty="easy", lesson=self.lesson)
+        SortingPair.objects.create(quiz=self.quiz, label="Warm", item="Red", image=SimpleUploadedFile("red.png", b"red"))
+        Worksheet.objects.create(title="Colouring", lesson=self.lesson, file=SimpleUploadedFile("colouring.pdf", b"%PDF"))
+
+    def download(self, **params):
+        response = self.client.get(reverse("api_lesson_bundle", args=[self.lesson.pk]), params)
+        return response, b"".join(response.streaming_content)
+
+    def test_zip_bundle(self):
+        response, content = self.download()
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn(f"lesson-{self.lesson.pk}-", response["Content-Disposition"])
+
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            names = archive.namelist()
+            manifest = json.loads(archive.read("manifest.json"))
+            lesson = json.loads(archive.read("lesson.json"))
+            quiz = json.loads(archive.read(f"quizzes/{self.quiz.pk}.json"))
+            resources = json.loads(archive.read("resources.json"))
+            for name in names[1:]:
+                self.assertEqual(hashlib.sha256(archive.read(name)).hexdigest(), manifest["files"][name]["hash"])
+
+        self.assertEqual(names[0], "manifest.json")
+        self.assertEqual(sorted(manifest["files"]), sorted(names[1:]))
+        self.assertEqual(len([name for name in names if name.startswith("media/")]), 4)
+        self.assertEqual(manifest["version"], response["X-Bundle-Version"])
+        self.assertIsNone(manifest["base"])
+        # media URLs point into the bundle
+        self.assertIn(lesson["blocks"][0]["video"].lstrip("/"), names)
+        self.assertIn(quiz["sorting_pairs"][0]["image_url"].lstrip("/"), names)
+        self.assertEqual(resources[0]["title"], "Colouring")
+
+    def test_tar_bundle_matches_zip(self):
+        _, content = self.download(archive="tar")
+        with tarfile.open(fileobj=BytesIO(content)) as archive:
+            names = archive.getnames()
+            manifest = json.load(archive.extractfile("manifest.json"))
+            video = archive.extractfile(f"media/{self.block.video.name}").read()
+        self.assertEqual(sorted(manifest["files"]), sorted(names[1:]))
+        self.assertEqual(video, b"intro video")
+        self.assertEqual(len(content) % tarfile.RECORDSIZE, 0)
+
+    def test_delta_since_a_version(self):
+        response, _ = self.download()
+        version = response["X-Bundle-Version"]
+        old_video = f"media/{self.block.video.name}"
+
+        self.block.video = SimpleUploadedFile("intro.mp4", b"new intro video")
+        self.block.save()
+        response, content = self.download(since=version)
+        self.assertIn("-delta.zip", response["Content-Disposition"])
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            names = archive.namelist()
+            manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(sorted(names), sorted(["manifest.json", "lesson.json", f"media/{self.block.video.name}"]))
+        self.assertEqual(manifest["base"], version)
+        self.assertEqual(manifest["deleted"], [old_video])
+        self.assertEqual(len(manifest["files"]), 7)
+
+        # unknown versions get the complete bundle
+        response, content = self.download(since="unknown")
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            self.assertEqual(len(archive.namelist()), 8)
+
+    @override_settings(MEDIA_JOBS_EAGER=True, IMAGE_DERIVATIVE_WIDTHS=(320,), IMAGE_DERIVATIVE_FORMATS=["webp"])
+    def test_every_linked_file_is_bundled(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", (640, 320), (200, 40, 40)).save(buffer, "JPEG")
+        self.lesson.image = SimpleUploadedFile("colours.jpg", buffer.getvalue())
+        self.lesson.save()
+        package = "hls/ab/abcd"
+        for name in ["master.m3u8", "poster.jpg", "360p/index.m3u8", "360p/segment-000.ts"]:
+            default_storage.save(f"{package}/{name}", ContentFile(name.encode()))
+        LessonBlock.objects.filter(pk=self.block.pk).update(
+            video_manifest=f"{package}/master.m3u8", video_poster=f"{package}/poster.jpg",
+        )
+
+        _, content = self.download()
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            names = set(archive.namelist())
+            payloads = b"".join(archive.read(name) for name in names if name.endswith(".json")).decode()
+        linked = set(re.findall(r'/media/([^\s",]+)', payloads))
+        self.assertTrue(any(name.startswith("derivatives/") for name in linked))
+        self.assertIn(f"{package}/master.m3u8", linked)
+        self.assertEqual({f"media/{name}" for name in linked} - names, set())
+        self.assertIn(f"media/{package}/360p/segment-000.ts", names)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(reverse("api_lesson_bundle", args=[self.lesson.pk]), {"archive": "rar"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("api_lesson_bundle", args=[999])).status_code, 404)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bundle.tar")
+            out = StringIO()
+            call_command("export_lesson_bundle", self.lesson.pk, "--archive=tar", f"--output={output}", stdout=out)
+            self.assertIn("(8 files, version", out.getvalue())
+            with tarfile.open(output) as archive:
+                self.assertEqual(len(archive.getnames()), 8)
+
+
+class LanguageMiddlewareTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_page_views_do_not_touch_the_session(self):
+        with CaptureQueriesContext(connection) as queries:
+            responses = [self.client.get(reverse("lesson_list")) for _ in range(3)]
+        self.assertFalse([q for q in queries.captured_queries if "django_session" in q["sql"]])
+        self.assertFalse([response for response in responses if "sessionid" in response.cookies])
+        # later views are page cache hits, rendered without a context
+        self.assertEqual(responses[0].context["lang"], "en")
+
+    def test_choice_is_remembered_in_a_cookie(self):
+        response = self.client.get(reverse("resources-home"), {"lang": "sr"})
+        self.assertEqual(response.context["lang"], "sr")
+        self.assertEqual(response.cookies["lang"].value, "sr")
+
+        # later pages use it, without setting the cookie again
+        response = self.client.get(reverse("blog_list"))
+        self.assertEqual(response.context["lang"], "sr")
+        self.assertNotIn("lang", response.cookies)
+        self.assertEqual(self.client.get(reverse("lesson_list"), {"lang": "sr"}).cookies.get("lang"), None)
+
+        response = self.client.get(reverse("lesson_list"), {"lang": "de"})
+        self.assertEqual((response.context["lang"], response.cookies["lang"].value), ("de", "de"))
+
+    def test_unsupported_languages_fall_back(self):
+        self.assertEqual(self.client.get(reverse("lesson_list"), {"lang": "xx"}).context["lang"], "en")
+        self.client.cookies["lang"] = "de"
+        self.assertEqual(self.client.get(reverse("lesson_list"), {"lang": "xx"}).context["lang"], "de")
+
+
+class LessonFragmentCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        from quizzes.models import Quiz
+        from resources.models import Worksheet
+
+        self.lesson = make_lesson(title_sr="Boje")
+        for i in range(2):
+            LessonBlock.objects.create(lesson=self.lesson, title=f"Block {i}", order=i, video=f"lessons/blocks/{i}.mp4")
+        self.quiz = Quiz.objects.create(title="Colour quiz", quiz_type="drag_drop", difficulty="easy", lesson=self.lesson)
+        self.worksheet = Worksheet.objects.create(title="Colouring", lesson=self.lesson, file="resources/colouring.pdf")
+        self.url = reverse("lesson_detail", args=[self.lesson.pk])
+        # signed-in visitors skip the page cache, their pages render from fragments
+        self.client.force_login(User.objects.create_user("teacher"))
+
+    def content_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        tables = ("lessons_lessonblock", "lessons_lessoncategory", "quizzes_quiz", "resources_worksheet")
+        return response, [q["sql"] for q in queries.captured_queries if any(table in q["sql"] for table in tables)]
+
+    def test_detail_renders_from_cache(self):
+        self.assertTrue(self.content_queries()[1])
+        cached, queries = self.content_queries()
+        self.assertEqual(queries, [])
+        self.assertContains(cached, "Block 1")
+        self.assertContains(cached, "Colour quiz")
+
+    def test_fragments_are_per_language(self):
+        self.content_queries()
+        response, queries = self.content_queries(lang="sr")
+        self.assertTrue(queries)
+        self.assertContains(response, "Boje")
+        self.assertContains(self.client.get(self.url, {"lang": "en"}), "Colours")
+
+    def test_content_changes_invalidate_the_fragments(self):
+        self.content_queries()
+
+        LessonBlock.objects.create(lesson=self.lesson, title="Block 2", order=2, video="lessons/blocks/2.mp4")
+        self.assertContains(self.client.get(self.url), "Block 2")
+
+        self.quiz.title = "Colour game"
+        self.quiz.save()
+        self.assertContains(self.client.get(self.url), "Colour game")
+
+        self.worksheet.title = "Colouring book"
+        self.worksheet.save()
+        self.assertContains(self.client.get(self.url), "Colouring book")
+
+        self.lesson.title = "Colors"
+        self.lesson.save()
+        self.assertContains(self.client.get(self.url), "Colors")
+
+    def test_list_cards_follow_the_lesson_version(self):
+        self.assertContains(self.client.get(reverse("lesson_list")), "Colours")
+        self.lesson.title = "Colors"
+        self.lesson.save()
+        self.assertContains(self.client.get(reverse("lesson_list")), "Colors")
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        from blog.models import BlogPost
+        from resources.models import Worksheet
+
+        self.lesson = make_lesson(title="Colours", age_group="4-5")
+        self.other = make_lesson(title="Shapes", age_group="4-5")
+        self.post = BlogPost.objects.create(title_en="Hello", content_en="Body")
+        self.worksheet = Worksheet.objects.create(title="Colouring", file="resources/colouring.pdf")
+        self.other_worksheet = Worksheet.objects.create(title="Counting", file="resources/counting.pdf")
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(name, args=args), params)
+
+    def assertCached(self, name, *args, **params):
+        self.assertEqual(self.get(name, *args, **params)["X-Page-Cache"], "hit")
+
+    def assertRendered(self, name, *args, **params):
+        response = self.get(name, *args, **params)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        return response
+
+    def test_hits_skip_views_and_queries(self):
+        for name, args in [("index", ()), ("about", ()), ("lesson_list", ()), ("blog_list", ()),
+                           ("blog_detail", (self.post.slug,)), ("resources-home", ()),
+                           ("resource_detail", (self.worksheet.pk,)), ("lesson_detail", (self.lesson.pk,))]:
+            first = self.assertRendered(name, *args)
+            with self.assertNumQueries(0):
+                cached = self.get(name, *args)
+            self.assertEqual(cached["X-Page-Cache"], "hit")
+            self.assertEqual(cached.status_code, 200)
+            self.assertEqual(cached["Content-Type"], first["Content-Type"])
+
+    def test_key_includes_language_and_query_string(self):
+        self.assertRendered("lesson_list")
+        self.assertRendered("lesson_list", lang="sr")
+        self.assertRendered("lesson_list", page="1")
+        self.assertCached("lesson_list", page="1")
+        self.client.cookies["lang"] = "sr"
+        self.assertCached("lesson_list")
+
+    def test_lesson_changes_invalidate_their_pages_only(self):
+        for name, args in [("lesson_list", ()), ("lesson_detail", (self.lesson.pk,)),
+                           ("lesson_detail", (self.other.pk,)), ("blog_list", ())]:
+            self.assertRendered(name, *args)
+
+        self.lesson.title = "Colors"
+        self.lesson.save()
+        self.assertContains(self.assertRendered("lesson_list"), "Colors")
+        self.assertContains(self.assertRendered("lesson_detail", self.lesson.pk), "Colors")
+        self.assertCached("lesson_detail", self.other.pk)
+        self.assertCached("blog_list")
+
+        LessonBlock.objects.create(lesson=self.other, title="Circle", video="lessons/blocks/circle.mp4")
+        self.assertContains(self.assertRendered("lesson_detail", self.other.pk), "Circle")
+        self.assertCached("lesson_detail", self.lesson.pk)
+
+    def test_blog_changes_invalidate_blog_pages(self):
+        for name, args in [("index", ()), ("blog_list", ()), ("blog_detail", (self.post.slug,)), ("lesson_list", ())]:
+            self.assertRendered(name, *args)
+
+        old_slug = self.post.slug
+        self.post.title_en = "Hello again"
+        self.post.slug = "hello-again"
+        self.post.save()
+        self.assertContains(self.assertRendered("blog_list"), "Hello again")
+        self.assertContains(self.assertRendered("index"), "Hello again")
+        self.assertContains(self.assertRendered("blog_detail", "hello-again"), "Hello again")
+        self.assertEqual(self.get("blog_detail", old_slug).status_code, 404)
+        self.assertCached("lesson_list")
+
+        self.post.is_published = False
+        self.post.save()
+        self.assertEqual(self.get("blog_detail", "hello-again").status_code, 404)
+
+    def test_worksheet_changes_invalidate_resource_pages(self):
+        for name, args in [("resources-home", ()), ("resource_detail", (self.worksheet.pk,)),
+                           ("resource_detail", (self.other_worksheet.pk,))]:
+            self.assertRendered(name, *args)
+
+        self.worksheet.title = "Colouring book"
+        self.worksheet.save()
+        self.assertContains(self.assertRendered("resources-home"), "Colouring book")
+        self.assertContains(self.assertRendered("resource_detail", self.worksheet.pk), "Colouring book")
+        self.assertCached("resource_detail", self.other_worksheet.pk)
+
+        pk = self.other_worksheet.pk
+        self.other_worksheet.delete()
+        self.assertNotContains(self.assertRendered("resources-home"), "Counting")
+        self.assertEqual(self.get("resource_detail", pk).status_code, 404)
+
+    def test_sessions_and_messages_bypass_the_cache(self):
+        self.assertRendered("blog_list")
+        self.client.force_login(User.objects.create_user("teacher"))
+        self.assertNotIn("X-Page-Cache", self.get("blog_list"))
+        self.client.logout()
+        self.client.cookies.pop("sessionid", None)
+
+        self.client.cookies["messages"] = "pending"
+        self.assertNotIn("X-Page-Cache", self.get("blog_list"))
+        del self.client.cookies["messages"]
+        self.assertCached("blog_list")
+
+    def test_cached_forms_get_a_fresh_csrf_token(self):
+        self.assertRendered("blog_list")
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.get(reverse("blog_list"))
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        self.assertNotIn("page_cache", token)
+        self.assertIn("csrftoken", response.cookies)
+
+        response = client.post(reverse("subscribe"), {"email": "parent@example.com", "csrfmiddlewaretoken": token})
+        self.assertNotEqual(response.status_code, 403)
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.lesson = make_lesson(blocks=1)
+
+    def routed_reads(self, method, url, settled=True, **kwargs):
+        # the replica is the primary itself here, so queries run while the router's choices are recorded
+        from practice_english.content_version import CHANGED_KEY
+        from practice_english.replicas import ReplicaRouter
+
+        if settled:
+            caches["default"].set(CHANGED_KEY, 0, timeout=None)
+        routed = []
+
+        def record(execute, sql, params, many, context):
+            routed.append(ReplicaRouter().db_for_read(Lesson) == "default")
+            return execute(sql, params, many, context)
+
+        with override_settings(DATABASE_REPLICA="default"), connection.execute_wrapper(record):
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, routed
+
+    def test_uncached_reads_use_the_replica(self):
+        from quizzes.models import Quiz
+
+        quiz = Quiz.objects.create(title="Colours", quiz_type="drag_drop", difficulty="easy", lesson=self.lesson)
+        response, routed = self.routed_reads("get", reverse("quiz-stats", args=[quiz.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(routed)
+        self.assertTrue(all(routed))
+
+        # search runs on the replica, the cached cards are loaded from the primary
+        response, routed = self.routed_reads("get", reverse("search"), data={"q": "colo", "age_group": self.lesson.age_group})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(True, routed)
+        self.assertIn(False, routed)
+
+    def test_catalog_views_use_a_current_replica(self):
+        from blog.models import BlogPost
+        from quizzes.models import Quiz
+
+        quiz = Quiz.objects.create(title="Colours", quiz_type="drag_drop", difficulty="easy", lesson=self.lesson)
+        post = BlogPost.objects.create(title_en="Hello", content_en="Body")
+        # the lesson list pages read the catalog snapshot, built from the primary
+        for url in [reverse("lesson_detail", args=[self.lesson.pk]), reverse("api_lesson_detail", args=[self.lesson.pk]),
+                    reverse("quiz-list"), reverse("blog_list"), reverse("blog_detail", args=[post.slug])]:
+            caches["default"].clear()
+            response, routed = self.routed_reads("get", url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn(True, routed, url)
+
+        # cached payloads are built from the primary
+        caches["default"].clear()
+        response, routed = self.routed_reads("get", reverse("quiz-detail", args=[quiz.pk]))
+        self.assertTrue(routed)
+        self.assertFalse(any(routed))
+
+    def test_recent_changes_keep_reads_on_the_primary(self):
+        from practice_english.replicas import REPLICA_SYNCED_KEY
+
+        url = reverse("api_lesson_detail", args=[self.lesson.pk])
+        bump_version(f"lesson:{self.lesson.pk}")
+        self.assertFalse(any(self.routed_reads("get", url, settled=False)[1]))
+        with override_settings(REPLICA_MAX_LAG=0):
+            self.assertTrue(all(self.routed_reads("get", url, settled=False)[1]))
+
+        # a SQLite replica is current once copied after the change
+        caches["default"].set(REPLICA_SYNCED_KEY, 0, timeout=None)
+        with override_settings(REPLICA_MAX_LAG=0):
+            self.assertFalse(any(self.routed_reads("get", url, settled=False)[1]))
+        caches["default"].set(REPLICA_SYNCED_KEY, time.time(), timeout=None)
+        self.assertTrue(all(self.routed_reads("get", url, settled=False)[1]))
+
+    def test_snapshots_are_built_from_the_primary(self):
+        from lessons.catalog import get_catalog
+        from practice_english.replicas import _use_replica
+
+        token = _use_replica.set(True)
+        self.addCleanup(_use_replica.reset, token)
+        bump_version("lessons")
+        with override_settings(DATABASE_REPLICA="default"), CaptureQueriesContext(connection) as queries:
+            routed = []
+            with connection.execute_wrapper(lambda execute, *args: routed.append(_use_replica.get()) or execute(*args)):
+                get_catalog()
+        self.assertTrue(queries.captured_queries)
+        self.assertFalse(any(routed))
+
+    def test_writes_and_signed_in_users_stay_on_the_primary(self):
+        response, routed = self.routed_reads("post", reverse("contact"), data={"name": "A", "email": "a@example.com", "message": "Hi"})
+        self.assertFalse(any(routed))
+        # the visitor's next reads are pinned to the primary
+        self.assertIn("db_primary", response.cookies)
+        self.assertFalse(any(self.routed_reads("get", reverse("search"), data={"q": "colo"})[1]))
+
+        client = self.client_class()
+        client.force_login(User.objects.create_user("teacher"))
+        self.client = client
+        self.assertFalse(any(self.routed_reads("get", reverse("search"), data={"q": "colo"})[1]))
+
+    def test_no_replica_configured(self):
+        from practice_english.replicas import ReplicaRouter
+
+        response = self.client.post(reverse("contact"), {"name": "A", "email": "a@example.com", "message": "Hi"})
+        self.assertNotIn("db_primary", response.cookies)
+        self.assertIsNone(ReplicaRouter().db_for_read(Lesson))
+
+    def test_objects_read_from_the_replica_are_saved_to_the_primary(self):
+        from practice_english.replicas import ReplicaRouter
+
+        self.lesson._state.db = "replica"
+        with override_settings(DATABASE_REPLICA="replica"):
+            self.assertEqual(ReplicaRouter().db_for_write(Lesson, instance=self.lesson), "default")
+            self.assertFalse(ReplicaRouter().allow_migrate("replica", "lessons"))
+            self.assertIsNone(ReplicaRouter().allow_migrate("default", "lessons"))
+
+    def test_sync_copies_the_primary(self):
+        import sqlite3
+        from practice_english.replicas import copy_sqlite_database
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        primary, replica = os.path.join(directory, "primary.sqlite3"), os.path.join(directory, "replica.sqlite3")
+        with sqlite3.connect(primary) as db:
+            db.execute("CREATE TABLE lesson (title TEXT)")
+            db.execute("INSERT INTO lesson VALUES ('Colours')")
+        copy_sqlite_database(primary, replica)
+        with sqlite3.connect(replica) as db:
+            self.assertEqual(db.execute("SELECT title FROM lesson").fetchall(), [("Colours",)])
+
+        with self.assertRaisesMessage(CommandError, "No read replica"):
+            call_command("sync_replica")
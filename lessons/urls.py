@@ -8,6 +8,7 @@ urlpatterns = [
       # ✅ API endpoints (React)
     path("api/lessons/", views.LessonListAPIView.as_view(), name="api_lesson_list"),
     path("api/lessons/<int:pk>/", views.LessonDetailAPIView.as_view(), name="api_lesson_detail"),
+    path("api/lessons/<int:pk>/bundle/", views.lesson_bundle, name="api_lesson_bundle"),
 
     # ✅ HTML pages (Django templates)
     path("search/", views.search_view, name="search"),
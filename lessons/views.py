@@ -5,62 +5,69 @@ from quizzes.models import Quiz
 from resources.models import Worksheet
 from django.conf import settings
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.utils.decorators import method_decorator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import etag, require_safe
 from blog.models import BlogPost
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
 from .serializers import LessonSerializer
+from .cache import lesson_list_etag, lesson_detail_etag
+from search.index import ranked_hits, ranked_queryset, search_ids, prefix_match_ids
+from .catalog import get_catalog
+from .bundle import ARCHIVES, plan_bundle, stream_bundle
+from assets.images import prefetch_images
+from practice_english.page_cache import cached_page
+from practice_english.replicas import primary_reads, replica_reads
 
 def check(request):
     return render(request, '03-online-school.html')
 
 
+@cached_page("blog")
 def index(request):
-    lang = request.GET.get("lang", "en")
-
     posts = BlogPost.objects.filter(is_published=True).order_by("-published_at")[:4]
 
     return render(request, "index-5.html", {
-        "lang": lang,
         "posts": posts,
     })
 
 
 
+@cached_page("lessons", "lesson-categories")
+@replica_reads
 def lesson_list(request, age_group=None):
-    lang = request.GET.get("lang", "en")
     query = request.GET.get("q", "")
     category_id = request.GET.get("category")
 
-    lessons = Lesson.objects.all().order_by("category__order", "order", "created_at")
-    categories = LessonCategory.objects.all().order_by("order")
-
-    if age_group:
-        lessons = lessons.filter(age_group=age_group)
+    # 📚 served from the in-memory catalog snapshot, see lessons/catalog.py
+    catalog = get_catalog()
+    if category_id and not category_id.isdigit():
+        category_id = None
 
-    if category_id:
-        lessons = lessons.filter(category_id=category_id)
-
-    if query:
-        lessons = lessons.filter(title__icontains=query)
+    # accent/script-insensitive word prefix match in every language
+    ids = prefix_match_ids("lesson", query) if query else None
+    lessons = catalog.filter(age_group=age_group, category_id=category_id, ids=ids)
+    categories = catalog.categories
 
     paginator = Paginator(lessons, 12)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    prefetch_images(page_obj)
 
     return render(request, "lessons/list.html", {
         "page_obj": page_obj,
         "categories": categories,
         "selected_category": int(category_id) if category_id else None,
         "age_group": age_group,
-        "lessons_count": lessons.count(),
+        "lessons_count": len(lessons),
         "query": query,
-        "lang": lang,
     })
 
 
+@cached_page(lambda request, pk: f"lesson:{pk}", "lesson-categories", "quizzes", "worksheets")
+@replica_reads
 def lesson_detail(request, pk):
-    lang = request.GET.get("lang", "en")
     lesson = get_object_or_404(Lesson, pk=pk)
     blocks = lesson.blocks.all() 
 
@@ -71,116 +78,112 @@ def lesson_detail(request, pk):
         "lesson": lesson,
         "related_quizzes": related_quizzes,
         "related_worksheets": related_worksheets,
-        "lang": lang,
         "blocks": blocks,
     })
 
 
+@method_decorator(replica_reads, name="get")
+@method_decorator(etag(lesson_list_etag), name="get")
 class LessonListAPIView(generics.ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = LessonSerializer
 
     def get_queryset(self):
-        qs = (
-            Lesson.objects
-            .select_related("category")
-            .prefetch_related("blocks")
-            .order_by("category__order", "order", "created_at")
-        )
-
+        # rows come from the in-memory catalog snapshot, not the database
         age_group = self.request.query_params.get("age_group")
         category_id = self.request.query_params.get("category")
         q = self.request.query_params.get("q")
 
-        if age_group:
-            qs = qs.filter(age_group=age_group)
-
-        if category_id:
-            qs = qs.filter(category_id=category_id)
+        if category_id and not category_id.isdigit():
+            return ()
 
-        if q:
-            # Simple search (EN title). If you want multilingual search like your search_view, tell me.
-            qs = qs.filter(title__icontains=q)
+        # ranked search over all lesson languages
+        ids = search_ids("lesson", q) if q else None
+        return get_catalog().filter(age_group=age_group, category_id=category_id, ids=ids)
 
-        return qs
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            prefetch_images(args[0])
+        return super().get_serializer(*args, **kwargs)
 
 
+@method_decorator(replica_reads, name="get")
+@method_decorator(etag(lesson_detail_etag), name="get")
 class LessonDetailAPIView(generics.RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = LessonSerializer
-    queryset = Lesson.objects.select_related("category").prefetch_related("blocks")
+    queryset = Lesson.objects.with_block_counts().select_related("category").prefetch_related("blocks")
+
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            prefetch_images([args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+@require_safe
+def lesson_bundle(request, pk):
+    """
+    Streams an offline bundle of a lesson (see lessons/bundle.py).
+    ?archive=zip|tar, ?since=<version> for a delta since an earlier bundle.
+    """
+    archive = request.GET.get("archive", "zip")
+    if archive not in ARCHIVES:
+        return HttpResponseBadRequest(f"archive must be one of: {', '.join(ARCHIVES)}")
+    lesson = get_object_or_404(Lesson, pk=pk)
+    version, base, entries = plan_bundle(lesson, since=request.GET.get("since"))
+
+    response = StreamingHttpResponse(stream_bundle(entries, archive), content_type=ARCHIVES[archive])
+    filename = f"lesson-{lesson.pk}-{version[:12]}{'-delta' if base else ''}.{archive}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Bundle-Version"] = version
+    return response
 
+SEARCH_PREVIEW_SIZE = 6
+
+
+@replica_reads
 def search_view(request):
-    lang = request.GET.get("lang", "en")
     query = request.GET.get("q", "").strip()
     age_group = request.GET.get("age_group", "")
 
-    # default empty QuerySets
-    lessons = Lesson.objects.none()
-    worksheets = Worksheet.objects.none()
-    quizzes = Quiz.objects.none()
-
-    if query:
-        # 🔹 search in ALL lesson language fields
-        lessons = Lesson.objects.filter(
-            Q(title__icontains=query) |
-            Q(title_sr__icontains=query) |
-            Q(title_de__icontains=query) |
-            Q(description__icontains=query) |
-            Q(description_sr__icontains=query) |
-            Q(description_de__icontains=query)
-        )
-
-        # 🔹 keep worksheets & quizzes simple for now (EN fields only)
-        worksheets = Worksheet.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
-        quizzes = Quiz.objects.filter(title__icontains=query)
-
-    # 🔹 age filters
-    if age_group:
-        lessons = lessons.filter(age_group=age_group)
-        worksheets = worksheets.filter(age_group=age_group) if hasattr(Worksheet, "age_group") else worksheets
-        quizzes = quizzes.filter(age_group=age_group) if hasattr(Quiz, "age_group") else quizzes
+    # 🔹 ranked full-text search over all languages (see search app), counted on the index
+    results = {}
+    for name, model in [("lessons", Lesson), ("quizzes", Quiz), ("worksheets", Worksheet)]:
+        preview, count = [], 0
+        if query:
+            filters = {"age_group": age_group} if age_group and hasattr(model, "age_group") else {}
+            ids = ranked_hits(model.objects.all(), query, **filters)
+            # the cards are cached under the objects' content versions, load them from the primary
+            with primary_reads():
+                objects = model.objects.in_bulk(ids[:SEARCH_PREVIEW_SIZE])
+            preview, count = [objects[pk] for pk in ids[:SEARCH_PREVIEW_SIZE] if pk in objects], len(ids)
+            prefetch_images(preview, "cover_image" if model is Quiz else "image")
+        results[f"{name}_preview"], results[f"{name}_count"] = preview, count
 
     context = {
-        "lang": lang,
         "query": query,
         "age_group": age_group,
-        "lessons_preview": lessons[:6],
-        "lessons_count": lessons.count(),
-        "quizzes_preview": quizzes[:6],
-        "quizzes_count": quizzes.count(),
-        "worksheets_preview": worksheets[:6],
-        "worksheets_count": worksheets.count(),
+        **results,
         "disable_lang_switcher": True,
     }
     return render(request, "search/results.html", context)
 
 def lessons_show_all(request):
-    lang = request.GET.get("lang", "en")
     query = request.GET.get("q")
     age_group = request.GET.get("age_group")
-    lessons = Lesson.objects.all()
-
-    if query:
-        lessons = lessons.filter(title__icontains=query)
-
-    if age_group:
-        lessons = lessons.filter(age_group=age_group)
+    ids = search_ids("lesson", query) if query else None
+    lessons = get_catalog().filter(age_group=age_group, ids=ids)
+    prefetch_images(lessons)
 
     return render(request, "lessons/lessons_show_all.html", {
         "lessons": lessons,
         "query": query,
         "age_group": age_group,
-        "lang": lang,
         "disable_lang_switcher": True, 
     })
 
 
 
 def worksheets_show_all(request):
-    lang = request.GET.get("lang", "en")
     query = request.GET.get("q", "")
     age_group = request.GET.get("age_group", "")
 
@@ -188,14 +191,14 @@ def worksheets_show_all(request):
 
     # 🔍 Text search
     if query:
-        worksheets = worksheets.filter(title__icontains=query)
+        worksheets = ranked_queryset(worksheets, query)
 
     # 👶 Age filter (if you add age groups later)
     if age_group:
         worksheets = worksheets.filter(age_group=age_group)
 
+    prefetch_images(worksheets)
     context = {
-        "lang": lang,
         "worksheets": worksheets,
         "query": query,
         "age_group": age_group,
@@ -208,7 +211,7 @@ def worksheets_show_all(request):
 
 
 def contact(request):
-    lang = request.GET.get("lang", "en")
+    lang = request.lang
 
     if request.method == "POST":
         name = request.POST.get("name")
@@ -234,4 +237,4 @@ def contact(request):
             else:
                 messages.error(request, "⚠️ Please fill in all fields before submitting.")
 
-    return render(request, "contact.html", {"lang": lang})
\ No newline at end of file
+    return render(request, "contact.html")
\ No newline at end of file
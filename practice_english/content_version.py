@@ -0,0 +1,105 @@
+# practice_english/content_version.py
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+
+VERSION_KEY = "content-version:{name}"
+CHANGED_KEY = "content-version:changed-at"
+
+
+def get_cache_alias():
+    return getattr(settings, "CONTENT_VERSION_CACHE_ALIAS", "default")
+
+
+def get_cache():
+    return caches[get_cache_alias()]
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_versions(app_configs, **kwargs):
+    """
+    Version tokens kept in one process's memory are never seen by the other
+    workers, which then keep serving what they cached before a change.
+    """
+    alias = get_cache_alias()
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if getattr(settings, "WEB_WORKERS", 1) > 1 and backend.endswith("LocMemCache"):
+        return [checks.Warning(
+            f"Content versions are kept in the local memory cache {alias!r} with {settings.WEB_WORKERS} workers.",
+            hint="Use a cache shared by the workers (FileBasedCache, DatabaseCache, Redis) "
+                 "for CONTENT_VERSION_CACHE_ALIAS, e.g. unset DJANGO_CACHE=locmem.",
+            id="practice_english.W001",
+        )]
+    return []
+
+
+def get_version(name):
+    """
+    Returns the current version token of a piece of content, e.g. "quiz:42".
+
+    Versions are random tokens rather than counters, so a version lost to
+    eviction can never collide with anything cached under an older version.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(*names):
+    """
+    Same as get_version() for several names, with a single cache round-trip.
+    """
+    cache = get_cache()
+    keys = {name: VERSION_KEY.format(name=name) for name in names}
+    found = cache.get_many(keys.values())
+    return [found.get(keys[name]) or get_version(name) for name in names]
+
+
+def bump_version(*names):
+    """
+    Moves every named piece of content to a new version, returns the new tokens.
+    """
+    versions = {name: uuid.uuid4().hex for name in names}
+    get_cache().set_many(
+        {**{VERSION_KEY.format(name=name): version for name, version in versions.items()}, CHANGED_KEY: time.time()},
+        timeout=None,
+    )
+    return versions
+
+
+def last_change():
+    """
+    Timestamp of the last bump_version(). A timestamp the cache lost counts
+    as a change made just now.
+    """
+    cache = get_cache()
+    changed = cache.get(CHANGED_KEY)
+    if changed is None:
+        changed = time.time()
+        if not cache.add(CHANGED_KEY, changed, timeout=None):
+            changed = cache.get(CHANGED_KEY, changed)
+    return changed
+
+
+def fingerprint(*parts):
+    """
+    Short stable hash of the given parts, used for cache keys and ETags.
+    """
+    return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def request_origin(request):
+    """
+    Scheme + host of the request; serialized payloads embed absolute media URLs.
+    """
+    return request.build_absolute_uri("/")
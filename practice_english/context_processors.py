@@ -1,19 +1,10 @@
 # practice_english/context_processors.py
-from django.conf import settings
+from .middleware import resolve_language
+
 
 def active_language(request):
     """
-    Reads ?lang= from URL, falls back to session, defaults to 'en'.
-    Makes `lang` available in all templates.
+    Makes `lang` available in all templates, as resolved by LanguageMiddleware.
     """
-    supported = {code for code, _ in getattr(settings, "LANGUAGES", [("en", "English")])}
-
-    lang = request.GET.get("lang") or request.session.get("lang") or "en"
-
-    if lang not in supported:
-        lang = "en"
-
-    # remember choice in session
-    request.session["lang"] = lang
-
+    lang = getattr(request, "lang", None) or resolve_language(request)
     return {"lang": lang}
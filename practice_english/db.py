@@ -0,0 +1,79 @@
+# practice_english/db.py
+"""
+Database profiles, picked by settings from the DJANGO_DB environment variable.
+
+SQLite (the default) is tuned for several gunicorn workers on one machine:
+WAL lets readers carry on while a write is committing, and write
+transactions take the lock up front and wait for it instead of failing.
+PostgreSQL keeps connections open between requests and checks them before
+reuse.
+"""
+import os
+
+
+# run on every new SQLite connection (Django's OPTIONS["init_command"])
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",             # readers don't wait for writers
+    "synchronous": "NORMAL",           # fsync at checkpoints only, durable enough with WAL
+    "mmap_size": 128 * 1024 * 1024,    # read pages straight from the OS page cache
+    "cache_size": -20000,              # 20 MB page cache per connection
+    "temp_store": "MEMORY",
+}
+SQLITE_BUSY_TIMEOUT = 20  # seconds a writer waits for the lock before "database is locked"
+
+
+def conn_max_age():
+    return int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 600))
+
+
+def sqlite_database(path, tuned=True):
+    """
+    Settings of a SQLite database, with the WAL profile unless `tuned` is False.
+    """
+    if not tuned:
+        return {"ENGINE": "django.db.backends.sqlite3", "NAME": path}
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "CONN_MAX_AGE": conn_max_age(),
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            # a transaction that reads then writes can't lose the race for the write lock halfway;
+            # it holds that lock from BEGIN, so keep atomic() blocks to short writes (no file work)
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
+
+
+def replica_database(primary):
+    """
+    Settings of the read replica of `primary`, None when there is none:
+    DJANGO_SQLITE_REPLICA_PATH (a copy kept in sync by sync_replica) for
+    SQLite, POSTGRES_REPLICA_HOST for PostgreSQL. Tests read the primary.
+    """
+    if "sqlite3" in primary["ENGINE"]:
+        path = os.environ.get("DJANGO_SQLITE_REPLICA_PATH")
+        replica = sqlite_database(path) if path else None
+    else:
+        host = os.environ.get("POSTGRES_REPLICA_HOST")
+        replica = {**primary, "HOST": host, "PORT": os.environ.get("POSTGRES_REPLICA_PORT", primary["PORT"])} if host else None
+    if replica:
+        replica["TEST"] = {"MIRROR": "default"}
+    return replica
+
+
+def postgres_database():
+    """
+    Settings of the PostgreSQL database described by the POSTGRES_* variables (needs psycopg).
+    """
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "kidslearning"),
+        "USER": os.environ.get("POSTGRES_USER", "kidslearning"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": conn_max_age(),
+        "CONN_HEALTH_CHECKS": True,
+    }
@@ -0,0 +1,39 @@
+# practice_english/middleware.py
+from django.conf import settings
+
+
+def supported_languages():
+    return {code for code, _ in getattr(settings, "LANGUAGES", [("en", "English")])}
+
+
+def resolve_language(request):
+    """
+    ?lang= from the URL, else the remembered choice (LANG_COOKIE_NAME cookie), else "en".
+    """
+    supported = supported_languages()
+    for lang in (request.GET.get("lang"), request.COOKIES.get(settings.LANG_COOKIE_NAME)):
+        if lang in supported:
+            return lang
+    return "en"
+
+
+class LanguageMiddleware:
+    """
+    Resolves the visitor's language once per request as `request.lang`.
+
+    The choice is remembered in a cookie, set only when ?lang= changes it,
+    so page views never touch the session table.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.lang = resolve_language(request)
+        response = self.get_response(request)
+        if request.lang != request.COOKIES.get(settings.LANG_COOKIE_NAME) and "lang" in request.GET:
+            response.set_cookie(
+                settings.LANG_COOKIE_NAME, request.lang,
+                max_age=settings.LANG_COOKIE_AGE, samesite="Lax",
+            )
+        return response
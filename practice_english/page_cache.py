@@ -0,0 +1,117 @@
+# practice_english/page_cache.py
+"""
+Whole-page cache for anonymous HTML pages.
+
+Views opt in with @cached_page(*tags), naming the content versions
+(practice_english.content_version) the page renders, e.g. "lessons" or
+"blog:<slug>". PageCacheMiddleware keys each page on its path, language,
+query string and the current tokens of those versions. Model signals bump
+the versions on every change, so an edit moves the affected pages to new
+keys; PAGE_CACHE_TIMEOUT only bounds how long orphaned entries linger.
+Every page also depends on "pages", bump it to drop them all (e.g. after a
+deploy that changed templates).
+
+Only anonymous GET/HEAD requests without a session or pending messages are
+served from or stored in the cache, and only 200 responses that set no
+cookies are stored. The CSRF token of cached forms is replaced with a fresh
+one for every visitor.
+"""
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .content_version import fingerprint, get_versions
+
+
+CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b"__page_cache_csrf_token__"
+
+
+def cached_page(*tags):
+    """
+    Caches the view's anonymous pages until one of `tags` changes. Tags are
+    version names or callables taking the view's arguments, e.g.
+    @cached_page("blog", lambda request, slug: f"blog:{slug}")
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return view(*args, **kwargs)
+        wrapper.page_cache_tags = tags
+        return wrapper
+    return decorator
+
+
+def page_tags(tags, request, args, kwargs):
+    names = ["pages"]
+    for tag in tags:
+        names.append(tag(request, *args, **kwargs) if callable(tag) else tag)
+    return names
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def is_cacheable_response(request, response):
+    # cookies and session writes belong to one visitor
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.session.modified
+    )
+
+
+class PageCacheMiddleware:
+    """
+    Serves and stores the pages of views marked with @cached_page. Goes
+    after CsrfViewMiddleware, which sets the cookie of the fresh CSRF token.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, "page_cache_key", None)
+        if key and is_cacheable_response(request, response):
+            headers = {name: value for name, value in response.items()}
+            content = CSRF_INPUT.sub(rb"\g<1>" + CSRF_PLACEHOLDER + rb"\g<2>", response.content)
+            get_cache().set(key, (content, headers), settings.PAGE_CACHE_TIMEOUT)
+            response["X-Page-Cache"] = "miss"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        tags = getattr(view_func, "page_cache_tags", None)
+        if tags is None or not is_cacheable_request(request):
+            return None
+
+        versions = get_versions(*page_tags(tags, request, view_args, view_kwargs))
+        # ?lang= and the language cookie render the same page
+        query = sorted((name, values) for name, values in request.GET.lists() if name != "lang")
+        key = "page:" + fingerprint(request.path, request.lang, query, *versions)
+        cached = get_cache().get(key)
+        if cached is None:
+            request.page_cache_key = key
+            return None
+
+        content, headers = cached
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+        response = HttpResponse(content, headers=headers)
+        response["X-Page-Cache"] = "hit"
+        return response
@@ -0,0 +1,145 @@
+# practice_english/replicas.py
+"""
+Read replica routing for the public catalog.
+
+Views marked with @replica_reads (the catalog pages, the lesson and quiz
+API GETs, blog pages, search) run their queries on the DATABASE_REPLICA
+alias when they serve a safe request of an anonymous visitor. Everything
+else reads from the primary, and writes always go to the primary:
+
+- signed-in users (admin and staff sessions) read their own writes;
+- a visitor who just wrote something (POST, PUT, ...) is pinned to the
+  primary for REPLICA_PIN_SECONDS by ReplicaPinMiddleware, which covers
+  the redirect after a form and the replica's lag.
+
+Content versions are bumped on the primary as soon as something changes,
+while the replica may still hold the old rows, and pages, fragments and
+ETags rendered from those rows would be kept under the new version. So
+the replica is only used while it holds every change behind the current
+versions (replica_is_current()): no change for REPLICA_MAX_LAG seconds
+with a streaming replica, or none since the last sync_replica copy of a
+SQLite one. Payload builds, catalog and translation snapshots and the
+search index, kept for a whole version, always run under primary_reads().
+"""
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+from .content_version import get_cache, last_change
+
+
+REPLICA_PIN_COOKIE = "db_primary"
+REPLICA_SYNCED_KEY = "replica:synced-at"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_is_current():
+    """
+    Whether the replica holds every change behind the current content versions.
+    """
+    changed = last_change()
+    synced = get_cache().get(REPLICA_SYNCED_KEY)
+    if synced is not None:
+        # a SQLite replica has everything committed before its last copy started
+        return changed < synced
+    return time.time() - changed > settings.REPLICA_MAX_LAG
+
+
+def can_use_replica(request):
+    return (
+        bool(settings.DATABASE_REPLICA)
+        and request.method in ("GET", "HEAD", "OPTIONS")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and REPLICA_PIN_COOKIE not in request.COOKIES
+        and replica_is_current()
+    )
+
+
+def replica_reads(view):
+    """
+    Runs the view's queries on the replica when the request allows it. For
+    class-based views: @method_decorator(replica_reads, name="get")
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not can_use_replica(request):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """
+    Reads inside the block go to the primary, also usable as a decorator.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return settings.DATABASE_REPLICA if _use_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        # objects read from the replica are saved to the primary
+        instance = hints.get("instance")
+        if instance is not None and settings.DATABASE_REPLICA and instance._state.db == settings.DATABASE_REPLICA:
+            return "default"
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica gets its schema with the data
+        return False if db == settings.DATABASE_REPLICA else None
+
+
+def copy_sqlite_database(source, target):
+    """
+    Copies SQLite database `source` over `target` with the online backup API,
+    a consistent snapshot even while the primary is being written to.
+    """
+    with closing(sqlite3.connect(source, uri=True)) as primary, closing(sqlite3.connect(target, uri=True)) as replica:
+        primary.backup(replica)
+
+
+def sync_sqlite_replica(source, target):
+    """
+    Copies the primary over the replica and records when the copy started,
+    see replica_is_current().
+    """
+    started = time.time()
+    copy_sqlite_database(source, target)
+    get_cache().set(REPLICA_SYNCED_KEY, started, timeout=None)
+
+
+class ReplicaPinMiddleware:
+    """
+    Keeps a visitor's reads on the primary for a while after they write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if settings.DATABASE_REPLICA and request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, samesite="Lax", httponly=True,
+            )
+        return response
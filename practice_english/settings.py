@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from .db import postgres_database, replica_database, sqlite_database
+
 FRONTEND_URL = os.environ.get("FRONTEND_URL")
 
 CORS_ALLOWED_ORIGINS = []
@@ -27,6 +29,9 @@ LANGUAGES = [
     ("sr", "Serbian"),
     ("de", "German"),
 ]
+# remembers the visitor's ?lang= choice, see practice_english/middleware.py
+LANG_COOKIE_NAME = "lang"
+LANG_COOKIE_AGE = 60 * 60 * 24 * 365
 
 # SECURITY WARNING: keep the secret key used in production secret!
 # Buyers should change this value in their own environment.
@@ -51,15 +56,21 @@ INSTALLED_APPS = [
     "subscriptions",
     "corsheaders",
     "blog",
+    "search",
+    "assets",
+    "translations",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "practice_english.middleware.LanguageMiddleware",
+    "practice_english.replicas.ReplicaPinMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
+    "practice_english.page_cache.PageCacheMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -89,13 +100,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "practice_english.wsgi.application"
 
-# Database: local SQLite, perfect for a sellable script
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Database: local SQLite with the WAL profile, DJANGO_DB=postgres for PostgreSQL (see practice_english/db.py)
+if os.environ.get("DJANGO_DB") == "postgres":
+    DATABASES = {"default": postgres_database()}
+else:
+    DATABASES = {"default": sqlite_database(os.environ.get("DJANGO_SQLITE_PATH", BASE_DIR / "db.sqlite3"))}
+
+# Optional read replica for the public catalog, see practice_english/replicas.py
+replica = replica_database(DATABASES["default"])
+if replica:
+    DATABASES["replica"] = replica
+DATABASE_REPLICA = "replica" if "replica" in DATABASES else None
+DATABASE_ROUTERS = ["practice_english.replicas.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 10  # a visitor's reads stay on the primary this long after they write
+REPLICA_MAX_LAG = 10  # seconds a streaming replica may lag, it serves no reads this long after any change
+
+# Cache: files under BASE_DIR / "cache", shared by every gunicorn worker. The content version
+# tokens (practice_english/content_version.py) must be shared, or a change saved in one worker
+# never reaches the others' caches. DJANGO_CACHE=locmem keeps it per process, for a single
+# worker. Tests run on an empty local memory cache (TEST_RUNNER).
+if os.environ.get("DJANGO_CACHE") == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("DJANGO_CACHE_DIR", BASE_DIR / "cache"),
+        }
+    }
+CONTENT_VERSION_CACHE_ALIAS = "default"
+WEB_WORKERS = int(os.environ.get("WEB_CONCURRENCY") or 1)  # gunicorn's worker count, for the cache check
+TEST_RUNNER = "practice_english.test_runner.TestRunner"
+
+# Serialized quiz payloads, invalidated by signals whenever quiz content changes
+QUIZ_CACHE_ALIAS = "default"
+QUIZ_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Whole pages of anonymous visitors, invalidated by content versions (see practice_english/page_cache.py)
+PAGE_CACHE_ALIAS = "default"
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Quiz attempt ingestion, see quizzes/ingest.py for the durability trade-offs
+QUIZ_ATTEMPT_BULK_LIMIT = 500
+QUIZ_ATTEMPT_BUFFER_ENABLED = os.environ.get("QUIZ_ATTEMPT_BUFFER") == "1"
+QUIZ_ATTEMPT_BUFFER_SIZE = 100
+QUIZ_ATTEMPT_BUFFER_DELAY = 1.0  # seconds
+
+# Search index: "auto" uses SQLite FTS5 when available, else the pure-Python index
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")
+SEARCH_RANKED_LIMIT = 200  # most hits a relevance-ordered queryset holds (search/index.py ranked_queryset)
+
+# Responsive image derivatives, see assets/images.py; add "avif" where Pillow supports it
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+IMAGE_DERIVATIVE_FORMATS = os.environ.get("IMAGE_DERIVATIVE_FORMATS", "webp").split(",")
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_DERIVATIVES_ON_UPLOAD = True
+
+# Background media processing, see assets/jobs.py; run `manage.py media_worker`
+# (or set MEDIA_JOBS_EAGER=1 to process uploads inside the saving request)
+MEDIA_JOBS_EAGER = os.environ.get("MEDIA_JOBS_EAGER") == "1"
+MEDIA_JOB_MAX_ATTEMPTS = 3
+MEDIA_JOB_TIMEOUT = 15 * 60  # seconds before a running job is considered abandoned
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+AUDIO_LOUDNESS_TARGET = -16  # LUFS
+AUDIO_SPRITE_BITRATE = "48k"  # mono MP3 sprites of audio quiz clips (assets/sprites.py)
+
+# HLS packaging of lesson videos (assets/hls.py): (height, video bitrate, audio bitrate)
+HLS_RENDITIONS = [
+    (360, 800_000, 96_000),
+    (540, 1_400_000, 128_000),
+    (720, 2_800_000, 128_000),
+]
+HLS_SEGMENT_SECONDS = 4
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -119,4 +200,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+STORAGES = {
+    # uploads are stored once per distinct content under blobs/, see assets/storage.py
+    "default": {"BACKEND": "assets.storage.ContentHashStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+# grace period before gc_media deletes an unused blob
+MEDIA_GC_GRACE_HOURS = 24
+
+# Serve MEDIA_URL from Django (range requests, conditional GET, see assets/views.py);
+# set MEDIA_SERVE=0 when a front-end web server serves MEDIA_ROOT instead
+MEDIA_SERVE = os.environ.get("MEDIA_SERVE", "1") == "1"
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# content-addressed names, cached for a year
+MEDIA_IMMUTABLE_PREFIXES = ("blobs/", "derivatives/", "normalized/", "hls/", "sprites/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
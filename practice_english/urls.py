@@ -1,26 +1,30 @@
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from assets.views import serve_media
 from lessons import views
 from lessons.views import index, check
 from django.views.generic import TemplateView
+from practice_english.page_cache import cached_page
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', index, name='index'),
-    path('about/', TemplateView.as_view(template_name="about.html"), name="about"),
+    path('about/', cached_page()(TemplateView.as_view(template_name="about.html")), name="about"),
     path('lessons/', include('lessons.urls')),
     path('resources/', include('resources.urls')),
     path('api/quizzes/', include('quizzes.urls')),
     path('resources/', include('resources.urls')),
     path('nested_admin/', include('nested_admin.urls')),
     path('api/', include('subscriptions.urls')),
+    path('api/search/', include('search.urls')),
     path('contact/', views.contact, name='contact'),
     path("check/", check, name="check"),
     path("blog/", include("blog.urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.*)$", serve_media, name="media"),
+    ]
\ No newline at end of file
@@ -4,6 +4,7 @@ import "./AudioQuizGame.css";
 import "../components/GiveUpButton.css";
 import { safePlay, safeRestart } from "../utils/sound";
 import { Link } from "react-router-dom";
+import { preloadQuizAssets } from "../utils/preload";
 
 function AudioQuizGame() {
     const { id } = useParams();
@@ -49,11 +50,15 @@ function AudioQuizGame() {
 
     // 🔊 Option audio (dynamic per option) — reuse one Audio instance
     const optionAudioRef = useRef(new Audio());
+    // end (seconds) of the sprite clip playing, if any
+    const clipEndRef = useRef(null);
 
     // ✅ Load quiz
     useEffect(() => {
         let isMounted = true;
 
+        preloadQuizAssets(buildApiUrl(`/quizzes/${ id }/assets/`));
+
         fetch(buildApiUrl(`/quizzes/${ id }/`))
             .then((res) => {
                 if (!res.ok) throw new Error(`HTTP ${ res.status }`);
@@ -78,6 +83,35 @@ function AudioQuizGame() {
         // eslint-disable-next-line react-hooks/exhaustive-deps
     }, [id]);
 
+    // ✅ Preload the quiz's audio sprite: every option clip in one file, one request
+    useEffect(() => {
+        const sprite = quiz?.audio_sprite;
+        if (!sprite?.url) return;
+
+        const a = optionAudioRef.current;
+        a.preload = "auto";
+        try {
+            a.src = absolutize(sprite.url);
+            a.load();
+        } catch { }
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [quiz]);
+
+    // Stop at the end of the sprite clip being played
+    useEffect(() => {
+        const a = optionAudioRef.current;
+        const stopAtClipEnd = () => {
+            if (clipEndRef.current !== null && a.currentTime >= clipEndRef.current) {
+                clipEndRef.current = null;
+                try {
+                    a.pause();
+                } catch { }
+            }
+        };
+        a.addEventListener("timeupdate", stopAtClipEnd);
+        return () => a.removeEventListener("timeupdate", stopAtClipEnd);
+    }, []);
+
     // Optional: preload local sounds (helps on mobile)
     useEffect(() => {
         [correctSound, wrongSound, finishSuccessSound, finishFailSound].forEach((ref) => {
@@ -164,11 +198,46 @@ function AudioQuizGame() {
 
     const question = questions[currentQuestionIndex];
 
-    const playOptionAudio = (audioFile) => {
-        const src = absolutize(audioFile);
+    const playSpriteClip = ([start, end]) => {
+        const a = optionAudioRef.current;
+        const src = absolutize(quiz.audio_sprite.url);
+
+        try {
+            a.pause();
+        } catch { }
+
+        if (a.src !== src) {
+            try {
+                a.src = src;
+                a.load();
+            } catch { }
+        }
+
+        const seekAndPlay = () => {
+            try {
+                a.currentTime = start;
+            } catch { }
+            clipEndRef.current = end;
+            safePlay(a);
+        };
+
+        // seeking needs the sprite's metadata
+        if (a.readyState >= 1) seekAndPlay();
+        else a.addEventListener("loadedmetadata", seekAndPlay, { once: true });
+    };
+
+    const playOptionAudio = (option) => {
+        const clip = quiz.audio_sprite?.clips?.[option.id];
+        if (clip) {
+            playSpriteClip(clip);
+            return;
+        }
+
+        const src = absolutize(option.audio_file);
         if (!src) return;
 
         const a = optionAudioRef.current;
+        clipEndRef.current = null;
 
         try {
             a.pause();
@@ -190,7 +259,7 @@ function AudioQuizGame() {
         setSelectedOption(option);
 
         // 🔊 play option audio
-        playOptionAudio(option.audio_file);
+        playOptionAudio(option);
     };
 
     const handleSubmit = () => {
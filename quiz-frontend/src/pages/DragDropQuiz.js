@@ -3,6 +3,7 @@ import { useParams } from "react-router-dom";
 import { DragDropContext, Droppable, Draggable } from "@hello-pangea/dnd";
 import "./DragDropQuiz.css";
 import { safePlay, safeRestart } from "../utils/sound";
+import { preloadQuizAssets } from "../utils/preload";
 
 function DragDropQuiz() {
     const { id } = useParams();
@@ -55,6 +56,7 @@ function DragDropQuiz() {
     // ✅ Load quiz
     useEffect(() => {
         const QUIZ_URL = buildApiUrl(`/quizzes/${ id }/`);
+        preloadQuizAssets(buildApiUrl(`/quizzes/${ id }/assets/`));
 
         fetch(QUIZ_URL)
             .then((res) => {
@@ -9,6 +9,7 @@ import {
 import "./MatchingGame.css";
 import "../components/GiveUpButton.css";
 import { safePlay, safeRestart } from "../utils/sound";
+import { preloadQuizAssets } from "../utils/preload";
 
 function MatchingGame() {
     const { id } = useParams();
@@ -70,6 +71,7 @@ function MatchingGame() {
     // ✅ Load quiz
     useEffect(() => {
         const QUIZ_URL = buildApiUrl(`/quizzes/${ id }/`);
+        preloadQuizAssets(buildApiUrl(`/quizzes/${ id }/assets/`));
 
         fetch(QUIZ_URL)
             .then((res) => {
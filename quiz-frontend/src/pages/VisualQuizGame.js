@@ -2,6 +2,7 @@ import React, { useEffect, useState, useRef } from "react";
 import { useParams } from "react-router-dom";
 import "./VisualQuizGame.css";
 import "../components/GiveUpButton.css";
+import { preloadQuizAssets } from "../utils/preload";
 
 function VisualQuizGame() {
     const { id } = useParams();
@@ -46,6 +47,8 @@ function VisualQuizGame() {
                 : `${ SITE_BASE }${ url.startsWith("/") ? "" : "/" }${ url }`;
 
     useEffect(() => {
+        preloadQuizAssets(buildApiUrl(`/quizzes/${ id }/assets/`));
+
         fetch(buildApiUrl(`/quizzes/visual-quiz/${ id }/`))
 
             .then((res) => {
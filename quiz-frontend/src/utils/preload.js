@@ -0,0 +1,26 @@
+// src/utils/preload.js
+// Hashes (URLs for assets not hashed yet) of assets already requested in this page session
+const preloaded = new Set();
+
+const preloadAsset = (asset) => {
+    const key = asset.hash || asset.url;
+    if (preloaded.has(key)) return;
+    preloaded.add(key);
+
+    if (asset.kind === "image") {
+        const img = new Image();
+        img.decoding = "async";
+        img.src = asset.url;
+        return;
+    }
+    // audio/video: warm the HTTP cache, the player requests the same URL later
+    fetch(asset.url, { mode: "no-cors" }).catch(() => preloaded.delete(key));
+};
+
+// Loads a quiz's asset manifest (GET /api/quizzes/<id>/assets/) and starts
+// fetching every asset in parallel, skipping the ones already preloaded.
+export const preloadQuizAssets = (manifestUrl) =>
+    fetch(manifestUrl)
+        .then((res) => (res.ok ? res.json() : { assets: [] }))
+        .then((manifest) => (manifest.assets || []).forEach(preloadAsset))
+        .catch(() => { });
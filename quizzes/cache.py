@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from practice_english.content_version import get_version, bump_version, fingerprint, request_origin
+from practice_english.replicas import primary_reads
+
+
+PAYLOAD_KEY = "quizzes:payload:{kind}:{pk}:{version}:{origin}"
+HITS_KEY = "quizzes:stats:hits"
+MISSES_KEY = "quizzes:stats:misses"
+
+
+def get_cache():
+    return caches[getattr(settings, "QUIZ_CACHE_ALIAS", "default")]
+
+
+def get_quiz_version(pk):
+    return get_version(f"quiz:{pk}")
+
+
+def bump_quiz_version(pk):
+    """
+    Invalidates every cached payload of a quiz by moving it to a new version.
+    """
+    bump_version(f"quiz:{pk}")
+
+
+def quiz_list_etag(request, *args, **kwargs):
+    return fingerprint(get_version("quizzes"), request_origin(request), request.GET.urlencode())
+
+
+def quiz_detail_etag(request, pk, *args, **kwargs):
+    return fingerprint(get_quiz_version(pk), request_origin(request))
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def cached_quiz_payload(request, kind, pk, build):
+    """
+    Returns the serialized payload `kind` of quiz `pk`, calling `build()` on a miss.
+
+    Payloads contain absolute media URLs, so the request origin is part of the key.
+    """
+    origin = fingerprint(request_origin(request))[:12]
+    key = PAYLOAD_KEY.format(kind=kind, pk=pk, version=get_quiz_version(pk), origin=origin)
+
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+
+    _count(MISSES_KEY)
+    with primary_reads():
+        data = build()
+    cache.set(key, data, timeout=getattr(settings, "QUIZ_CACHE_TIMEOUT", 60 * 60 * 24))
+    return data
+
+
+def quiz_cache_stats():
+    """
+    Returns the payload cache hit/miss counters.
+    """
+    cache = get_cache()
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+def reset_quiz_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
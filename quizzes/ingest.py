@@ -0,0 +1,140 @@
+"""
+Batched quiz attempt ingestion.
+
+Every attempt write goes through write_attempts(), which inserts a whole batch
+with one bulk_create() inside one transaction, so SQLite takes the write lock
+once per batch instead of once per attempt.
+
+Single submissions can optionally go through a write-behind buffer
+(QUIZ_ATTEMPT_BUFFER_ENABLED). Durability of buffered attempts:
+
+- an attempt is durable once its batch is flushed, i.e. when the buffer holds
+  QUIZ_ATTEMPT_BUFFER_SIZE attempts or QUIZ_ATTEMPT_BUFFER_DELAY seconds after
+  the first attempt of the batch arrived, whichever comes first;
+- the buffer is flushed on normal interpreter exit (gunicorn graceful restart),
+  but attempts still buffered when a worker is killed or crashes are lost;
+- each worker process has its own buffer, so this bounds the loss to one
+  batch per worker;
+- a batch whose write fails is logged and put back in the buffer, and
+  retried by the next flush (at the latest `QUIZ_ATTEMPT_BUFFER_DELAY` later).
+
+Clients get 202 Accepted for buffered submissions. Use the bulk endpoint or
+leave the buffer disabled where every attempt must be acknowledged as stored.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import QuizAttempt
+from .stats import record_attempt_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_attempts(attempts):
+    """
+    Inserts a batch of unsaved QuizAttempt instances and updates the score
+    rollups, all in a single transaction.
+    """
+    if not attempts:
+        return []
+    with transaction.atomic():
+        attempts = QuizAttempt.objects.bulk_create(attempts)
+        record_attempt_stats(attempts)
+    return attempts
+
+
+class AttemptBuffer:
+    """
+    Coalesces single attempts into write_attempts() batches.
+
+    A batch is flushed by the request that fills it, or by a timer thread
+    `max_delay` seconds after its first attempt arrived.
+    """
+
+    def __init__(self, max_size=100, max_delay=1.0):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, attempt):
+        with self._lock:
+            self._pending.append(attempt)
+            if len(self._pending) >= self.max_size:
+                batch = self._take()
+            else:
+                batch = None
+                self._schedule()
+        if batch:
+            try:
+                self._write(batch)
+            except Exception:
+                pass  # logged and kept for the next flush by _write()
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        return self._write(batch)
+
+    def _write(self, batch):
+        try:
+            return write_attempts(batch)
+        except Exception:
+            # these attempts were acknowledged already, never drop them
+            logger.exception("Writing %d buffered quiz attempts failed, retrying", len(batch))
+            with self._lock:
+                self._pending[:0] = batch
+                self._schedule()
+            raise
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            pass  # logged and rescheduled by _write()
+        finally:
+            # timer threads get their own connection, don't leak it
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_attempt_buffer():
+    """
+    Returns the process-wide attempt buffer, or None if buffering is disabled.
+    """
+    global _buffer
+    if not getattr(settings, "QUIZ_ATTEMPT_BUFFER_ENABLED", False):
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = AttemptBuffer(
+                max_size=getattr(settings, "QUIZ_ATTEMPT_BUFFER_SIZE", 100),
+                max_delay=getattr(settings, "QUIZ_ATTEMPT_BUFFER_DELAY", 1.0),
+            )
+            atexit.register(_buffer.flush)
+    return _buffer
@@ -0,0 +1,68 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from quizzes import ingest
+from quizzes.models import Quiz, QuizAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures quiz attempt ingestion (attempts/second) through the API: one POST per "
+        "attempt, the write-behind buffer and the bulk endpoint. Uses a temporary quiz in "
+        "the configured database and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        total = options["attempts"]
+        batch_size = options["batch_size"]
+        quiz = Quiz.objects.create(title="Benchmark quiz", quiz_type="multiple_choice", difficulty="easy")
+        client = Client()
+        payload = [{"quiz": quiz.pk, "score": i % 11} for i in range(total)]
+
+        try:
+            self.report("single POST /submit/", total, lambda: self.post_singles(client, payload))
+
+            with override_settings(
+                QUIZ_ATTEMPT_BUFFER_ENABLED=True,
+                QUIZ_ATTEMPT_BUFFER_SIZE=batch_size,
+                QUIZ_ATTEMPT_BUFFER_DELAY=60,
+            ):
+                ingest._buffer = None
+
+                def buffered():
+                    self.post_singles(client, payload)
+                    ingest.get_attempt_buffer().flush()
+
+                self.report(f"buffered POST /submit/ (batch {batch_size})", total, buffered)
+                ingest._buffer = None
+
+            def bulk():
+                url = reverse("submit-quiz-bulk")
+                for start in range(0, total, batch_size):
+                    client.post(url, json.dumps(payload[start:start + batch_size]), content_type="application/json")
+
+            self.report(f"POST /submit/bulk/ (batch {batch_size})", total, bulk)
+
+            stored = QuizAttempt.objects.filter(quiz=quiz).count()
+            self.stdout.write(f"stored {stored} of {3 * total} attempts")
+        finally:
+            quiz.delete()
+
+    def post_singles(self, client, payload):
+        url = reverse("submit-quiz")
+        for data in payload:
+            client.post(url, json.dumps(data), content_type="application/json")
+
+    def report(self, label, total, run):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<40} {total / elapsed:10.0f} attempts/s ({elapsed:.2f}s)")
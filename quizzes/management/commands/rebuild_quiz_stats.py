@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.stats import rebuild_quiz_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-quiz and per-day score rollups from raw quiz attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        read = rebuild_quiz_stats(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt quiz statistics from {read} attempts."))
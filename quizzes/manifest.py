@@ -0,0 +1,67 @@
+import mimetypes
+
+from django.core.files.storage import default_storage
+
+from assets.jobs import enqueue
+from assets.media_fields import MEDIA_FIELDS
+from assets.models import MediaFile
+from .models import AudioQuizOption
+from .prefetch import prefetch_quiz, quiz_objects
+
+
+def quiz_media(quiz, sprite_clips=True):
+    """
+    (kind, storage name) of every file the quiz payload references, found by
+    walking the relations prefetched for its type (quizzes.prefetch). Unless
+    `sprite_clips` is set, option clips the audio sprite covers are left out.
+    """
+    covered = set() if sprite_clips or not quiz.audio_sprite else set(quiz.audio_sprite_map)
+    media = {}
+    for obj in quiz_objects(prefetch_quiz(quiz, images=False)):
+        if isinstance(obj, AudioQuizOption) and str(obj.pk) in covered:
+            continue
+        for field, kind in MEDIA_FIELDS.get(type(obj), {}).items():
+            name = getattr(obj, field).name
+            if name:
+                media.setdefault(name, kind)
+    if quiz.audio_sprite:
+        media[quiz.audio_sprite] = "audio"
+    return [(kind, name) for name, kind in media.items()]
+
+
+def quiz_asset_manifest(quiz, request):
+    """
+    Every media asset of a quiz with its size and sha256 content hash, so
+    clients can preload them in parallel and skip the ones they already have.
+    Clips played from the quiz's audio sprite are left out, the sprite covers them.
+
+    Hashes come from MediaFile. Files the media jobs have not hashed yet get
+    a queued checksum job and a null hash until it has run (the job moves the
+    quiz version). Files missing from storage are left out.
+    """
+    media = quiz_media(quiz, sprite_clips=False)
+    known = MediaFile.objects.filter(name__in=[name for _, name in media]).in_bulk(field_name="name")
+
+    assets = []
+    for kind, name in media:
+        media_file = known.get(name)
+        if media_file is not None:
+            size, checksum = media_file.size, media_file.checksum
+        elif default_storage.exists(name):
+            size, checksum = default_storage.size(name), None
+            enqueue("checksum", name, eager=False)
+        else:
+            continue
+        url = default_storage.url(name)
+        assets.append({
+            "url": request.build_absolute_uri(url) if request else url,
+            "kind": kind,
+            "type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "size": size,
+            "hash": checksum,
+        })
+    return {
+        "id": quiz.pk,
+        "assets": assets,
+        "total_size": sum(asset["size"] for asset in assets),
+    }
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0023_remove_visualquizoption_text_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizScoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('min_score', models.IntegerField(blank=True, null=True)),
+                ('max_score', models.IntegerField(blank=True, null=True)),
+                ('histogram', models.JSONField(default=dict, help_text='Number of attempts per score')),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_stats', to='quizzes.quiz')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizDailyScoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('min_score', models.IntegerField(blank=True, null=True)),
+                ('max_score', models.IntegerField(blank=True, null=True)),
+                ('histogram', models.JSONField(default=dict, help_text='Number of attempts per score')),
+                ('day', models.DateField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_score_stats', to='quizzes.quiz')),
+            ],
+            options={
+                'ordering': ['quiz', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'day'), name='unique_quiz_daily_score_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0009_lessonblock_title_de_lessonblock_title_sr'),
+        ('quizzes', '0024_quizscorestats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['quiz_type', 'id'], name='quiz_type_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['difficulty', 'id'], name='quiz_difficulty_id_idx'),
+        ),
+    ]
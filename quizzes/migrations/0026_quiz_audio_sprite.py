@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0025_quiz_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='audio_sprite',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='audio_sprite_map',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text="[start, end] in seconds of each option's clip in the sprite, by option id"),
+        ),
+    ]
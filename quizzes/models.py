@@ -23,7 +23,19 @@ class Quiz(models.Model):
     ])
     created_at = models.DateTimeField(auto_now_add=True)
     cover_image = models.ImageField(upload_to='quiz_covers/', blank=True, null=True)
-    
+    # audio sprite of every AudioQuizOption clip, built by assets.sprites
+    audio_sprite = models.CharField(max_length=255, blank=True, editable=False)
+    audio_sprite_map = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="[start, end] in seconds of each option's clip in the sprite, by option id",
+    )
+
+    class Meta:
+        indexes = [
+            # catalog filters, scanned in -id (cursor) order
+            models.Index(fields=["quiz_type", "id"], name="quiz_type_id_idx"),
+            models.Index(fields=["difficulty", "id"], name="quiz_difficulty_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -119,4 +131,43 @@ class AudioQuizOption(models.Model):
     is_correct = models.BooleanField(default=False)
 
     def __str__(self):
-        return f"{self.text} ({'Correct' if self.is_correct else 'Wrong'})"
\ No newline at end of file
+        return f"{self.text} ({'Correct' if self.is_correct else 'Wrong'})"
+
+
+class ScoreStats(models.Model):
+    """
+    Incrementally maintained score rollup, see quizzes/stats.py.
+    """
+    attempt_count = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    min_score = models.IntegerField(null=True, blank=True)
+    max_score = models.IntegerField(null=True, blank=True)
+    histogram = models.JSONField(default=dict, help_text="Number of attempts per score")
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.attempt_count if self.attempt_count else None
+
+
+class QuizScoreStats(ScoreStats):
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name="score_stats")
+
+    def __str__(self):
+        return f"Stats for {self.quiz.title}"
+
+
+class QuizDailyScoreStats(ScoreStats):
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="daily_score_stats")
+    day = models.DateField()
+
+    class Meta:
+        ordering = ["quiz", "day"]
+        constraints = [
+            models.UniqueConstraint(fields=["quiz", "day"], name="unique_quiz_daily_score_stats"),
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.quiz.title} on {self.day}"
@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the quiz id, so every page costs the same whatever its depth.
+
+    Only applied when the client asks for it with `cursor` or `page_size`;
+    without them the endpoint keeps returning the plain list the games expect.
+    """
+    ordering = "-id"
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,94 @@
+from django.db.models import Prefetch, prefetch_related_objects
+
+from assets.images import prefetch_image_info
+from assets.media_fields import IMAGE_FIELDS
+
+from .models import (
+    Question,
+    SortingPair,
+    MatchingGame,
+    VisualQuizQuestion,
+    AudioQuizQuestion,
+)
+
+
+# Every reverse relation the quiz serializers walk, with the model behind it
+QUIZ_RELATIONS = {
+    "questions": Question,
+    "sorting_pairs": SortingPair,
+    "matching_items": MatchingGame,
+    "visual_questions": VisualQuizQuestion,
+    "audio_questions": AudioQuizQuestion,
+}
+
+# Which relations hold the content of each quiz type (same split as QuizAdmin inlines)
+QUIZ_TYPE_RELATIONS = {
+    "multiple_choice": {"questions": ["questions__options"]},
+    "drag_drop": {"sorting_pairs": ["sorting_pairs"]},
+    "matching": {"matching_items": ["matching_items"]},
+    "visual": {"visual_questions": ["visual_questions__options"]},
+    "audio": {"audio_questions": ["audio_questions__options"]},
+}
+
+# The relations each serializer renders
+QUIZ_SERIALIZER_RELATIONS = ["questions", "sorting_pairs", "matching_items", "audio_questions"]
+VISUAL_QUIZ_SERIALIZER_RELATIONS = ["visual_questions"]
+
+
+def quiz_prefetch_plan(quiz_type, relations=QUIZ_RELATIONS):
+    """
+    Returns the prefetch lookups needed to walk `relations` (default: all)
+    of a quiz of `quiz_type`.
+
+    The relations that hold the content for this type are prefetched with
+    their children. Every other relation is prefetched with an empty queryset,
+    which never hits the database, so serializers that walk all relations
+    (QuizSerializer) still run in a fixed number of queries.
+    """
+    owned = QUIZ_TYPE_RELATIONS.get(quiz_type, {})
+    lookups = []
+    for relation in relations:
+        model = QUIZ_RELATIONS[relation]
+        if relation in owned:
+            lookups.extend(owned[relation])
+        else:
+            lookups.append(Prefetch(relation, queryset=model.objects.none()))
+    return lookups
+
+
+def walk(objects, path):
+    """
+    Yields `objects` and everything reached from them along a prefetch lookup
+    such as "visual_questions__options".
+    """
+    yield from objects
+    if path:
+        relation, _, rest = path.partition("__")
+        yield from walk([child for obj in objects for child in getattr(obj, relation).all()], rest)
+
+
+def quiz_objects(quiz, relations=QUIZ_RELATIONS):
+    """
+    The quiz and every prefetched object holding its content in `relations`.
+    """
+    objects = [quiz]
+    for relation, lookups in QUIZ_TYPE_RELATIONS.get(quiz.quiz_type, {}).items():
+        if relation in relations:
+            for lookup in lookups:
+                objects.extend(walk([quiz], lookup))
+    return objects
+
+
+def prefetch_quiz(quiz, images=True, relations=QUIZ_RELATIONS):
+    """
+    Prefetches the content of an already loaded quiz in `relations` (the
+    ones the caller's serializer renders) according to its type, and unless
+    `images` is False the image info (assets.images) of every image it shows.
+    """
+    prefetch_related_objects([quiz], *quiz_prefetch_plan(quiz.quiz_type, relations))
+    if images:
+        prefetch_image_info(
+            getattr(obj, field).name
+            for obj in quiz_objects(quiz, relations) for field in IMAGE_FIELDS.get(type(obj), ())
+        )
+    return quiz
@@ -1,18 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Quiz, Question, Option, QuizAttempt, SortingPair, VisualQuizOption, VisualQuizQuestion, MatchingGame, AudioQuizOption, AudioQuizQuestion
+
+from assets.serializers import ResponsiveImageField
+from .models import Quiz, Question, Option, QuizAttempt, QuizScoreStats, SortingPair, VisualQuizOption, VisualQuizQuestion, MatchingGame, AudioQuizOption, AudioQuizQuestion
 
 
 class QuizListSerializer(serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
+    cover_image_variants = ResponsiveImageField(source="cover_image")
+
+    # model columns behind fields that are named differently
+    SOURCE_FIELDS = {"cover_image_variants": "cover_image"}
 
     class Meta:
         model = Quiz
-        fields = ["id", "title", "quiz_type", "difficulty", "cover_image"]
+        fields = ["id", "title", "quiz_type", "difficulty", "cover_image", "cover_image_variants"]
+
+    def __init__(self, *args, **kwargs):
+        # sparse fieldsets: ?fields=id,title keeps only the listed columns
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def get_cover_image(self, obj):
         request = self.context.get("request")
         if obj.cover_image and hasattr(obj.cover_image, "url"):
-            return request.build_absolute_uri(obj.cover_image.url)
+            url = obj.cover_image.url
+            return request.build_absolute_uri(url) if request else url
         return None
 
 class OptionSerializer(serializers.ModelSerializer):
@@ -30,17 +47,19 @@ class QuestionSerializer(serializers.ModelSerializer):
 
 class MatchingGameSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ResponsiveImageField(source="image")
     masked_word = serializers.SerializerMethodField()
     correct_letter = serializers.SerializerMethodField()
 
     class Meta:
         model = MatchingGame
-        fields = ['id', 'image_url', 'masked_word', 'correct_letter', 'distractor1', 'distractor2']
+        fields = ['id', 'image_url', 'image_variants', 'masked_word', 'correct_letter', 'distractor1', 'distractor2']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url)
+            url = obj.image.url
+            return request.build_absolute_uri(url) if request else url
         return None
 
     def get_masked_word(self, obj):
@@ -68,11 +87,12 @@ class AudioQuizOptionSerializer(serializers.ModelSerializer):
 
 class AudioQuizQuestionSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_variants = ResponsiveImageField(source="image")
     options = AudioQuizOptionSerializer(many=True, read_only=True)
 
     class Meta:
         model = AudioQuizQuestion
-        fields = ["id", "image", "correct_answer", "options"]
+        fields = ["id", "image", "image_variants", "correct_answer", "options"]
 
     def get_image(self, obj):
         request = self.context.get("request")
@@ -88,19 +108,31 @@ class QuizSerializer(serializers.ModelSerializer):
     sorting_pairs = serializers.SerializerMethodField()
     matching_items = MatchingGameSerializer(many=True, read_only=True)
     cover_image = serializers.SerializerMethodField()
+    cover_image_variants = ResponsiveImageField(source="cover_image")
     audio_questions = AudioQuizQuestionSerializer(many=True, read_only=True)
+    audio_sprite = serializers.SerializerMethodField()
 
     class Meta:
         model = Quiz
-        fields = ['id', 'title', 'quiz_type', 'difficulty', 'questions', 'sorting_pairs', 'matching_items', 'cover_image', 'audio_questions',]
+        fields = ['id', 'title', 'quiz_type', 'difficulty', 'questions', 'sorting_pairs', 'matching_items', 'cover_image', 'cover_image_variants', 'audio_questions', 'audio_sprite',]
 
     def get_cover_image(self, obj):
         request = self.context.get('request')
         if obj.cover_image and hasattr(obj.cover_image, 'url'):
-            return request.build_absolute_uri(obj.cover_image.url)
+            url = obj.cover_image.url
+            return request.build_absolute_uri(url) if request else url
         return None
-    
-    
+
+    def get_audio_sprite(self, obj):
+        # one file with every option clip, "clips" maps option ids to [start, end] seconds
+        if not obj.audio_sprite:
+            return None
+        request = self.context.get('request')
+        url = default_storage.url(obj.audio_sprite)
+        return {
+            'url': request.build_absolute_uri(url) if request else url,
+            'clips': obj.audio_sprite_map,
+        }
 
     def get_sorting_pairs(self, obj):
         request = self.context.get('request')
@@ -113,19 +145,59 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         fields = ['id', 'quiz', 'user', 'score', 'submitted_at']
 
 
+class QuizScoreStatsSerializer(serializers.Serializer):
+    day = serializers.DateField(required=False)
+    attempt_count = serializers.IntegerField()
+    average_score = serializers.FloatField()
+    min_score = serializers.IntegerField()
+    max_score = serializers.IntegerField()
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
+class BulkQuizAttemptListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # check all referenced quizzes/users with one query each, not one per attempt
+        quiz_ids = {attempt["quiz"] for attempt in attrs}
+        user_ids = {attempt["user"] for attempt in attrs if attempt.get("user") is not None}
+        missing_quizzes = quiz_ids - set(Quiz.objects.filter(pk__in=quiz_ids).values_list("pk", flat=True))
+        missing_users = user_ids - set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        if missing_quizzes:
+            raise serializers.ValidationError(f"Unknown quiz ids: {sorted(missing_quizzes)}")
+        if missing_users:
+            raise serializers.ValidationError(f"Unknown user ids: {sorted(missing_users)}")
+        return attrs
+
+    def to_attempts(self):
+        return [
+            QuizAttempt(quiz_id=attempt["quiz"], user_id=attempt.get("user"), score=attempt["score"])
+            for attempt in self.validated_data
+        ]
+
+
+class BulkQuizAttemptSerializer(serializers.Serializer):
+    quiz = serializers.IntegerField()
+    user = serializers.IntegerField(required=False, allow_null=True)
+    score = serializers.IntegerField()
+
+    class Meta:
+        list_serializer_class = BulkQuizAttemptListSerializer
+
+
 
         
 class SortingPairSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ResponsiveImageField(source="image")
 
     class Meta:
         model = SortingPair
-        fields = ['id', 'item', 'label', 'image_url']
+        fields = ['id', 'item', 'label', 'image_url', 'image_variants']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url)
+            url = obj.image.url
+            return request.build_absolute_uri(url) if request else url
         return None
 
     
@@ -134,33 +206,42 @@ class SortingPairSerializer(serializers.ModelSerializer):
 
 class VisualQuizOptionSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ResponsiveImageField(source="image")
 
     class Meta:
         model = VisualQuizOption
-        fields = ["id", "image_url", "is_correct"]
+        fields = ["id", "image_url", "image_variants", "is_correct"]
 
     def get_image_url(self, obj):
         request = self.context.get("request")
-        return request.build_absolute_uri(obj.image.url) if obj.image else None
+        if not obj.image:
+            return None
+        url = obj.image.url
+        return request.build_absolute_uri(url) if request else url
 
 
 class VisualQuizQuestionSerializer(serializers.ModelSerializer):
     options = VisualQuizOptionSerializer(many=True, read_only=True)
     question_image_url = serializers.SerializerMethodField()
+    question_image_variants = ResponsiveImageField(source="question_image")
 
     class Meta:
         model = VisualQuizQuestion
-        fields = ["id", "question_text", "question_image_url", "options"]
+        fields = ["id", "question_text", "question_image_url", "question_image_variants", "options"]
 
     def get_question_image_url(self, obj):
         request = self.context.get("request")
-        return request.build_absolute_uri(obj.question_image.url) if obj.question_image else None
+        if not obj.question_image:
+            return None
+        url = obj.question_image.url
+        return request.build_absolute_uri(url) if request else url
 
 
 class VisualQuizSerializer(serializers.ModelSerializer):
     questions = VisualQuizQuestionSerializer(many=True, read_only=True, source="visual_questions")
+    cover_image_variants = ResponsiveImageField(source="cover_image")
 
     class Meta:
         model = Quiz
-        fields = ["id", "title", "quiz_type", "difficulty", "cover_image", "questions"]
+        fields = ["id", "title", "quiz_type", "difficulty", "cover_image", "cover_image_variants", "questions"]
 
@@ -0,0 +1,52 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+
+from practice_english.content_version import bump_version
+from .cache import bump_quiz_version
+from .models import (
+    Quiz,
+    Question,
+    Option,
+    SortingPair,
+    MatchingGame,
+    VisualQuizQuestion,
+    VisualQuizOption,
+    AudioQuizQuestion,
+    AudioQuizOption,
+)
+
+
+# How to reach the owning quiz id from each piece of quiz content
+QUIZ_CONTENT_MODELS = {
+    Quiz: lambda obj: obj.pk,
+    Question: lambda obj: obj.quiz_id,
+    SortingPair: lambda obj: obj.quiz_id,
+    MatchingGame: lambda obj: obj.quiz_id,
+    VisualQuizQuestion: lambda obj: obj.quiz_id,
+    AudioQuizQuestion: lambda obj: obj.quiz_id,
+    Option: lambda obj: obj.question.quiz_id,
+    VisualQuizOption: lambda obj: obj.question.quiz_id,
+    AudioQuizOption: lambda obj: obj.question.quiz_id,
+}
+
+
+def quiz_id_for(instance):
+    try:
+        return QUIZ_CONTENT_MODELS[type(instance)](instance)
+    except ObjectDoesNotExist:
+        # parent already deleted in a cascade, the parent's own signal covers it
+        return None
+
+
+def quiz_content_changed(sender, instance, **kwargs):
+    quiz_id = quiz_id_for(instance)
+    if quiz_id is not None:
+        bump_quiz_version(quiz_id)
+    if sender is Quiz:
+        # the quiz catalog only shows Quiz fields
+        bump_version("quizzes")
+
+
+for model in QUIZ_CONTENT_MODELS:
+    post_save.connect(quiz_content_changed, sender=model, dispatch_uid=f"quiz_content_saved_{model.__name__}")
+    post_delete.connect(quiz_content_changed, sender=model, dispatch_uid=f"quiz_content_deleted_{model.__name__}")
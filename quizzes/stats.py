@@ -0,0 +1,143 @@
+"""
+Per-quiz and per-quiz-per-day score rollups.
+
+Rollups are updated in the same transaction as the attempts they summarize
+(quizzes.ingest.write_attempts), so reading quiz statistics never scans the
+QuizAttempt table. `manage.py rebuild_quiz_stats` recomputes them from raw
+attempts if they ever drift (e.g. attempts edited or deleted by hand).
+
+Batches are added with a single UPDATE per row whose new values are computed
+by the database, so concurrent writers never overwrite each other's counts.
+"""
+from django.db import NotSupportedError, transaction
+from django.db.models import F, Func, JSONField, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import QuizScoreStats, QuizDailyScoreStats, QuizAttempt
+
+
+class ScoreBucket:
+    """
+    In-memory summary of a group of scores, merged into a ScoreStats row.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+
+    def add(self, score):
+        self.count += 1
+        self.total += score
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+        self.histogram[score] = self.histogram.get(score, 0) + 1
+
+
+def group_scores(rows):
+    """
+    Groups (quiz_id, score, submitted_at) rows into quiz and (quiz, day) buckets.
+    """
+    quizzes = {}
+    days = {}
+    for quiz_id, score, submitted_at in rows:
+        quizzes.setdefault(quiz_id, ScoreBucket()).add(score)
+        day = timezone.localdate(submitted_at) if timezone.is_aware(submitted_at) else submitted_at.date()
+        days.setdefault((quiz_id, day), ScoreBucket()).add(score)
+    return quizzes, days
+
+
+class HistogramAdd(Func):
+    """
+    The `histogram` JSON column with `counts` ({score: attempts}) added to it.
+    """
+    output_field = JSONField()
+
+    def __init__(self, expression, counts):
+        super().__init__(expression)
+        self.counts = counts
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"HistogramAdd is not implemented for {connection.vendor}")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.get_source_expressions()[0])
+        pairs, pair_params = [], []
+        for score, count in self.counts.items():
+            path = f'$."{score}"'
+            pairs.append(f"%s, COALESCE(json_extract({column}, %s), 0) + %s")
+            pair_params += [path, *params, path, count]
+        return f"json_set({column}, {', '.join(pairs)})", [*params, *pair_params]
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.get_source_expressions()[0])
+        pairs, pair_params = [], []
+        for score, count in self.counts.items():
+            pairs.append(f"%s::text, COALESCE(({column} ->> %s)::integer, 0) + %s")
+            pair_params += [str(score), *params, str(score), count]
+        return f"({column} || jsonb_build_object({', '.join(pairs)}))", [*params, *pair_params]
+
+
+def bucket_deltas(bucket):
+    """
+    update() arguments adding `bucket` to a ScoreStats row.
+    """
+    return {
+        "attempt_count": F("attempt_count") + bucket.count,
+        "score_sum": F("score_sum") + bucket.total,
+        "min_score": Least(Coalesce("min_score", Value(bucket.min)), Value(bucket.min)),
+        "max_score": Greatest(Coalesce("max_score", Value(bucket.max)), Value(bucket.max)),
+        "histogram": HistogramAdd("histogram", bucket.histogram),
+    }
+
+
+def merge_bucket(model, bucket, **lookup):
+    if not model.objects.filter(**lookup).update(**bucket_deltas(bucket)):
+        model.objects.get_or_create(**lookup)
+        model.objects.filter(**lookup).update(**bucket_deltas(bucket))
+
+
+def merge_buckets(quizzes, days):
+    with transaction.atomic():
+        for quiz_id, bucket in quizzes.items():
+            merge_bucket(QuizScoreStats, bucket, quiz_id=quiz_id)
+        for (quiz_id, day), bucket in days.items():
+            merge_bucket(QuizDailyScoreStats, bucket, quiz_id=quiz_id, day=day)
+
+
+def record_attempt_stats(attempts):
+    """
+    Adds freshly stored attempts to the rollups.
+    """
+    merge_buckets(*group_scores((a.quiz_id, a.score, a.submitted_at) for a in attempts))
+
+
+def rebuild_quiz_stats(chunk_size=2000):
+    """
+    Recomputes every rollup from raw attempts, streaming them in chunks.
+
+    Returns the number of attempts read.
+    """
+    rows = (
+        QuizAttempt.objects
+        .order_by("pk")
+        .values_list("quiz_id", "score", "submitted_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    read = 0
+    with transaction.atomic():
+        QuizScoreStats.objects.all().delete()
+        QuizDailyScoreStats.objects.all().delete()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                merge_buckets(*group_scores(chunk))
+                read += len(chunk)
+                chunk = []
+        merge_buckets(*group_scores(chunk))
+        read += len(chunk)
+    return read
@@ -1,3 +1,514 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assets.jobs import run_pending
+from assets.models import MediaFile, MediaJob
+from lessons.tests import make_lesson
+
+from .models import (
+    Quiz,
+    Question,
+    Option,
+    SortingPair,
+    MatchingGame,
+    VisualQuizQuestion,
+    VisualQuizOption,
+    AudioQuizQuestion,
+    AudioQuizOption,
+)
+from .cache import quiz_cache_stats, reset_quiz_cache_stats
+from .ingest import AttemptBuffer
+from .manifest import quiz_media
+from .models import QuizAttempt, QuizScoreStats, QuizDailyScoreStats
+from .stats import group_scores, merge_buckets, rebuild_quiz_stats
+from . import ingest
+
+
+def make_quiz(quiz_type, size=3, **kwargs):
+    """
+    Creates a quiz of `quiz_type` with `size` content items, each with a few options.
+    """
+    kwargs.setdefault("title", f"{quiz_type} quiz")
+    kwargs.setdefault("difficulty", "easy")
+    quiz = Quiz.objects.create(quiz_type=quiz_type, **kwargs)
+
+    for i in range(size):
+        if quiz_type == "multiple_choice":
+            question = Question.objects.create(quiz=quiz, text=f"Question {i}", order=i)
+            for j in range(3):
+                Option.objects.create(question=question, text=f"Option {j}", is_correct=j == 0)
+        elif quiz_type == "drag_drop":
+            SortingPair.objects.create(quiz=quiz, label="Animal", item=f"Item {i}", image=f"sorting_images/{i}.png")
+        elif quiz_type == "matching":
+            MatchingGame.objects.create(
+                quiz=quiz, image=f"matching_game/{i}.png", full_word="cat", missing_index=1,
+                distractor1="o", distractor2="u",
+            )
+        elif quiz_type == "visual":
+            question = VisualQuizQuestion.objects.create(quiz=quiz, question_text=f"Choose {i}")
+            for j in range(3):
+                VisualQuizOption.objects.create(question=question, image=f"visual_quiz_options/{j}.png", is_correct=j == 0)
+        elif quiz_type == "audio":
+            question = AudioQuizQuestion.objects.create(
+                quiz=quiz, image=f"audio_quiz_images/{i}.png", correct_answer="Good morning",
+            )
+            for j in range(3):
+                AudioQuizOption.objects.create(
+                    question=question, text=f"Option {j}", audio_file=f"audio_quiz_options/{j}.mp3", is_correct=j == 0,
+                )
+    return quiz
+
+
+class QuizDetailQueryCountTests(TestCase):
+    """
+    Detail endpoints must resolve in a fixed number of queries, whatever the quiz size.
+    """
+
+    # quiz row + one query per prefetched level of the type's content + one for the MediaFile rows of its images
+    expected_queries = {
+        "multiple_choice": 3,
+        "drag_drop": 3,
+        "matching": 3,
+        "audio": 4,
+        "visual": 1,  # QuizSerializer does not render visual questions
+        "fill_blank": 1,
+    }
+
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+
+    def test_quiz_detail_query_count_per_type(self):
+        for quiz_type, expected in self.expected_queries.items():
+            for size in (1, 10):
+                with self.subTest(quiz_type=quiz_type, size=size):
+                    quiz = make_quiz(quiz_type, size=size)
+                    with self.assertNumQueries(expected):
+                        response = self.client.get(reverse("quiz-detail", args=[quiz.pk]))
+                    self.assertEqual(response.status_code, 200)
+
+    def test_visual_quiz_detail_query_count(self):
+        for size in (1, 10):
+            quiz = make_quiz("visual", size=size)
+            caches["default"].clear()
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse("visual-quiz-detail", args=[quiz.pk]))
+            self.assertEqual(len(response.data["questions"]), size)
+            self.assertEqual(len(response.data["questions"][0]["options"]), 3)
+
+    def test_audio_quiz_detail_query_count(self):
+        for size in (1, 10):
+            quiz = make_quiz("audio", size=size)
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse("audio-quiz-detail", args=[quiz.pk]))
+            self.assertEqual(len(response.data["audio_questions"]), size)
+
+    def test_quiz_detail_payload_is_complete(self):
+        quiz = make_quiz("multiple_choice", size=2)
+        response = self.client.get(reverse("quiz-detail", args=[quiz.pk]))
+        self.assertEqual(len(response.data["questions"]), 2)
+        self.assertEqual(len(response.data["questions"][0]["options"]), 3)
+        self.assertEqual(response.data["sorting_pairs"], [])
+        self.assertEqual(response.data["audio_questions"], [])
+
+    def test_unknown_quiz_returns_404(self):
+        response = self.client.get(reverse("quiz-detail", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class QuizPayloadCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.quiz = make_quiz("multiple_choice", size=2)
+        self.url = reverse("quiz-detail", args=[self.quiz.pk])
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(quiz_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_reset_stats(self):
+        self.client.get(self.url)
+        reset_quiz_cache_stats()
+        self.assertEqual(quiz_cache_stats(), {"hits": 0, "misses": 0})
+
+    def test_payload_is_rebuilt_after_content_changes(self):
+        self.client.get(self.url)
+        option = Option.objects.filter(question__quiz=self.quiz).first()
+        option.text = "Updated"
+        option.save()
+        response = self.client.get(self.url)
+        texts = [o["text"] for q in response.data["questions"] for o in q["options"]]
+        self.assertIn("Updated", texts)
+
+        Question.objects.filter(quiz=self.quiz).first().delete()
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["questions"]), 1)
+
+        self.quiz.title = "Renamed"
+        self.quiz.save()
+        self.assertEqual(self.client.get(self.url).data["title"], "Renamed")
+
+    def test_child_changes_invalidate_visual_and_audio_payloads(self):
+        visual = make_quiz("visual", size=1)
+        url = reverse("visual-quiz-detail", args=[visual.pk])
+        self.client.get(url)
+        VisualQuizOption.objects.filter(question__quiz=visual).delete()
+        self.assertEqual(self.client.get(url).data["questions"][0]["options"], [])
+
+        audio = make_quiz("audio", size=1)
+        url = reverse("audio-quiz-detail", args=[audio.pk])
+        self.client.get(url)
+        option = AudioQuizOption.objects.filter(question__quiz=audio).first()
+        option.text = "Good night"
+        option.save()
+        texts = [o["text"] for o in self.client.get(url).data["audio_questions"][0]["options"]]
+        self.assertIn("Good night", texts)
+
+    def test_payload_is_keyed_by_origin(self):
+        quiz = make_quiz("drag_drop", size=1)
+        url = reverse("quiz-detail", args=[quiz.pk])
+        self.client.get(url)
+        response = self.client.get(url, HTTP_HOST="cdn.example.com")
+        self.assertEqual(quiz_cache_stats()["misses"], 2)
+        self.assertTrue(response.data["sorting_pairs"][0]["image_url"].startswith("http://cdn.example.com/"))
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+            with override_settings(CACHES=file_cache):
+                caches["default"].clear()
+                first = self.client.get(self.url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(self.url)
+                self.assertEqual(first.data, second.data)
+                self.assertEqual(quiz_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_versions_in_local_memory_warn_with_several_workers(self):
+        from practice_english.content_version import check_shared_versions
+
+        self.assertEqual(check_shared_versions(None), [])
+        with override_settings(WEB_WORKERS=4):
+            self.assertEqual([warning.id for warning in check_shared_versions(None)], ["practice_english.W001"])
+
+
+class QuizConditionalGetTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.quiz = make_quiz("drag_drop", size=2)
+
+    def test_quiz_detail_returns_304_without_queries(self):
+        url = reverse("quiz-detail", args=[self.quiz.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_quiz_detail_etag_changes_with_content(self):
+        url = reverse("quiz-detail", args=[self.quiz.pk])
+        etag = self.client.get(url)["ETag"]
+        SortingPair.objects.filter(quiz=self.quiz).first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_quiz_list_etag(self):
+        url = reverse("quiz-list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        make_quiz("matching", size=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+
+class QuizAssetManifestTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def store(self, *names):
+        # under their own names, as uploaded before content hashing
+        for name in names:
+            FileSystemStorage().save(name, ContentFile(name.encode()))
+
+    def manifest(self, quiz):
+        return self.client.get(reverse("quiz-assets", args=[quiz.pk])).data
+
+    def test_lists_every_stored_asset_with_size_and_hash(self):
+        quiz = make_quiz("audio", size=2, cover_image="quiz_covers/greetings.jpg")
+        # question 1's image is missing from storage and left out
+        self.store("quiz_covers/greetings.jpg", "audio_quiz_images/0.png", *(f"audio_quiz_options/{j}.mp3" for j in range(3)))
+
+        # files not hashed yet are listed without a hash and queued, not hashed in the request
+        manifest = self.manifest(quiz)
+        self.assertEqual({asset["hash"] for asset in manifest["assets"]}, {None})
+        self.assertFalse(MediaFile.objects.exists())
+        self.assertEqual(MediaJob.objects.filter(task="checksum", status=MediaJob.PENDING).count(), 5)
+        run_pending()  # and the quiz's audio sprite job
+
+        manifest = self.manifest(quiz)
+        assets = {asset["url"].split("/media/", 1)[1]: asset for asset in manifest["assets"]}
+        self.assertEqual(sorted(assets), [
+            "audio_quiz_images/0.png", "audio_quiz_options/0.mp3", "audio_quiz_options/1.mp3",
+            "audio_quiz_options/2.mp3", "quiz_covers/greetings.jpg",
+        ])
+        cover = assets["quiz_covers/greetings.jpg"]
+        self.assertEqual(cover["kind"], "image")
+        self.assertEqual(cover["type"], "image/jpeg")
+        self.assertEqual(cover["size"], len(b"quiz_covers/greetings.jpg"))
+        self.assertEqual(cover["hash"], hashlib.sha256(b"quiz_covers/greetings.jpg").hexdigest())
+        self.assertEqual(assets["audio_quiz_options/0.mp3"]["kind"], "audio")
+        self.assertEqual(manifest["total_size"], sum(asset["size"] for asset in assets.values()))
+
+    def test_sprite_replaces_the_clips_it_covers(self):
+        quiz = make_quiz("audio", size=1)
+        options = list(AudioQuizOption.objects.filter(question__quiz=quiz).order_by("pk"))
+        self.store("sprites/ab/abcd.mp3", *(option.audio_file.name for option in options))
+        Quiz.objects.filter(pk=quiz.pk).update(
+            audio_sprite="sprites/ab/abcd.mp3",
+            audio_sprite_map={str(option.pk): [0, 1] for option in options[:2]},
+        )
+        quiz.refresh_from_db()
+        names = sorted(asset["url"].split("/media/", 1)[1] for asset in self.manifest(quiz)["assets"])
+        self.assertEqual(names, sorted([options[2].audio_file.name, "sprites/ab/abcd.mp3"]))
+        # the payloads (and offline bundles) still link every clip
+        self.assertEqual(len(quiz_media(quiz)), 5)
+
+    def test_follows_the_quiz_type(self):
+        quiz = make_quiz("visual", size=1)
+        VisualQuizQuestion.objects.filter(quiz=quiz).update(question_image="visual_quiz_questions/0.png")
+        self.store("visual_quiz_questions/0.png", *(f"visual_quiz_options/{j}.png" for j in range(3)))
+        self.assertEqual(len(self.manifest(quiz)["assets"]), 4)
+
+        quiz = make_quiz("drag_drop", size=2)
+        self.store("sorting_images/0.png", "sorting_images/1.png")
+        self.assertEqual(len(self.manifest(quiz)["assets"]), 2)
+
+    def test_fixed_queries_and_cached_with_the_payload(self):
+        for size in (1, 10):
+            quiz = make_quiz("matching", size=size)
+            self.store(*(f"matching_game/{i}.png" for i in range(size)))
+            self.manifest(quiz)
+            run_pending()  # the checksum jobs it queued
+            caches["default"].clear()
+            # quiz, its matching items, their MediaFile rows
+            with self.assertNumQueries(3):
+                self.assertEqual(len(self.manifest(quiz)["assets"]), size)
+            with self.assertNumQueries(0):
+                self.manifest(quiz)
+
+        MatchingGame.objects.filter(quiz=quiz).first().delete()
+        self.assertEqual(len(self.manifest(quiz)["assets"]), 9)
+
+
+class QuizAttemptIngestionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.quiz = make_quiz("multiple_choice", size=1)
+        ingest._buffer = None
+
+    def tearDown(self):
+        ingest._buffer = None
+
+    def test_single_submit_is_synchronous_by_default(self):
+        response = self.client.post(reverse("submit-quiz"), {"quiz": self.quiz.pk, "score": 7}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(QuizAttempt.objects.get().score, 7)
+
+    def test_bulk_submit_uses_one_insert(self):
+        # first batch of the day also creates the rollup rows
+        self.client.post(reverse("submit-quiz-bulk"), [{"quiz": self.quiz.pk, "score": 1}], format="json")
+        query_counts = []
+        for size in (5, 50):
+            payload = [{"quiz": self.quiz.pk, "score": i} for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse("submit-quiz-bulk"), payload, format="json")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data, {"created": size})
+            inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "quizzes_quizattempt"')]
+            self.assertEqual(len(inserts), 1)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(QuizAttempt.objects.filter(quiz=self.quiz).count(), 56)
+
+    def test_bulk_submit_validation(self):
+        url = reverse("submit-quiz-bulk")
+        self.assertEqual(self.client.post(url, {"quiz": self.quiz.pk}, format="json").status_code, 400)
+        response = self.client.post(url, [{"quiz": self.quiz.pk, "score": 1}, {"quiz": 999, "score": 1}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+        with override_settings(QUIZ_ATTEMPT_BULK_LIMIT=2):
+            payload = [{"quiz": self.quiz.pk, "score": 1}] * 3
+            self.assertEqual(self.client.post(url, payload, format="json").status_code, 400)
+
+    @override_settings(QUIZ_ATTEMPT_BUFFER_ENABLED=True, QUIZ_ATTEMPT_BUFFER_SIZE=3, QUIZ_ATTEMPT_BUFFER_DELAY=60)
+    def test_buffered_submits_are_flushed_in_batches(self):
+        url = reverse("submit-quiz")
+        for score in (1, 2):
+            response = self.client.post(url, {"quiz": self.quiz.pk, "score": score}, format="json")
+            self.assertEqual(response.status_code, 202)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+        self.client.post(url, {"quiz": self.quiz.pk, "score": 3}, format="json")
+        self.assertEqual(QuizAttempt.objects.count(), 3)
+
+        self.client.post(url, {"quiz": self.quiz.pk, "score": 4}, format="json")
+        self.assertEqual(len(ingest.get_attempt_buffer()), 1)
+        ingest.get_attempt_buffer().flush()
+        self.assertEqual(QuizAttempt.objects.count(), 4)
+
+    def test_buffer_flush_when_empty(self):
+        self.assertEqual(AttemptBuffer().flush(), [])
+
+    def test_failed_batches_stay_buffered(self):
+        buffer = AttemptBuffer(max_size=2, max_delay=60)
+        self.addCleanup(buffer._take)
+        with mock.patch.object(ingest, "write_attempts", side_effect=DatabaseError("locked")) as write:
+            with self.assertLogs("quizzes.ingest", "ERROR"):
+                for score in (1, 2):
+                    buffer.add(QuizAttempt(quiz=self.quiz, score=score))
+            self.assertEqual(write.call_count, 1)
+            self.assertEqual(len(buffer), 2)
+            self.assertIsNotNone(buffer._timer)
+
+            with self.assertLogs("quizzes.ingest", "ERROR"), self.assertRaises(DatabaseError):
+                buffer.flush()
+            self.assertEqual(len(buffer), 2)
+
+        buffer.flush()
+        self.assertEqual(sorted(QuizAttempt.objects.values_list("score", flat=True)), [1, 2])
+        self.assertEqual(len(buffer), 0)
+
+
+class QuizScoreStatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.quiz = make_quiz("multiple_choice", size=1)
+
+    def submit(self, *scores):
+        payload = [{"quiz": self.quiz.pk, "score": score} for score in scores]
+        self.client.post(reverse("submit-quiz-bulk"), payload, format="json")
+
+    def test_rollups_follow_single_and_bulk_submits(self):
+        self.client.post(reverse("submit-quiz"), {"quiz": self.quiz.pk, "score": 4}, format="json")
+        self.submit(10, 4, 7)
+
+        stats = QuizScoreStats.objects.get(quiz=self.quiz)
+        self.assertEqual(stats.attempt_count, 4)
+        self.assertEqual(stats.score_sum, 25)
+        self.assertEqual((stats.min_score, stats.max_score), (4, 10))
+        self.assertEqual(stats.histogram, {"4": 2, "7": 1, "10": 1})
+        self.assertEqual(QuizDailyScoreStats.objects.get(quiz=self.quiz).attempt_count, 4)
+
+    def test_batches_are_added_without_reading_the_rollups(self):
+        self.submit(4, 7)
+        rows = [(self.quiz.pk, score, timezone.now()) for score in (2, 7, 9)]
+        with CaptureQueriesContext(connection) as queries:
+            merge_buckets(*group_scores(rows))
+        statements = [q["sql"].split()[0] for q in queries if "scorestats" in q["sql"]]
+        self.assertEqual(statements, ["UPDATE", "UPDATE"])
+
+        stats = QuizScoreStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempt_count, stats.score_sum), (5, 29))
+        self.assertEqual((stats.min_score, stats.max_score), (2, 9))
+        self.assertEqual(stats.histogram, {"2": 1, "4": 1, "7": 2, "9": 1})
+
+    def test_stats_api_does_not_scan_attempts(self):
+        self.submit(2, 4)
+        with self.assertNumQueries(3):  # quiz, rollup, daily rollups
+            response = self.client.get(reverse("quiz-stats", args=[self.quiz.pk]))
+        self.assertEqual(response.data["attempt_count"], 2)
+        self.assertEqual(response.data["average_score"], 3.0)
+        self.assertEqual(response.data["histogram"], {"2": 1, "4": 1})
+        self.assertEqual(len(response.data["daily"]), 1)
+
+    def test_stats_api_without_attempts(self):
+        response = self.client.get(reverse("quiz-stats", args=[self.quiz.pk]))
+        self.assertEqual(response.data["attempt_count"], 0)
+        self.assertIsNone(response.data["average_score"])
+        self.assertEqual(response.data["daily"], [])
+        self.assertEqual(self.client.get(reverse("quiz-stats", args=[999])).status_code, 404)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.submit(*range(11))
+        other = make_quiz("drag_drop", size=1)
+        QuizAttempt.objects.create(quiz=other, score=5)  # written outside the rollup path
+
+        self.assertEqual(rebuild_quiz_stats(chunk_size=3), 12)
+        stats = QuizScoreStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempt_count, stats.score_sum), (11, 55))
+        self.assertEqual(sum(stats.histogram.values()), 11)
+        self.assertEqual(QuizScoreStats.objects.get(quiz=other).attempt_count, 1)
+
+
+class QuizListAPITests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.url = reverse("quiz-list")
+        self.quizzes = [
+            make_quiz("multiple_choice" if i % 2 else "matching", size=0, difficulty="hard" if i % 3 else "easy")
+            for i in range(7)
+        ]
+
+    def test_plain_list_is_kept_without_pagination_params(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(response.data[0]["id"], self.quizzes[-1].pk)
+
+    def test_cursor_pagination_walks_the_catalog(self):
+        seen = []
+        response = self.client.get(self.url, {"page_size": 3})
+        while True:
+            seen.extend(quiz["id"] for quiz in response.data["results"])
+            if not response.data["next"]:
+                break
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data["next"])
+        self.assertEqual(seen, sorted((quiz.pk for quiz in self.quizzes), reverse=True))
+
+    def test_filters(self):
+        response = self.client.get(self.url, {"quiz_type": "matching", "difficulty": "easy"})
+        expected = [q.pk for q in self.quizzes if q.quiz_type == "matching" and q.difficulty == "easy"]
+        self.assertEqual(sorted(quiz["id"] for quiz in response.data), sorted(expected))
+
+        lesson = make_lesson()
+        Quiz.objects.filter(pk=self.quizzes[0].pk).update(lesson=lesson)
+        response = self.client.get(self.url, {"lesson": lesson.pk})
+        self.assertEqual([quiz["id"] for quiz in response.data], [self.quizzes[0].pk])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(self.url, {"fields": "title,quiz_type,unknown", "page_size": 2})
+        self.assertEqual(set(response.data["results"][0]), {"title", "quiz_type"})
@@ -1,12 +1,16 @@
 from django.urls import path
-from .views import QuizDetailAPIView, SubmitQuizAttemptAPIView, QuizListAPIView, VisualQuizDetailAPIView, AudioQuizDetailAPIView
+from .views import QuizDetailAPIView, SubmitQuizAttemptAPIView, BulkSubmitQuizAttemptAPIView, QuizListAPIView, VisualQuizDetailAPIView, AudioQuizDetailAPIView, QuizStatsAPIView, QuizAssetManifestAPIView
 
 
 urlpatterns = [
     path('', QuizListAPIView.as_view(), name='quiz-list'),
     path('<int:pk>/', QuizDetailAPIView.as_view(), name='quiz-detail'),
+    path('<int:pk>/stats/', QuizStatsAPIView.as_view(), name='quiz-stats'),
+    path('<int:pk>/assets/', QuizAssetManifestAPIView.as_view(), name='quiz-assets'),
     path('submit/', SubmitQuizAttemptAPIView.as_view(), name='submit-quiz'),
+    path('submit/bulk/', BulkSubmitQuizAttemptAPIView.as_view(), name='submit-quiz-bulk'),
     path("visual-quiz/<int:pk>/", VisualQuizDetailAPIView.as_view(), name="visual-quiz-detail"),
+    path("audio-quiz/<int:pk>/", AudioQuizDetailAPIView.as_view(), name="audio-quiz-detail"),
     
 
     
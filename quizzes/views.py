@@ -1,30 +1,182 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Quiz, QuizAttempt
-from .serializers import QuizSerializer, QuizAttemptSerializer, VisualQuizSerializer, QuizListSerializer
+from .models import Quiz, QuizAttempt, QuizScoreStats
+from .serializers import QuizSerializer, QuizAttemptSerializer, BulkQuizAttemptSerializer, VisualQuizSerializer, QuizListSerializer, QuizScoreStatsSerializer
+from .prefetch import QUIZ_SERIALIZER_RELATIONS, VISUAL_QUIZ_SERIALIZER_RELATIONS, prefetch_quiz
+from .manifest import quiz_asset_manifest
+from .cache import cached_quiz_payload, quiz_list_etag, quiz_detail_etag
+from .ingest import write_attempts, get_attempt_buffer
+from .pagination import QuizCursorPagination
+from assets.images import prefetch_images
+from practice_english.replicas import replica_reads
 
 
+@method_decorator(replica_reads, name="get")
+@method_decorator(etag(quiz_detail_etag), name="get")
 class QuizDetailAPIView(generics.RetrieveAPIView):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
 
+    def get_object(self):
+        # quiz_type is only known once the row is loaded, then prefetch by plan
+        return prefetch_quiz(super().get_object(), relations=QUIZ_SERIALIZER_RELATIONS)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = cached_quiz_payload(
+            request, "quiz", kwargs["pk"],
+            lambda: self.get_serializer(self.get_object()).data,
+        )
+        return Response(data)
+
 class SubmitQuizAttemptAPIView(generics.CreateAPIView):
     queryset = QuizAttempt.objects.all()
     serializer_class = QuizAttemptSerializer
 
+    def perform_create(self, serializer):
+        # same write path as batches so the score rollups stay in sync
+        serializer.instance = write_attempts([QuizAttempt(**serializer.validated_data)])[0]
+
+    def create(self, request, *args, **kwargs):
+        buffer = get_attempt_buffer()
+        if buffer is None:
+            return super().create(request, *args, **kwargs)
+
+        # write-behind: stored with the next batch, see quizzes/ingest.py
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        buffer.add(QuizAttempt(**serializer.validated_data))
+        return Response({"status": "accepted"}, status=status.HTTP_202_ACCEPTED)
+
+
+class BulkSubmitQuizAttemptAPIView(APIView):
+    """
+    Stores a list of attempts with a single INSERT batch.
+    """
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of attempts."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = getattr(settings, "QUIZ_ATTEMPT_BULK_LIMIT", 500)
+        if len(request.data) > limit:
+            return Response(
+                {"detail": f"At most {limit} attempts per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = BulkQuizAttemptSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        attempts = write_attempts(serializer.to_attempts())
+        return Response({"created": len(attempts)}, status=status.HTTP_201_CREATED)
+
+@method_decorator(replica_reads, name="get")
+@method_decorator(etag(quiz_list_etag), name="get")
 class QuizListAPIView(generics.ListAPIView):
     queryset = Quiz.objects.all().order_by("-id")
     serializer_class = QuizListSerializer
+    pagination_class = QuizCursorPagination
+
+    def get_fields(self):
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+        allowed = QuizListSerializer.Meta.fields
+        return [name for name in fields.split(",") if name in allowed] or None
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        params = self.request.query_params
+
+        quiz_type = params.get("quiz_type")
+        difficulty = params.get("difficulty")
+        lesson_id = params.get("lesson")
+
+        if quiz_type:
+            qs = qs.filter(quiz_type=quiz_type)
+
+        if difficulty:
+            qs = qs.filter(difficulty=difficulty)
+
+        if lesson_id and lesson_id.isdigit():
+            qs = qs.filter(lesson_id=lesson_id)
+
+        fields = self.get_fields()
+        if fields:
+            # the cursor needs the id even when the client doesn't render it
+            qs = qs.only("id", *(QuizListSerializer.SOURCE_FIELDS.get(name, name) for name in fields))
 
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        fields = kwargs.setdefault("fields", self.get_fields())
+        if args and kwargs.get("many") and (fields is None or "cover_image_variants" in fields):
+            # one MediaFile query for the covers of the page
+            prefetch_images(args[0], "cover_image")
+        return super().get_serializer(*args, **kwargs)
+
+@method_decorator(replica_reads, name="get")
 class VisualQuizDetailAPIView(APIView):
     def get(self, request, pk):
-        quiz = get_object_or_404(Quiz, pk=pk, quiz_type='visual')
-        serializer = VisualQuizSerializer(quiz, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build():
+            quiz = prefetch_quiz(
+                get_object_or_404(Quiz, pk=pk, quiz_type='visual'), relations=VISUAL_QUIZ_SERIALIZER_RELATIONS,
+            )
+            return VisualQuizSerializer(quiz, context={'request': request}).data
+
+        return Response(cached_quiz_payload(request, "visual", pk, build), status=status.HTTP_200_OK)
     
+@method_decorator(replica_reads, name="get")
 class AudioQuizDetailAPIView(generics.RetrieveAPIView):
     queryset = Quiz.objects.filter(quiz_type="audio")
-    serializer_class = QuizSerializer  # extend serializer to include audio questions
\ No newline at end of file
+    serializer_class = QuizSerializer  # extend serializer to include audio questions
+
+    def get_object(self):
+        return prefetch_quiz(super().get_object(), relations=QUIZ_SERIALIZER_RELATIONS)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = cached_quiz_payload(
+            request, "audio", kwargs["pk"],
+            lambda: self.get_serializer(self.get_object()).data,
+        )
+        return Response(data)
+
+
+@method_decorator(replica_reads, name="get")
+@method_decorator(etag(quiz_detail_etag), name="get")
+class QuizAssetManifestAPIView(APIView):
+    """
+    Every media file of a quiz with size and content hash, for preloading.
+    Cached with the quiz payloads, under the same version.
+    """
+
+    def get(self, request, pk):
+        def build():
+            return quiz_asset_manifest(get_object_or_404(Quiz, pk=pk), request)
+
+        return Response(cached_quiz_payload(request, "assets", pk, build))
+
+
+@method_decorator(replica_reads, name="get")
+class QuizStatsAPIView(APIView):
+    """
+    Read-only score statistics of a quiz, served from the rollup tables.
+    """
+
+    def get(self, request, pk):
+        quiz = get_object_or_404(Quiz, pk=pk)
+        stats = QuizScoreStats.objects.filter(quiz=quiz).first() or QuizScoreStats(quiz=quiz)
+
+        daily = quiz.daily_score_stats.order_by("-day")
+        days = request.query_params.get("days")
+        if days and days.isdigit():
+            daily = daily[:int(days)]
+
+        data = QuizScoreStatsSerializer(stats).data
+        data["daily"] = QuizScoreStatsSerializer(reversed(list(daily)), many=True).data
+        return Response(data, status=status.HTTP_200_OK)
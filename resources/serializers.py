@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from assets.serializers import ResponsiveImageField
 from .models import Worksheet
 
 class WorksheetSerializer(serializers.ModelSerializer):
+    image_variants = ResponsiveImageField(source="image")
+
     class Meta:
         model = Worksheet
-        fields = ['title', 'description', 'file', 'image', 'lesson', 'uploaded_at']
+        fields = ['title', 'description', 'file', 'image', 'image_variants', 'lesson', 'uploaded_at']
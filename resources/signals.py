@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+
+from practice_english.content_version import bump_version
+from .models import Worksheet
+
+
+def worksheet_changed(sender, instance, **kwargs):
+    bump_version("worksheets", f"worksheet:{instance.pk}")
+
+
+post_save.connect(worksheet_changed, sender=Worksheet, dispatch_uid="worksheet_saved")
+post_delete.connect(worksheet_changed, sender=Worksheet, dispatch_uid="worksheet_deleted")
@@ -0,0 +1,156 @@
+import math
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection, connections, router
+
+from practice_english.content_version import get_version
+from practice_english.replicas import primary_reads
+from .models import SearchDocument
+
+
+INDEX_VERSION = "search-index"
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+class FTS5Backend:
+    """
+    Ranked prefix search on the search_fts SQLite FTS5 table (BM25 ranking).
+    """
+
+    def search(self, terms, kinds=None, limit=None):
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (
+            "SELECT d.kind, d.object_id FROM search_fts "
+            "JOIN search_searchdocument d ON d.id = search_fts.rowid "
+            "WHERE search_fts MATCH %s"
+        )
+        params = [match]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+            params.extend(kinds)
+        sql += f" ORDER BY bm25(search_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}), d.id"
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+
+        # search results are not cached, so they may come from the read replica
+        with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 scoring and prefix expansion over a
+    sorted vocabulary, used where FTS5 is not available.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, documents):
+        self.documents = []
+        self.postings = {}
+        total_length = 0
+        for position, (kind, object_id, title, body) in enumerate(documents):
+            frequencies = {}
+            for term in title.split():
+                frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+            for term in body.split():
+                frequencies[term] = frequencies.get(term, 0) + BODY_WEIGHT
+            length = sum(frequencies.values())
+            total_length += length
+            self.documents.append((kind, object_id, length))
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[position] = frequency
+
+        self.vocabulary = sorted(self.postings)
+        self.average_length = total_length / len(self.documents) if self.documents else 0
+
+    def expand(self, prefix):
+        position = bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(prefix):
+            yield self.vocabulary[position]
+            position += 1
+
+    def term_scores(self, prefix):
+        count = len(self.documents)
+        scores = {}
+        for word in self.expand(prefix):
+            postings = self.postings[word]
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings.items():
+                length = self.documents[position][2]
+                norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+                score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                scores[position] = max(scores.get(position, 0), score)
+        return scores
+
+    def search(self, terms, kinds=None, limit=None):
+        scores = None
+        for term in terms:
+            term_scores = self.term_scores(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pos: score + term_scores[pos] for pos, score in scores.items() if pos in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = [
+            self.documents[position][:2]
+            for position, _ in ranked
+            if not kinds or self.documents[position][0] in kinds
+        ]
+        return results[:limit] if limit else results
+
+
+class PythonBackend:
+    """
+    Pure-Python fallback, the index is rebuilt from SearchDocument rows
+    whenever the search index version changes.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._index = None
+
+    def get_index(self):
+        version = get_version(INDEX_VERSION)
+        if self._index is None or version != self._version:
+            with primary_reads():
+                rows = SearchDocument.objects.order_by("pk").values_list("kind", "object_id", "title", "body")
+                self._index = InvertedIndex(rows.iterator())
+            self._version = version
+        return self._index
+
+    def search(self, terms, kinds=None, limit=None):
+        return self.get_index().search(terms, kinds=kinds, limit=limit)
+
+
+_backends = {}
+_fts5_available = None
+
+
+def fts5_available():
+    global _fts5_available
+    if _fts5_available is None:
+        _fts5_available = (
+            connection.vendor == "sqlite"
+            and "search_fts" in connection.introspection.table_names()
+        )
+    return _fts5_available
+
+
+def get_backend():
+    """
+    Returns the configured backend; SEARCH_BACKEND is "auto", "fts5" or "python".
+    """
+    name = getattr(settings, "SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = "fts5" if fts5_available() else "python"
+    if name not in _backends:
+        _backends[name] = FTS5Backend() if name == "fts5" else PythonBackend()
+    return _backends[name]
@@ -0,0 +1,42 @@
+from blog.models import BlogPost
+from lessons.models import Lesson
+from quizzes.models import Quiz
+from resources.models import Worksheet
+
+from .text import join_text
+
+
+def lesson_document(lesson):
+    return (
+        join_text(lesson.title, lesson.title_sr, lesson.title_de),
+        join_text(lesson.description, lesson.description_sr, lesson.description_de),
+    )
+
+
+def worksheet_document(worksheet):
+    return join_text(worksheet.title), join_text(worksheet.description)
+
+
+def quiz_document(quiz):
+    return join_text(quiz.title), ""
+
+
+def blog_document(post):
+    return (
+        join_text(post.title_en, post.title_sr, post.title_de),
+        join_text(
+            post.summary_en, post.summary_sr, post.summary_de,
+            post.content_en, post.content_sr, post.content_de,
+        ),
+    )
+
+
+# kind -> (model, function returning the (title, body) text of an object)
+DOCUMENT_TYPES = {
+    "lesson": (Lesson, lesson_document),
+    "worksheet": (Worksheet, worksheet_document),
+    "quiz": (Quiz, quiz_document),
+    "blog": (BlogPost, blog_document),
+}
+
+KIND_BY_MODEL = {model: kind for kind, (model, _) in DOCUMENT_TYPES.items()}
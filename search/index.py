@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, When, IntegerField
+
+from practice_english.content_version import bump_version
+from .backends import INDEX_VERSION, get_backend, fts5_available
+from .documents import DOCUMENT_TYPES, KIND_BY_MODEL
+from .models import SearchDocument, SearchTerm
+from .text import tokenize
+
+
+def document_terms(kind, object_id, title, body):
+    terms = {term[:64] for term in f"{title} {body}".split()}
+    return [SearchTerm(kind=kind, object_id=object_id, term=term) for term in sorted(terms)]
+
+
+def index_object(obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    title, body = DOCUMENT_TYPES[kind][1](obj)
+    with transaction.atomic():
+        SearchDocument.objects.update_or_create(
+            kind=kind, object_id=obj.pk,
+            defaults={"title": title, "body": body},
+        )
+        SearchTerm.objects.filter(kind=kind, object_id=obj.pk).delete()
+        SearchTerm.objects.bulk_create(document_terms(kind, obj.pk, title, body))
+    bump_version(INDEX_VERSION)
+
+
+def remove_object(obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    SearchDocument.objects.filter(kind=kind, object_id=obj.pk).delete()
+    SearchTerm.objects.filter(kind=kind, object_id=obj.pk).delete()
+    bump_version(INDEX_VERSION)
+
+
+def rebuild_index(chunk_size=500):
+    """
+    Re-indexes every searchable object. Returns the number of documents.
+    """
+    count = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        for kind, (model, build) in DOCUMENT_TYPES.items():
+            batch = []
+            for obj in model.objects.order_by("pk").iterator(chunk_size=chunk_size):
+                title, body = build(obj)
+                batch.append(SearchDocument(kind=kind, object_id=obj.pk, title=title, body=body))
+                if len(batch) >= chunk_size:
+                    count += _write_documents(batch)
+                    batch = []
+            count += _write_documents(batch)
+        if fts5_available():
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO search_fts(search_fts) VALUES('rebuild')")
+    bump_version(INDEX_VERSION)
+    return count
+
+
+def _write_documents(documents):
+    SearchDocument.objects.bulk_create(documents)
+    SearchTerm.objects.bulk_create(
+        term
+        for doc in documents
+        for term in document_terms(doc.kind, doc.object_id, doc.title, doc.body)
+    )
+    return len(documents)
+
+
+def term_matches(kind, term):
+    """
+    Ids of `kind` objects having a word that starts with `term`, as a subquery.
+
+    A range scan on the SearchTerm (kind, term) index.
+    """
+    return (
+        SearchTerm.objects
+        .filter(kind=kind, term__gte=term, term__lt=term + "\uffff")
+        .values_list("object_id", flat=True)
+    )
+
+
+def prefix_match_ids(kind, query):
+    """
+    Ids of `kind` objects having a word that starts with each word of `query`.
+    """
+    ids = None
+    for term in set(tokenize(query)):
+        matches = set(term_matches(kind, term))
+        ids = matches if ids is None else ids & matches
+        if not ids:
+            break
+    return ids or set()
+
+
+def prefix_filter(queryset, query):
+    """
+    Narrows `queryset` to objects matching `query` word prefixes, keeping its order.
+
+    Each word is a subquery, so broad prefixes never turn into long id lists.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return queryset.none()
+    kind = KIND_BY_MODEL[queryset.model]
+    for term in terms:
+        queryset = queryset.filter(pk__in=term_matches(kind, term))
+    return queryset
+
+
+def search(query, kinds=None, limit=None):
+    """
+    Ranked (kind, object_id) pairs matching every word of `query` as a prefix.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, kinds=kinds, limit=limit)
+
+
+def search_ids(kind, query, limit=None):
+    return [object_id for _, object_id in search(query, kinds=[kind], limit=limit)]
+
+
+def ranked_queryset(queryset, query, limit=None):
+    """
+    Filters `queryset` down to the best `limit` search hits for `query` (at most
+    SEARCH_RANKED_LIMIT), best match first.
+    """
+    limit = min(limit or settings.SEARCH_RANKED_LIMIT, settings.SEARCH_RANKED_LIMIT)
+    ids = search_ids(KIND_BY_MODEL[queryset.model], query, limit=limit)
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+def ranked_hits(queryset, query, **filters):
+    """
+    Ids of every hit of `queryset` for `query` matching `filters`, best first.
+    Counting them needs no objects.
+    """
+    ids = search_ids(KIND_BY_MODEL[queryset.model], query)
+    if filters and ids:
+        allowed = set(queryset.filter(**filters).values_list("pk", flat=True))
+        ids = [pk for pk in ids if pk in allowed]
+    return ids
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from lessons.models import Lesson
+from quizzes.models import Quiz
+from resources.models import Worksheet
+from search.suggest import build_index
+
+
+class Command(BaseCommand):
+    help = "Compares typeahead lookups in the suggestion index with the icontains queries they replace."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=["c", "col", "anim", "bo", "zzz"])
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        started = time.perf_counter()
+        index = build_index()
+        self.stdout.write(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms, {len(index.keys)} keys")
+
+        for query in options["queries"]:
+            trie_ms = self.measure(lambda: index.suggest(query, limit=8), repeat)
+            orm_ms = self.measure(lambda: self.icontains(query), repeat)
+            self.stdout.write(
+                f"{query!r:<10} index {trie_ms * 1000:8.1f} µs   icontains {orm_ms * 1000:8.1f} µs"
+                f"   ({orm_ms / trie_ms:.0f}x)"
+            )
+
+    def icontains(self, query):
+        lessons = Lesson.objects.filter(
+            Q(title__icontains=query) | Q(title_sr__icontains=query) | Q(title_de__icontains=query)
+        ).values_list("pk", "title")[:8]
+        quizzes = Quiz.objects.filter(title__icontains=query).values_list("pk", "title")[:8]
+        worksheets = Worksheet.objects.filter(title__icontains=query).values_list("pk", "title")[:8]
+        return list(lessons) + list(quizzes) + list(worksheets)
+
+    def measure(self, run, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from search.backends import get_backend
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search index for lessons, worksheets, quizzes and blog posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_index(chunk_size=options["chunk_size"])
+        backend = type(get_backend()).__name__
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents ({backend})."))
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE search_fts USING fts5("
+    "title, body, content='search_searchdocument', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER search_fts_insert AFTER INSERT ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER search_fts_delete AFTER DELETE ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER search_fts_update AFTER UPDATE ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS search_fts_insert",
+    "DROP TRIGGER IF EXISTS search_fts_delete",
+    "DROP TRIGGER IF EXISTS search_fts_update",
+    "DROP TABLE IF EXISTS search_fts",
+]
+
+
+def has_fts5(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def create_fts(apps, schema_editor):
+    # other databases (or SQLite builds without FTS5) use the pure-Python index
+    if has_fts5(schema_editor):
+        for sql in FTS_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,58 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# search.text and search.documents as of this migration, frozen so later
+# changes to them do not change what it does
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+SPECIAL_FOLDS = str.maketrans({"đ": "d", "ß": "ss", "æ": "ae", "ø": "o", "œ": "oe", "ł": "l"})
+
+
+def join_text(*parts):
+    text = " ".join(part for part in parts if part).casefold().translate(SPECIAL_FOLDS)
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(TOKEN_RE.findall(text))
+
+
+# kind -> (model, {"title" and "body": source fields})
+DOCUMENT_FIELDS = {
+    "lesson": ("lessons.Lesson", {
+        "title": ["title", "title_sr", "title_de"],
+        "body": ["description", "description_sr", "description_de"],
+    }),
+    "worksheet": ("resources.Worksheet", {"title": ["title"], "body": ["description"]}),
+    "quiz": ("quizzes.Quiz", {"title": ["title"], "body": []}),
+    "blog": ("blog.BlogPost", {
+        "title": ["title_en", "title_sr", "title_de"],
+        "body": ["summary_en", "summary_sr", "summary_de", "content_en", "content_sr", "content_de"],
+    }),
+}
+
+
+def populate(apps, schema_editor):
+    SearchDocument = apps.get_model("search", "SearchDocument")
+    db = schema_editor.connection.alias
+    for kind, (model, fields) in DOCUMENT_FIELDS.items():
+        SearchDocument.objects.using(db).bulk_create(
+            SearchDocument(kind=kind, object_id=obj.pk, **{
+                part: join_text(*(getattr(obj, field) for field in sources)) for part, sources in fields.items()
+            })
+            for obj in apps.get_model(model).objects.using(db).iterator()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0002_search_fts"),
+        ("lessons", "0009_lessonblock_title_de_lessonblock_title_sr"),
+        ("resources", "0003_worksheet_image"),
+        ("quizzes", "0025_quiz_catalog_indexes"),
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_populate_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('lesson', 'Lesson'), ('worksheet', 'Worksheet'), ('quiz', 'Quiz'), ('blog', 'Blog post')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('term', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term', 'object_id'], name='search_term_prefix_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'term'), name='unique_search_term')],
+            },
+        ),
+    ]
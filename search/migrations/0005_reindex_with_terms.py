@@ -0,0 +1,71 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# search.text and search.documents as of this migration, frozen so later
+# changes to them do not change what it does
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+SPECIAL_FOLDS = str.maketrans({"đ": "d", "ß": "ss", "æ": "ae", "ø": "o", "œ": "oe", "ł": "l"})
+SERBIAN_CYRILLIC = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "ђ": "đ", "е": "e", "ж": "ž",
+    "з": "z", "и": "i", "ј": "j", "к": "k", "л": "l", "љ": "lj", "м": "m", "н": "n",
+    "њ": "nj", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "ћ": "ć", "у": "u",
+    "ф": "f", "х": "h", "ц": "c", "ч": "č", "џ": "dž", "ш": "š",
+})
+
+
+def join_text(*parts):
+    text = " ".join(part for part in parts if part).casefold().translate(SERBIAN_CYRILLIC).translate(SPECIAL_FOLDS)
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(TOKEN_RE.findall(text))
+
+
+# kind -> (model, {"title" and "body": source fields})
+DOCUMENT_FIELDS = {
+    "lesson": ("lessons.Lesson", {
+        "title": ["title", "title_sr", "title_de"],
+        "body": ["description", "description_sr", "description_de"],
+    }),
+    "worksheet": ("resources.Worksheet", {"title": ["title"], "body": ["description"]}),
+    "quiz": ("quizzes.Quiz", {"title": ["title"], "body": []}),
+    "blog": ("blog.BlogPost", {
+        "title": ["title_en", "title_sr", "title_de"],
+        "body": ["summary_en", "summary_sr", "summary_de", "content_en", "content_sr", "content_de"],
+    }),
+}
+
+
+def reindex(apps, schema_editor):
+    # normalization now transliterates Serbian Cyrillic, rebuild documents and their terms
+    SearchDocument = apps.get_model("search", "SearchDocument")
+    SearchTerm = apps.get_model("search", "SearchTerm")
+    db = schema_editor.connection.alias
+
+    SearchDocument.objects.using(db).all().delete()
+    for kind, (model, fields) in DOCUMENT_FIELDS.items():
+        SearchDocument.objects.using(db).bulk_create(
+            SearchDocument(kind=kind, object_id=obj.pk, **{
+                part: join_text(*(getattr(obj, field) for field in sources)) for part, sources in fields.items()
+            })
+            for obj in apps.get_model(model).objects.using(db).iterator()
+        )
+
+    SearchTerm.objects.using(db).all().delete()
+    for doc in SearchDocument.objects.using(db).iterator():
+        terms = {term[:64] for term in f"{doc.title} {doc.body}".split()}
+        SearchTerm.objects.using(db).bulk_create(
+            SearchTerm(kind=doc.kind, object_id=doc.object_id, term=term) for term in sorted(terms)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0004_searchterm"),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable object (lesson, worksheet, quiz or blog post) with its text
+    in all languages, already normalized by search.text.normalize().
+
+    On SQLite the search_fts FTS5 table mirrors this table through triggers
+    (see migrations/0002_search_fts.py).
+    """
+    KIND_CHOICES = [
+        ("lesson", "Lesson"),
+        ("worksheet", "Worksheet"),
+        ("quiz", "Quiz"),
+        ("blog", "Blog post"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_search_document"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+
+class SearchTerm(models.Model):
+    """
+    Normalized words of a SearchDocument, one row per distinct word, so word
+    prefix lookups are range scans on the (kind, term) index instead of
+    LIKE '%...%' scans over every translated column.
+    """
+    kind = models.CharField(max_length=20, choices=SearchDocument.KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "term", "object_id"], name="search_term_prefix_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id", "term"], name="unique_search_term"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.kind} #{self.object_id})"
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+
+from .documents import KIND_BY_MODEL
+from .index import index_object, remove_object
+from .suggest import KIND_BY_MODEL as SUGGESTION_MODELS, suggestion_object_changed
+
+
+def searchable_saved(sender, instance, **kwargs):
+    index_object(instance)
+
+
+def searchable_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+for model in KIND_BY_MODEL:
+    post_save.connect(searchable_saved, sender=model, dispatch_uid=f"search_index_{model.__name__}")
+    post_delete.connect(searchable_deleted, sender=model, dispatch_uid=f"search_remove_{model.__name__}")
+
+
+def suggestion_saved(sender, instance, **kwargs):
+    suggestion_object_changed(instance)
+
+
+def suggestion_deleted(sender, instance, **kwargs):
+    suggestion_object_changed(instance, deleted=True)
+
+
+for model in SUGGESTION_MODELS:
+    post_save.connect(suggestion_saved, sender=model, dispatch_uid=f"suggest_index_{model.__name__}")
+    post_delete.connect(suggestion_deleted, sender=model, dispatch_uid=f"suggest_remove_{model.__name__}")
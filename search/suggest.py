@@ -0,0 +1,147 @@
+"""
+Typeahead suggestions from an in-process sorted array of title keys.
+
+Every title is stored once per word, keyed by the normalized text from that
+word to the end ("learn the colours", "the colours", "colours"), so a
+bisect on the typed prefix finds titles matching at any word start. Title
+starts sort before the other word starts, so they are scanned first.
+
+Each process keeps its own index. Saves in this process update it in place;
+other processes notice the bumped "suggest-index" version and reload it.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from practice_english.content_version import get_version, bump_version
+from practice_english.replicas import primary_reads
+from lessons.models import Lesson
+from quizzes.models import Quiz
+from resources.models import Worksheet
+
+from .text import tokenize
+
+
+SUGGEST_VERSION = "suggest-index"
+MAX_CANDIDATES = 200  # matching titles ranked per query
+
+
+def lesson_titles(lesson):
+    return {"en": lesson.title, "sr": lesson.title_sr, "de": lesson.title_de}
+
+
+def single_title(obj):
+    return {"en": obj.title}
+
+
+# kind -> (model, function returning the titles of an object per language)
+SUGGESTION_TYPES = {
+    "lesson": (Lesson, lesson_titles),
+    "quiz": (Quiz, single_title),
+    "worksheet": (Worksheet, single_title),
+}
+
+KIND_BY_MODEL = {model: kind for kind, (model, _) in SUGGESTION_TYPES.items()}
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.keys = []
+        self.entries = {}
+        self.titles = {}
+
+    def add(self, kind, pk, titles):
+        self.remove(kind, pk)
+        entries = []
+        for lang, title in titles.items():
+            if not title:
+                continue
+            self.titles[(kind, pk, lang)] = title
+            words = tokenize(title)
+            for position in range(len(words)):
+                entry = (position > 0, " ".join(words[position:]), kind, pk, lang)
+                insort(self.keys, entry)
+                entries.append(entry)
+        self.entries[(kind, pk)] = entries
+
+    def remove(self, kind, pk):
+        for entry in self.entries.pop((kind, pk), []):
+            index = bisect_left(self.keys, entry)
+            if index < len(self.keys) and self.keys[index] == entry:
+                del self.keys[index]
+            self.titles.pop((kind, pk, entry[4]), None)
+
+    def suggest(self, query, lang="en", limit=8, kinds=None):
+        prefix = " ".join(tokenize(query))
+        if not prefix:
+            return []
+
+        candidates = {}
+        for word_start in (False, True):
+            index = bisect_left(self.keys, (word_start, prefix))
+            while index < len(self.keys) and len(candidates) < MAX_CANDIDATES:
+                inner, key, kind, pk, title_lang = self.keys[index]
+                if inner != word_start or not key.startswith(prefix):
+                    break
+                index += 1
+                if kinds and kind not in kinds:
+                    continue
+                # title start beats word start, the visitor's language beats the others
+                rank = (word_start, title_lang != lang, len(key))
+                if (kind, pk) not in candidates or rank < candidates[(kind, pk)][0]:
+                    candidates[(kind, pk)] = (rank, title_lang)
+
+        ranked = heapq.nsmallest(limit, candidates.items(), key=lambda item: item[1][0])
+        return [
+            {"kind": kind, "id": pk, "title": self.titles[(kind, pk, title_lang)], "lang": title_lang}
+            for (kind, pk), (_, title_lang) in ranked
+        ]
+
+
+_index = None
+_version = None
+_lock = threading.Lock()  # one rebuild or in-place update at a time
+
+
+def build_index():
+    index = SuggestionIndex()
+    for kind, (model, titles) in SUGGESTION_TYPES.items():
+        for obj in model.objects.order_by("pk").iterator():
+            index.add(kind, obj.pk, titles(obj))
+    return index
+
+
+def get_suggestion_index():
+    global _index, _version
+    version = get_version(SUGGEST_VERSION)
+    if _index is None or version != _version:
+        with _lock:
+            # another thread may have loaded it while this one waited
+            if _index is None or version != _version:
+                with primary_reads():
+                    index = build_index()
+                _index, _version = index, version
+    return _index
+
+
+def suggestion_object_changed(obj, deleted=False):
+    """
+    Applies a save/delete to this process' index and tells other processes to reload.
+    """
+    global _version
+    with _lock:
+        in_sync = _index is not None and _version == get_version(SUGGEST_VERSION)
+        new_version = bump_version(SUGGEST_VERSION)[SUGGEST_VERSION]
+        if not in_sync:
+            return
+
+        kind = KIND_BY_MODEL[type(obj)]
+        if deleted:
+            _index.remove(kind, obj.pk)
+        else:
+            _index.add(kind, obj.pk, SUGGESTION_TYPES[kind][1](obj))
+        _version = new_version
+
+
+def suggest(query, lang="en", limit=8, kinds=None):
+    return get_suggestion_index().suggest(query, lang=lang, limit=limit, kinds=kinds)
@@ -0,0 +1,250 @@
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import BlogPost
+from lessons.models import Lesson
+from lessons.tests import make_lesson
+from quizzes.models import Quiz
+from resources.models import Worksheet
+
+from .index import search, rebuild_index, prefix_filter, prefix_match_ids, ranked_queryset
+from .models import SearchDocument, SearchTerm
+from . import suggest as suggest_module
+from .suggest import MAX_CANDIDATES, SuggestionIndex, suggest
+from .text import normalize, tokenize
+
+
+class TextTests(SimpleTestCase):
+    def test_normalize_folds_case_and_accents(self):
+        self.assertEqual(normalize("Čas ĆUĆ šŽ Đak"), "cas cuc sz dak")
+        self.assertEqual(normalize("Größe Übung"), "grosse ubung")
+
+    def test_normalize_transliterates_serbian_cyrillic(self):
+        self.assertEqual(normalize("Час"), "cas")
+        self.assertEqual(normalize("ЉУБАВ Њива Џеп Ђак"), "ljubav njiva dzep dak")
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Learn the colours! (4–5)"), ["learn", "the", "colours", "4", "5"])
+
+
+class SearchBackendTestMixin:
+    backend = None
+
+    def setUp(self):
+        caches["default"].clear()
+        self.settings_override = override_settings(SEARCH_BACKEND=self.backend)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.colours = make_lesson(
+            title="Colours", title_sr="Boje", title_de="Farben",
+            description="Red, blue and green", description_sr="Crvena, plava i zelena",
+        )
+        self.clock = make_lesson(title="Clock", title_sr="Čas i sat", description="What time is it? Colours of the day")
+        self.animals = make_lesson(title="Animals", description="Cats and dogs")
+        self.worksheet = Worksheet.objects.create(title="Colours worksheet", description="Colour the shapes", file="resources/c.pdf")
+        self.quiz = Quiz.objects.create(title="Colours quiz", quiz_type="visual", difficulty="easy")
+        self.post = BlogPost.objects.create(title_en="Why colours matter", content_en="...", title_de="Farben lernen")
+
+    def test_signals_keep_the_index_in_sync(self):
+        self.assertEqual(SearchDocument.objects.count(), 6)
+        self.animals.title = "Farm animals"
+        self.animals.save()
+        self.assertEqual(search("farm"), [("lesson", self.animals.pk)])
+        self.animals.delete()
+        self.assertEqual(search("farm"), [])
+
+    def test_prefix_search_in_every_language(self):
+        self.assertEqual(search("farb", kinds=["lesson"]), [("lesson", self.colours.pk)])
+        self.assertEqual(search("boj"), [("lesson", self.colours.pk)])
+        self.assertEqual(search("blog"), [])
+        self.assertEqual(search("farben", kinds=["blog"]), [("blog", self.post.pk)])
+
+    def test_accent_insensitive(self):
+        self.assertEqual(search("cas"), [("lesson", self.clock.pk)])
+        self.assertEqual(search("ČAS"), [("lesson", self.clock.pk)])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(
+            search("colours", kinds=["lesson"]),
+            [("lesson", self.colours.pk), ("lesson", self.clock.pk)],
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(search("colours time"), [("lesson", self.clock.pk)])
+        self.assertEqual(search("   "), [])
+
+    def test_rebuild(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search("colours"), [])
+        self.assertEqual(rebuild_index(chunk_size=2), 6)
+        self.assertEqual(len(search("colours")), 5)
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(search("colours")), 5)
+
+    def test_search_view(self):
+        response = self.client.get(reverse("search"), {"q": "colo"})
+        self.assertEqual(response.context["lessons_count"], 2)
+        self.assertEqual(response.context["lessons_preview"][0], self.colours)
+        self.assertEqual(response.context["worksheets_count"], 1)
+        self.assertEqual(response.context["quizzes_count"], 1)
+
+        response = self.client.get(reverse("search"), {"q": "colo", "age_group": "6-7"})
+        self.assertEqual(response.context["lessons_count"], 0)
+
+    def test_broad_queries_stay_bounded(self):
+        with override_settings(SEARCH_RANKED_LIMIT=1):
+            self.assertEqual(list(ranked_queryset(Lesson.objects.all(), "colo")), [self.colours])
+        # only the preview objects are loaded, hits are counted on the index
+        with override_settings(SEARCH_RANKED_LIMIT=1):
+            response = self.client.get(reverse("search"), {"q": "colo"})
+        self.assertEqual(response.context["lessons_count"], 2)
+        self.assertEqual(response.context["lessons_preview"], [self.colours, self.clock])
+
+    def test_show_all_pages_and_lesson_api(self):
+        response = self.client.get(reverse("lessons_show_all"), {"q": "boje"})
+        self.assertEqual([lesson.id for lesson in response.context["lessons"]], [self.colours.pk])
+
+        response = self.client.get(reverse("worksheets_show_all"), {"q": "shape"})
+        self.assertEqual(list(response.context["worksheets"]), [self.worksheet])
+
+        response = self.client.get(reverse("api_lesson_list"), {"q": "colours"})
+        self.assertEqual([lesson["id"] for lesson in response.json()], [self.colours.pk, self.clock.pk])
+
+
+class FTS5SearchTests(SearchBackendTestMixin, TestCase):
+    backend = "fts5"
+
+
+class PythonSearchTests(SearchBackendTestMixin, TestCase):
+    backend = "python"
+
+
+class SearchTermTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.clock = make_lesson(title="Clock", title_sr="Čas i sat", title_de="Die Uhr", description="", description_de="Größe")
+        self.cyrillic = make_lesson(title="School", title_sr="Школа", description="Classroom words")
+        self.worksheet = Worksheet.objects.create(title="Übung", description="Čitanje", file="resources/u.pdf")
+
+    def test_terms_follow_saves(self):
+        terms = set(SearchTerm.objects.filter(kind="lesson", object_id=self.clock.pk).values_list("term", flat=True))
+        self.assertEqual(terms, {"clock", "cas", "i", "sat", "die", "uhr", "grosse"})
+        self.clock.title_de = "Uhrzeit"
+        self.clock.save()
+        self.assertEqual(prefix_match_ids("lesson", "uhrz"), {self.clock.pk})
+        self.clock.delete()
+        self.assertFalse(SearchTerm.objects.filter(kind="lesson", object_id=self.clock.pk).exists())
+
+    def test_prefix_match_across_scripts_and_accents(self):
+        self.assertEqual(prefix_match_ids("lesson", "cas"), {self.clock.pk})
+        self.assertEqual(prefix_match_ids("lesson", "час"), {self.clock.pk})
+        self.assertEqual(prefix_match_ids("lesson", "skol"), {self.cyrillic.pk})
+        self.assertEqual(prefix_match_ids("lesson", "GROSSE"), {self.clock.pk})
+        self.assertEqual(prefix_match_ids("lesson", "cl"), {self.clock.pk, self.cyrillic.pk})
+        self.assertEqual(prefix_match_ids("lesson", "cl sat"), {self.clock.pk})
+        self.assertEqual(prefix_match_ids("lesson", "lock"), set())
+
+    def test_prefix_lookup_uses_the_term_index(self):
+        queryset = SearchTerm.objects.filter(kind="lesson", term__gte="cas", term__lt="cas\uffff")
+        self.assertIn("search_term_prefix_idx", queryset.explain())
+
+    def test_list_pages_use_prefix_matches(self):
+        response = self.client.get(reverse("lesson_list"), {"q": "čas"})
+        self.assertEqual([lesson.id for lesson in response.context["page_obj"]], [self.clock.pk])
+
+        response = self.client.get(reverse("resources-home"), {"q": "ubung citanje"})
+        self.assertEqual(list(response.context["page_obj"]), [self.worksheet])
+
+    def test_prefix_filter_uses_subqueries(self):
+        queryset = prefix_filter(Lesson.objects.order_by("pk"), "c")
+        self.assertEqual(list(queryset), [self.clock, self.cyrillic])
+        self.assertIn("search_searchterm", str(queryset.query))
+        self.assertFalse(prefix_filter(Lesson.objects.all(), "  ").exists())
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestionIndex()
+        self.index.add("lesson", 1, {"en": "Learn the colours", "sr": "Boje", "de": "Farben"})
+        self.index.add("lesson", 2, {"en": "Colourful animals"})
+        self.index.add("quiz", 3, {"en": "Colours quiz"})
+
+    def test_title_start_matches_first(self):
+        results = self.index.suggest("colo")
+        self.assertEqual([(r["kind"], r["id"]) for r in results], [("quiz", 3), ("lesson", 2), ("lesson", 1)])
+        self.assertEqual(results[2]["title"], "Learn the colours")
+
+    def test_language_and_kind(self):
+        self.assertEqual(self.index.suggest("far", lang="de")[0]["title"], "Farben")
+        self.assertEqual([r["id"] for r in self.index.suggest("colo", kinds=["quiz"])], [3])
+        self.assertEqual(len(self.index.suggest("colo", limit=1)), 1)
+        self.assertEqual(self.index.suggest(""), [])
+
+    def test_update_and_remove(self):
+        self.index.add("lesson", 1, {"en": "Numbers"})
+        self.assertEqual(self.index.suggest("boje"), [])
+        self.assertEqual(self.index.suggest("num")[0]["id"], 1)
+        self.index.remove("quiz", 3)
+        self.assertEqual([r["id"] for r in self.index.suggest("colo")], [2])
+        self.assertEqual(len(self.index.keys), 3)
+
+    def test_broad_prefixes_rank_every_kind_and_title_start(self):
+        for pk in range(10, 10 + MAX_CANDIDATES):
+            self.index.add("lesson", pk, {"en": f"Animal colours {pk}"})
+        self.index.add("quiz", 4, {"en": "Colourz"})
+        self.assertEqual([r["id"] for r in self.index.suggest("colo", kinds=["quiz"])], [4, 3])
+        self.assertEqual([(r["kind"], r["id"]) for r in self.index.suggest("colo", limit=3)], [
+            ("quiz", 4), ("quiz", 3), ("lesson", 2),
+        ])
+
+
+class SuggestAPITests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.lesson = make_lesson(title="Colours", title_sr="Boje")
+        self.quiz = Quiz.objects.create(title="Colours quiz", quiz_type="visual", difficulty="easy")
+
+    def test_suggest_endpoint(self):
+        response = self.client.get(reverse("search-suggest"), {"q": "col"})
+        self.assertEqual(
+            [(r["kind"], r["id"]) for r in response.json()["results"]],
+            [("lesson", self.lesson.pk), ("quiz", self.quiz.pk)],
+        )
+        response = self.client.get(reverse("search-suggest"), {"q": "col", "kind": "quiz", "limit": "x"})
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_index_follows_signals(self):
+        self.assertEqual(len(suggest("col")), 2)
+        self.quiz.delete()
+        Worksheet.objects.create(title="Colouring sheet", file="resources/c.pdf")
+        self.lesson.title_sr = "Бојанка"
+        self.lesson.save()
+        self.assertEqual([r["kind"] for r in suggest("col")], ["lesson", "worksheet"])
+        self.assertEqual(suggest("boj", lang="sr")[0]["title"], "Бојанка")
+
+    def test_concurrent_requests_build_the_index_once(self):
+        built = []
+
+        def build_index():
+            time.sleep(0.05)
+            built.append(SuggestionIndex())
+            return built[-1]
+
+        suggest_module._index = None
+        with mock.patch.object(suggest_module, "build_index", build_index):
+            threads = [threading.Thread(target=suggest_module.get_suggestion_index) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertIs(suggest_module._index, built[0])
+        suggest_module._index = None
@@ -0,0 +1,39 @@
+import re
+import unicodedata
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# letters NFKD does not decompose into a base letter + accent
+SPECIAL_FOLDS = str.maketrans({"đ": "d", "ß": "ss", "æ": "ae", "ø": "o", "œ": "oe", "ł": "l"})
+
+# Serbian Cyrillic -> Latin (lower case, applied after casefold)
+SERBIAN_CYRILLIC = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "ђ": "đ", "е": "e", "ж": "ž",
+    "з": "z", "и": "i", "ј": "j", "к": "k", "л": "l", "љ": "lj", "м": "m", "н": "n",
+    "њ": "nj", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "ћ": "ć", "у": "u",
+    "ф": "f", "х": "h", "ц": "c", "ч": "č", "џ": "dž", "ш": "š",
+})
+
+
+def normalize(text):
+    """
+    Lower-cases, transliterates Serbian Cyrillic and strips accents, so
+    "Час", "Čas" and "cas" all index the same way.
+    """
+    if not text:
+        return ""
+    text = text.casefold().translate(SERBIAN_CYRILLIC).translate(SPECIAL_FOLDS)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def join_text(*parts):
+    """
+    Normalized, space separated text of all non-empty parts.
+    """
+    return " ".join(tokenize(" ".join(part for part in parts if part)))
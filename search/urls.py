@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import SuggestAPIView
+
+urlpatterns = [
+    path("suggest/", SuggestAPIView.as_view(), name="search-suggest"),
+]
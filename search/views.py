@@ -0,0 +1,24 @@
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .suggest import SUGGESTION_TYPES, suggest
+
+
+class SuggestAPIView(APIView):
+    """
+    Typeahead: ?q=col&lang=sr&limit=8&kind=lesson
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        lang = request.query_params.get("lang", "en")
+        limit = request.query_params.get("limit", "8")
+        limit = min(int(limit), 20) if limit.isdigit() else 8
+        kinds = [kind for kind in request.query_params.getlist("kind") if kind in SUGGESTION_TYPES]
+
+        return Response({
+            "query": query,
+            "results": suggest(query, lang=lang, limit=limit, kinds=kinds or None),
+        })
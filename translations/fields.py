@@ -0,0 +1,42 @@
+from blog.models import BlogPost
+from lessons.catalog import CatalogBlock, CatalogLesson
+from lessons.models import Lesson, LessonBlock
+
+
+# Source language: its columns are always filled, blank translations fall back to them
+FALLBACK_LANGUAGE = "en"
+
+
+def columns(field, fallback=None):
+    """
+    {lang: column} of a field stored as `field` (or `fallback`), `field`_sr and `field`_de.
+    """
+    return {"en": fallback or field, "sr": f"{field}_sr", "de": f"{field}_de"}
+
+
+# kind -> (model, {translated field: {lang: column}})
+TRANSLATED_FIELDS = {
+    "lesson": (Lesson, {"title": columns("title"), "description": columns("description")}),
+    "lesson-block": (LessonBlock, {"title": columns("title")}),
+    "blog": (BlogPost, {
+        "title": columns("title", "title_en"),
+        "summary": columns("summary", "summary_en"),
+        "content": columns("content", "content_en"),
+    }),
+}
+
+# Large fields kept out of the projections, resolved from the object that shows them
+DETAIL_FIELDS = {"blog": {"content"}}
+
+KIND_BY_MODEL = {model: kind for kind, (model, _) in TRANSLATED_FIELDS.items()}
+
+# catalog rows (lessons.catalog) translate like the models they mirror
+KIND_BY_CLASS = {**KIND_BY_MODEL, CatalogLesson: "lesson", CatalogBlock: "lesson-block"}
+
+
+def projected_fields(kind):
+    """
+    {field: {lang: column}} of the `kind` fields stored in its projection.
+    """
+    detail = DETAIL_FIELDS.get(kind, ())
+    return {field: columns for field, columns in TRANSLATED_FIELDS[kind][1].items() if field not in detail}
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from translations.projection import rebuild_projection
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-language projection of lesson, lesson block and blog post translations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_projection(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Projected {count} translations."))
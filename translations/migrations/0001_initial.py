@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Translation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('lesson', 'Lesson'), ('lesson-block', 'Lesson block'), ('blog', 'Blog post')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('lang', models.CharField(max_length=8)),
+                ('fields', models.JSONField(default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'lang'], name='translation_kind_lang_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'lang'), name='unique_translation')],
+            },
+        ),
+    ]
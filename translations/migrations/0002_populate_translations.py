@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+LANGUAGES = ["en", "sr", "de"]
+
+# translations.fields as of this migration: kind -> (model, {field: {lang: column}})
+TRANSLATED_FIELDS = {
+    "lesson": ("lessons.Lesson", {
+        "title": {"en": "title", "sr": "title_sr", "de": "title_de"},
+        "description": {"en": "description", "sr": "description_sr", "de": "description_de"},
+    }),
+    "lesson-block": ("lessons.LessonBlock", {
+        "title": {"en": "title", "sr": "title_sr", "de": "title_de"},
+    }),
+    "blog": ("blog.BlogPost", {
+        "title": {"en": "title_en", "sr": "title_sr", "de": "title_de"},
+        "summary": {"en": "summary_en", "sr": "summary_sr", "de": "summary_de"},
+    }),
+}
+
+
+def populate(apps, schema_editor):
+    Translation = apps.get_model("translations", "Translation")
+    db = schema_editor.connection.alias
+    for kind, (model, fields) in TRANSLATED_FIELDS.items():
+        Translation.objects.using(db).bulk_create(
+            Translation(kind=kind, object_id=obj.pk, lang=lang, fields={
+                # blank translations fall back to English
+                field: getattr(obj, columns[lang]) or getattr(obj, columns["en"])
+                for field, columns in fields.items()
+            })
+            for obj in apps.get_model(model).objects.using(db).iterator()
+            for lang in LANGUAGES
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("translations", "0001_initial"),
+        ("lessons", "0011_lessonbundle"),
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class Translation(models.Model):
+    """
+    Translated fields of one object (lesson, lesson block or blog post) in one
+    language, with the fallbacks already resolved (see translations.fields),
+    so readers get a language without looking at the per-language columns.
+    Large fields (DETAIL_FIELDS) are not stored.
+    """
+    KIND_CHOICES = [
+        ("lesson", "Lesson"),
+        ("lesson-block", "Lesson block"),
+        ("blog", "Blog post"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    lang = models.CharField(max_length=8)
+    fields = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "lang"], name="translation_kind_lang_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id", "lang"], name="unique_translation"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} ({self.lang})"
@@ -0,0 +1,131 @@
+"""
+Per-language projection of translated fields.
+
+Translations live in parallel columns (title, title_sr, title_de, ...).
+Whenever a translated object is saved, its fields are resolved once for
+every language, blank translations falling back to the source language,
+and stored as Translation rows keyed by (kind, object id, language).
+
+Readers load the projection of a kind in one language as an {object id:
+fields} dict. It is kept in memory and reloaded with a single query when
+the kind's content version ("translations:<kind>") moves, which every
+projection write does. Large fields (DETAIL_FIELDS, e.g. a blog post's
+content) stay out of it: they are resolved from the object being shown.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from practice_english.content_version import bump_version, get_version
+from practice_english.replicas import primary_reads
+from .fields import (
+    DETAIL_FIELDS, FALLBACK_LANGUAGE, KIND_BY_CLASS, KIND_BY_MODEL, TRANSLATED_FIELDS, projected_fields,
+)
+from .models import Translation
+
+
+def languages():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def version_name(kind):
+    return f"translations:{kind}"
+
+
+def resolve(obj, columns, lang):
+    """
+    Value of a field stored in `columns` ({lang: column}) in `lang`, or in
+    the source language when that translation is blank.
+    """
+    column = columns.get(lang)
+    value = getattr(obj, column) if column else None
+    return value or getattr(obj, columns[FALLBACK_LANGUAGE])
+
+
+def translation_rows(kind, obj):
+    """
+    Unsaved Translation rows of `obj` (a `kind` object) for every language.
+    """
+    fields = projected_fields(kind)
+    return [
+        Translation(kind=kind, object_id=obj.pk, lang=lang, fields={
+            field: resolve(obj, columns, lang) for field, columns in fields.items()
+        })
+        for lang in languages()
+    ]
+
+
+def write_rows(rows):
+    Translation.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=["kind", "object_id", "lang"], update_fields=["fields"],
+    )
+
+
+def project_object(obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    write_rows(translation_rows(kind, obj))
+    bump_version(version_name(kind))
+
+
+def remove_object(obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    Translation.objects.filter(kind=kind, object_id=obj.pk).delete()
+    bump_version(version_name(kind))
+
+
+def rebuild_projection(chunk_size=500):
+    """
+    Re-projects every translated object. Returns the number of rows.
+    """
+    count = 0
+    with transaction.atomic():
+        Translation.objects.all().delete()
+        for kind, (model, _) in TRANSLATED_FIELDS.items():
+            batch = []
+            for obj in model.objects.order_by("pk").iterator(chunk_size=chunk_size):
+                batch.extend(translation_rows(kind, obj))
+                if len(batch) >= chunk_size:
+                    write_rows(batch)
+                    count += len(batch)
+                    batch = []
+            write_rows(batch)
+            count += len(batch)
+    bump_version(*(version_name(kind) for kind in TRANSLATED_FIELDS))
+    return count
+
+
+_projections = {}
+
+
+def get_projection(kind, lang):
+    """
+    {object id: {field: value}} of every `kind` object in `lang`.
+    """
+    version = get_version(version_name(kind))
+    cached = _projections.get((kind, lang))
+    if cached is None or cached[0] != version:
+        with primary_reads():
+            rows = Translation.objects.filter(kind=kind, lang=lang).values_list("object_id", "fields")
+            cached = _projections[(kind, lang)] = (version, dict(rows))
+    return cached[1]
+
+
+def translated_fields(obj, lang):
+    """
+    {field: value} of `obj` (a model instance or catalog row) in `lang`.
+    Objects missing from the projection (unsaved ones), languages without
+    one and DETAIL_FIELDS are resolved directly.
+    """
+    kind = KIND_BY_CLASS[type(obj)]
+    fields = get_projection(kind, lang).get(obj.pk) if lang in languages() else None
+    all_fields = TRANSLATED_FIELDS[kind][1]
+    if fields is None:
+        return {field: resolve(obj, columns, lang) for field, columns in all_fields.items()}
+    return {**fields, **{field: resolve(obj, all_fields[field], lang) for field in DETAIL_FIELDS.get(kind, ())}}
+
+
+def translate(obj, field, lang):
+    kind = KIND_BY_CLASS[type(obj)]
+    if field in DETAIL_FIELDS.get(kind, ()):
+        return resolve(obj, TRANSLATED_FIELDS[kind][1][field], lang)
+    return translated_fields(obj, lang)[field]
@@ -0,0 +1,37 @@
+from practice_english.middleware import supported_languages
+from .fields import KIND_BY_CLASS, TRANSLATED_FIELDS
+from .projection import translated_fields
+
+
+class TranslatedFieldsMixin:
+    """
+    For serializers of translated models (translations.fields). Given a
+    language, as context["lang"] or the request's ?lang=, translated fields
+    hold their projected value in it and the other per-language columns are
+    left out. Without one every column is returned.
+    """
+
+    def get_lang(self):
+        lang = self.context.get("lang")
+        request = self.context.get("request")
+        if lang is None and request is not None:
+            lang = request.GET.get("lang")
+        return lang if lang in supported_languages() else None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.get_lang():
+            for field, columns in TRANSLATED_FIELDS[KIND_BY_CLASS[self.Meta.model]][1].items():
+                for column in columns.values():
+                    if column != field:
+                        fields.pop(column, None)
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        lang = self.get_lang()
+        if lang:
+            for field, value in translated_fields(instance, lang).items():
+                if field in data:
+                    data[field] = value
+        return data
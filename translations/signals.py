@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+
+from .fields import KIND_BY_MODEL
+from .projection import project_object, remove_object
+
+
+def translated_saved(sender, instance, **kwargs):
+    project_object(instance)
+
+
+def translated_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+for model in KIND_BY_MODEL:
+    post_save.connect(translated_saved, sender=model, dispatch_uid=f"translations_project_{model.__name__}")
+    post_delete.connect(translated_deleted, sender=model, dispatch_uid=f"translations_remove_{model.__name__}")
@@ -0,0 +1,14 @@
+from django import template
+
+from ..projection import translate
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def translated(context, obj, field):
+    """
+    A translated field in the page language, with fallbacks:
+    {% translated post "title" %} or {% translated post "summary" as summary %}
+    """
+    return translate(obj, field, context.get("lang"))
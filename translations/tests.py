@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.models import BlogPost
+from lessons.catalog import get_catalog
+from lessons.models import Lesson, LessonBlock, LessonCategory
+from .models import Translation
+from .projection import get_projection, translate
+
+
+class TranslationProjectionTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        category = LessonCategory.objects.create(name="Basics")
+        self.lesson = Lesson.objects.create(
+            category=category, title="Colours", title_sr="Boje", title_de="",
+            description="Learn the colours", description_de="Lerne die Farben",
+        )
+        self.block = LessonBlock.objects.create(lesson=self.lesson, title="Blue", title_de="Blau")
+
+    def test_fallbacks_are_resolved_at_save_time(self):
+        fields = Translation.objects.get(kind="lesson", object_id=self.lesson.pk, lang="de").fields
+        self.assertEqual(fields, {"title": "Colours", "description": "Lerne die Farben"})
+        fields = Translation.objects.get(kind="lesson", object_id=self.lesson.pk, lang="sr").fields
+        self.assertEqual(fields, {"title": "Boje", "description": "Learn the colours"})
+        self.assertEqual(Translation.objects.filter(kind="lesson-block", object_id=self.block.pk).count(), 3)
+
+    def test_projection_follows_saves_and_deletes(self):
+        self.assertEqual(get_projection("lesson", "de")[self.lesson.pk]["title"], "Colours")
+        self.lesson.title_de = "Farben"
+        self.lesson.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_projection("lesson", "de")[self.lesson.pk]["title"], "Farben")
+        with self.assertNumQueries(0):
+            get_projection("lesson", "de")
+
+        self.lesson.delete()
+        self.assertFalse(Translation.objects.filter(kind__in=["lesson", "lesson-block"]).exists())
+
+    def test_catalog_rows_and_unsaved_objects(self):
+        row = get_catalog().by_id[self.lesson.pk]
+        self.assertEqual(translate(row, "title", "sr"), "Boje")
+        self.assertEqual(translate(row.blocks[0], "title", "de"), "Blau")
+        self.assertEqual(translate(Lesson(title="Shapes", title_sr="Oblici"), "title", "sr"), "Oblici")
+        self.assertEqual(translate(self.lesson, "title", None), "Colours")
+
+    def test_lesson_api_in_one_language(self):
+        client = APIClient()
+        url = reverse("api_lesson_detail", args=[self.lesson.pk])
+        full = client.get(url)
+        self.assertEqual(full.data["title_sr"], "Boje")
+
+        response = client.get(url, {"lang": "sr"})
+        self.assertEqual(response.data["title"], "Boje")
+        self.assertEqual(response.data["description"], "Learn the colours")
+        self.assertNotIn("title_sr", response.data)
+        self.assertNotIn("description_de", response.data)
+        self.assertEqual(response.data["blocks"][0]["title"], "Blue")
+        self.assertNotEqual(response["ETag"], full["ETag"])
+        self.assertLess(len(response.content), len(full.content))
+
+        listed = client.get(reverse("api_lesson_list"), {"lang": "de"}).data
+        self.assertEqual(listed[0]["description"], "Lerne die Farben")
+        self.assertEqual(listed[0]["blocks"][0]["title"], "Blau")
+
+        # unsupported languages return every column
+        self.assertIn("title_sr", client.get(url, {"lang": "xx"}).data)
+
+    def test_blog_pages(self):
+        post = BlogPost.objects.create(title_en="Hello", title_sr="Zdravo", summary_en="Hi there", content_en="<p>Body</p>")
+        response = self.client.get(reverse("blog_detail", args=[post.slug]), {"lang": "sr"})
+        self.assertContains(response, "Zdravo")
+        self.assertContains(response, "<p>Body</p>", html=True)
+        self.assertContains(self.client.get(reverse("blog_list"), {"lang": "de"}), "Hi there")
+
+    def test_blog_content_stays_out_of_the_projection(self):
+        post = BlogPost.objects.create(title_en="Hello", content_en="<p>Body</p>", content_de="<p>Text</p>")
+        self.assertEqual(get_projection("blog", "de")[post.pk], {"title": "Hello", "summary": ""})
+        self.assertEqual(translate(post, "content", "de"), "<p>Text</p>")
+        self.assertEqual(translate(post, "content", "sr"), "<p>Body</p>")
+        self.assertContains(self.client.get(reverse("blog_detail", args=[post.slug]), {"lang": "de"}), "<p>Text</p>", html=True)
+
+    def test_rebuild(self):
+        Translation.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_translations", stdout=out)
+        self.assertIn("Projected 6 translations", out.getvalue())
+        self.assertEqual(get_projection("lesson", "sr")[self.lesson.pk]["title"], "Boje")